@@ -5,9 +5,12 @@ from tensorflow.keras import layers
 
 class CNN(tf.keras.Model):
 
-    def __init__(self, inputShape=(1,3)):
+    def __init__(self, inputShape=(1,3), debug=True):
         
         super(CNN, self).__init__()
+
+        # print shapes and progress on every call
+        self.debug = debug
         
         self.inputLayer = layers.InputLayer(inputShape)
         self.conv1 = layers.Conv1D(8, 24, padding='causal', activation='relu')
@@ -16,16 +19,19 @@ class CNN(tf.keras.Model):
         #self.globalMaxPool = layers.GlobalMaxPooling1D()
         self.h1 = layers.Dense(32, activation='relu')
         self.outputLayer = layers.Dense(5, activation='softmax')
-        print('built model', flush=True)
+        if self.debug:
+            print('built model', flush=True)
 		
     def call(self, x):
         
-        print(x.shape)
-        print('calling model', flush=True)
+        if self.debug:
+            print(x.shape)
+            print('calling model', flush=True)
         x = self.inputLayer(x)
         x = self.conv1(x)
         x = self.maxPool(x)
-        print('hello', flush=True)
+        if self.debug:
+            print('hello', flush=True)
         #x = self.conv2(x)
         #x = self.globalMaxPool(x)
         x = self.h1(x)
@@ -44,6 +50,7 @@ class CNNTrainer():
         self.valAccMetric = tf.keras.metrics.CategoricalAccuracy()
         self.history = {'trainAcc':[], 'valAcc':[], 'trainLoss':[], 'valLoss':[]}
         self.weightsDir = weightsDir
+        self.trainStep = None
 
     def _train_step(self, xBatchTrain, yBatchTrain):
 
@@ -80,13 +87,6 @@ class CNNTrainer():
 
     def train(self, trainData, valData, epochs, batchSize, resume = False):
 
-        if resume:
-            self.model.load_weights(os.path.join(self.weightsDir, 'cnn_final_weights'))
-            print('loading weights from checkpoint')
-            print(self.weightsDir, flush=True)
-        else:
-            print('\nTraining from scratch\n', flush=True)
-
         x_train, y_train = trainData
         x_val, y_val = valData
         print('training set shape:', x_train.shape)
@@ -98,17 +98,36 @@ class CNNTrainer():
         valDataset = tf.data.Dataset.from_tensor_slices((x_val, y_val))
         valDataset = valDataset.batch(batchSize)
 
+        return self.train_datasets(trainDataset, valDataset, epochs, resume)
+
+    def train_datasets(self, trainDataset, valDataset, epochs, resume = False):
+
+        # trainDataset and valDataset are batched tf.data datasets
+        if resume:
+            self.model.load_weights(os.path.join(self.weightsDir, 'cnn_final_weights'))
+            print('loading weights from checkpoint')
+            print(self.weightsDir, flush=True)
+        else:
+            print('\nTraining from scratch\n', flush=True)
+
+        # traced once, batch size and path length are left open
+        xSpec, ySpec = trainDataset.element_spec
+        self.trainStep = tf.function(self._train_step, input_signature=[tf.TensorSpec([None, None, xSpec.shape[-1]], xSpec.dtype),
+                                                                        tf.TensorSpec([None, ySpec.shape[-1]], ySpec.dtype)])
+
         for epoch in range(epochs):
             
             print("\nStart of epoch {}\n".format(epoch))
 
+            numSeen = 0
             for step, (xBatchTrain, yBatchTrain) in enumerate(trainDataset):
 
-                lossValue = self._train_step(xBatchTrain, yBatchTrain)
+                lossValue = self.trainStep(xBatchTrain, yBatchTrain)
+                numSeen += xBatchTrain.shape[0]
 
                 if step % 2 == 0:
                     print("Training loss at step {}: {:.4f}".format(step, float(lossValue)))
-                    print("Seen so far: {} samples".format((step * batchSize)))
+                    print("Seen so far: {} samples".format(numSeen))
 
 
             self._save_metrics(lossValue, valDataset)
@@ -129,6 +148,9 @@ class CNNTester:
         self.accuracyInfo = {'tp': [], 'label count': []}
         self.weightsDir = weightsDir
 
+        # graph compiled prediction of a single instance
+        self.predict = tf.function(lambda x: model(x, training=False), input_signature=[tf.TensorSpec([1, None, 3], tf.float32)])
+
     def _transform_timeseries(self, instance):
 
         timeseries = []
@@ -155,10 +177,10 @@ class CNNTester:
                 if timeStep+stepSize >= instance.shape[1]:
                     break
 
-                inputTensor = instance[:, timeStep:timeStep+stepSize, :]
+                inputTensor = instance[:, timeStep:timeStep+stepSize, :].astype(np.float32)
                 
                 #inputTensor = tf.tensor(newInstance )
-                logits = self.model(inputTensor)
+                logits = self.predict(inputTensor)
                 prediction = np.argmax(logits)
 
                 if len(self.accuracyInfo['tp']) < i+1:
@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+from lstm import LSTM
+from numpy_lstm import NumpyLSTM
+
+def get_random_instance(numTimeSteps):
+
+    # normalized x, y and theta like the training loaders produce
+    return np.random.uniform(-1.0, 1.0, size=(1, numTimeSteps, 3)).astype(np.float32)
+
+def compare_with_keras(model, numpyModel, numInstances=20, numTimeSteps=30):
+
+    # largest difference of the stateful models' predictions, fed one
+    # timestep at a time like the planner does
+    maxError = 0.0
+
+    for i in range(numInstances):
+
+        instance = get_random_instance(numTimeSteps)
+        model.reset_states()
+        numpyModel.reset_states()
+
+        for t in range(numTimeSteps):
+
+            kerasPrediction = model(instance[:, t:t+1, :]).numpy()
+            numpyPrediction = numpyModel(instance[:, t:t+1, :])
+            maxError = max(maxError, float(np.max(np.abs(kerasPrediction - numpyPrediction))))
+
+    model.reset_states()
+
+    return maxError
+
+def compare_scorers(model, numpyModel, numInstances=20, maxTimeSteps=30):
+
+    # largest difference of the batched edge scorers on padded instances
+    # continuing from random states
+    lengths = np.random.randint(1, maxTimeSteps + 1, size=numInstances)
+    instances = [get_random_instance(length)[0] for length in lengths]
+    states = [[np.random.uniform(-0.5, 0.5, size=(1, numpyModel.units)).astype(np.float32) for j in range(2)] for i in range(numInstances)]
+
+    kerasPredictions, kerasStates = model.get_edge_scorer().score(instances, states)
+    numpyPredictions, numpyStates = numpyModel.score(instances, states)
+
+    maxError = 0.0
+    for i in range(numInstances):
+        maxError = max(maxError, float(np.max(np.abs(kerasPredictions[i] - numpyPredictions[i]))))
+        maxError = max(maxError, float(np.max(np.abs(kerasStates[i][0] - numpyStates[i][0]))))
+
+    return maxError
+
+def export(weightsFile, numpyFile, tolerance=1e-4):
+
+    model = LSTM()
+    model.load_weights(weightsFile)
+
+    # subclassed models restore their weights when they are built
+    model(np.zeros((1, 1, 3), dtype=np.float32))
+    model.reset_states()
+
+    numpyModel = NumpyLSTM.from_keras(model)
+
+    timestepError = compare_with_keras(model, numpyModel)
+    scorerError = compare_scorers(model, numpyModel)
+    print('max abs difference to keras, timesteps: {:.2e}, batched scorer: {:.2e}'.format(timestepError, scorerError))
+
+    if max(timestepError, scorerError) > tolerance:
+        print('numpy model does not match keras, not saving')
+        exit(1)
+
+    numpyModel.save(numpyFile)
+    print('saved', numpyFile)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Export trained lstm weights for the numpy inference engine used by the planner.')
+    parser.add_argument('--weights', type=str, help='Keras lstm weights to export.', default='..\\data\\tower_defense_dataset\\optimal_rrt_lstm_weights_planner\\lstm_final_weights')
+    parser.add_argument('--output', type=str, help='Numpy weights file, next to the keras weights by default.', default=None)
+
+    args = parser.parse_args()
+
+    numpyFile = args.output
+    if numpyFile is None:
+        numpyFile = args.weights + '.npz'
+
+    np.random.seed(0)
+    export(args.weights, numpyFile)
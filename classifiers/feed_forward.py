@@ -38,6 +38,7 @@ class FeedForwardTrainer:
         self.valAccMetric = tf.keras.metrics.CategoricalAccuracy()
         self.trainingHistory = {'trainAcc':[], 'valAcc':[], 'trainLoss':[], 'valLoss':[]}
         self.weightsDir = weightsDir
+        self.trainStep = None
 
     def _train_step(self, xBatchTrain, yBatchTrain):
 
@@ -88,13 +89,16 @@ class FeedForwardTrainer:
         valDataset = tf.data.Dataset.from_tensor_slices((x_val, y_val))
         valDataset = valDataset.batch(batchSize)
 
+        # traced once, only the batch size is left open
+        self.trainStep = tf.function(self._train_step, input_signature=list(trainDataset.element_spec))
+
         for epoch in range(epochs):
             
             print("\nStart of epoch {}\n".format(epoch))
 
             for step, (xBatchTrain, yBatchTrain) in enumerate(trainDataset):
 
-                lossValue = self._train_step(xBatchTrain, yBatchTrain)
+                lossValue = self.trainStep(xBatchTrain, yBatchTrain)
 
                 if step % 2 == 0:
                     print("Training loss at step {}: {:.4f}".format(step, float(lossValue)))
@@ -10,13 +10,17 @@ import math
 
 class LSTM(tf.keras.Model):
 
-    def __init__(self, inputShape=(1,3)):
+    def __init__(self, inputShape=(1,3), stateful=True, returnSequences=False):
         
         super(LSTM, self).__init__()
-        
+
+        # the stateful single output model is fed one timestep at a time, the
+        # non-stateful model with returnSequences classifies every timestep of
+        # whole sequences. Both have the same weights, so weights trained on
+        # sequences load into the stateful model
         self.inputLayer = layers.InputLayer(inputShape)
         self.mask = layers.Masking(mask_value = 0.0)
-        self.lstm = layers.LSTM(1024, stateful=True)
+        self.lstm = layers.LSTM(1024, stateful=stateful, return_sequences=returnSequences)
         self.h1 = layers.Dense(1024, activation='relu')
         self.h1 = layers.Dense(512, activation='relu')
         self.h2 = layers.Dense(256, activation='relu')
@@ -34,18 +38,152 @@ class LSTM(tf.keras.Model):
         x = self.h3(x)
 
         return self.outputLayer(x)
+
+    def get_states(self):
+
+        # copy of the stateful lstm's [h, c], None before the first call
+        if not self.lstm.built or self.lstm.states[0] is None:
+            return None
+
+        return [state.numpy() for state in self.lstm.states]
+
+    def initialize_states(self, states=None):
+
+        # continue from states returned by get_states, None starts a new
+        # sequence. An unbuilt layer starts from zero states on its first call
+        if not self.lstm.built:
+            return
+
+        self.lstm.reset_states(states)
+
+    def get_edge_scorer(self):
+
+        return LSTMEdgeScorer(self)
+
+class LSTMEdgeScorer:
+
+    # batched prediction of many sequences, each continuing from its own
+    # [h, c], in one call. Uses a non-stateful copy of the model's lstm
+    # weights, the copy is not tracked by the model so its checkpoints are
+    # unchanged
+
+    def __init__(self, model, numFeatures=3):
+
+        self.model = model
+
+        # restores deferred weights of a subclassed model
+        if not model.built:
+            model(np.zeros((1, 1, numFeatures), dtype=np.float32))
+            model.reset_states()
+
+        self.units = model.lstm.units
+        self.lstm = layers.LSTM(self.units, return_sequences=True, return_state=True)
+        self.lstm.build((None, None, numFeatures))
+        self.lstm.set_weights(model.lstm.get_weights())
+
+        stateSpec = tf.TensorSpec([None, self.units], tf.float32)
+        self.predict = tf.function(self._predict, input_signature=[tf.TensorSpec([None, None, numFeatures], tf.float32), stateSpec, stateSpec])
+
+    def _predict(self, x, h, c):
+
+        # padding is all zero like the model's masking layer expects, masked
+        # timesteps carry the state through so h and c are each sequence's last
+        mask = tf.reduce_any(tf.not_equal(x, 0.0), axis=-1)
+        x, h, c = self.lstm(x, mask=mask, initial_state=[h, c])
+        x = self.model.h1(x)
+        x = self.model.h2(x)
+        x = self.model.h3(x)
+
+        return self.model.outputLayer(x), h, c
+
+    def score(self, sequences, states):
+
+        # sequences is a list of (timesteps, features) arrays, states a list
+        # of [h, c] from get_states or None to start from zero. Returns the
+        # (timesteps, classes) predictions and final [h, c] of every sequence
+        numSequences = len(sequences)
+        pathLengths = [sequence.shape[0] for sequence in sequences]
+
+        x = np.zeros((numSequences, max(pathLengths), sequences[0].shape[1]), dtype=np.float32)
+        h = np.zeros((numSequences, self.units), dtype=np.float32)
+        c = np.zeros((numSequences, self.units), dtype=np.float32)
+
+        for i, (sequence, sequenceStates) in enumerate(zip(sequences, states)):
+            x[i, :pathLengths[i]] = sequence
+            if sequenceStates is not None:
+                h[i], c[i] = sequenceStates[0][0], sequenceStates[1][0]
+
+        predictions, h, c = self.predict(x, h, c)
+        predictions, h, c = predictions.numpy(), h.numpy(), c.numpy()
+
+        return [predictions[i, :pathLengths[i]] for i in range(numSequences)], [[h[i:i+1], c[i:i+1]] for i in range(numSequences)]
 		
+def compile_timestep_call(model, batchSize=1, numFeatures=3):
+
+    # graph compiled prediction of a single timestep, a stateful model keeps
+    # its state between calls just like the eager call
+    @tf.function(input_signature=[tf.TensorSpec([batchSize, 1, numFeatures], tf.float32)])
+    def timestep_call(x):
+        return model(x, training=False)
+
+    return timestep_call
+
+def compile_timestep_jacobian(model, numClasses=5, numFeatures=3):
+
+    # graph compiled prediction, loss and jacobian of the prediction w.r.t.
+    # the input of a single timestep
+    loss_fn = tf.keras.losses.CategoricalCrossentropy()
+
+    @tf.function(input_signature=[tf.TensorSpec([1, 1, numFeatures], tf.float32), tf.TensorSpec([1, numClasses], tf.float32)])
+    def timestep_jacobian(x, label):
+
+        with tf.GradientTape() as tape:
+
+            tape.watch(x)
+            logits = model(x, training=False)
+
+        lossValue = loss_fn(label, logits)
+
+        return logits, lossValue, tape.jacobian(logits, x)
+
+    return timestep_jacobian
+
+def get_timestep_mask(x):
+
+    # 1.0 for real timesteps, 0.0 for the all zero padding the masking layer skips
+    return tf.cast(tf.reduce_any(tf.not_equal(x, 0.0), axis=-1), tf.float32)
+
+def broadcast_labels(y, logits):
+
+    # (batch, classes) labels repeated for every timestep of (batch, timesteps, classes) logits
+    return tf.broadcast_to(tf.expand_dims(y, 1), tf.shape(logits))
+
 class LSTMTrainer():
 
-    def __init__(self, model, weightsDir):
+    def __init__(self, model, weightsDir, fullSequence=False):
         
         self.model = model
+        self.fullSequence = fullSequence
         self.optimizer = tf.keras.optimizers.Adam(learning_rate=0.00001)
         self.loss_fn = tf.keras.losses.CategoricalCrossentropy()
         self.trainAccMetric = tf.keras.metrics.CategoricalAccuracy()
         self.valAccMetric = tf.keras.metrics.CategoricalAccuracy()
         self.history = {'trainAcc':[], 'valAcc':[], 'trainLoss':[], 'valLoss':[]}
         self.weightsDir = weightsDir
+        self.trainStep = None
+
+    def _compile_train_step(self, xBatchTrain, yBatchTrain):
+
+        # traced once, whole sequences leave batch and timesteps open while
+        # the stateful lstm is always fed (batch, 1, features) timesteps
+        ySpec = tf.TensorSpec([None, yBatchTrain.shape[-1]], yBatchTrain.dtype)
+
+        if self.fullSequence:
+            xSpec = tf.TensorSpec([None, None, xBatchTrain.shape[-1]], xBatchTrain.dtype)
+            self.trainStep = tf.function(self._train_sequence_step, input_signature=[xSpec, ySpec])
+        else:
+            xSpec = tf.TensorSpec([xBatchTrain.shape[0], 1, xBatchTrain.shape[-1]], xBatchTrain.dtype)
+            self.trainStep = tf.function(self._train_step, input_signature=[xSpec, ySpec])
 
     def _train_step(self, xBatchTrain, yBatchTrain):
 
@@ -62,6 +200,42 @@ class LSTMTrainer():
 
         return lossValue
 
+    def _sequence_loss(self, xBatch, yBatch, logits):
+
+        # mean classification loss over the real timesteps of every sequence
+        mask = get_timestep_mask(xBatch)
+        losses = tf.keras.losses.categorical_crossentropy(broadcast_labels(yBatch, logits), logits)
+
+        return tf.reduce_sum(losses * mask) / tf.maximum(tf.reduce_sum(mask), 1.0)
+
+    def _train_sequence_step(self, xBatchTrain, yBatchTrain):
+
+        # one forward and backward pass over whole sequences, model has to
+        # return sequences
+        with tf.GradientTape() as tape:
+
+            logits = self.model(xBatchTrain, training=True)
+            lossValue = self._sequence_loss(xBatchTrain, yBatchTrain, logits)
+
+        grads = tape.gradient(lossValue, self.model.trainable_variables)
+        self.optimizer.apply_gradients(zip(grads, self.model.trainable_variables))
+
+        self.trainAccMetric.update_state(broadcast_labels(yBatchTrain, logits), logits, sample_weight=get_timestep_mask(xBatchTrain))
+
+        return lossValue
+
+    def _validate_batch(self, xBatchVal, yBatchVal):
+
+        valLogits = self.model(xBatchVal)
+
+        if self.fullSequence:
+            self.valAccMetric.update_state(broadcast_labels(yBatchVal, valLogits), valLogits, sample_weight=get_timestep_mask(xBatchVal))
+            return self._sequence_loss(xBatchVal, yBatchVal, valLogits)
+
+        self.valAccMetric.update_state(yBatchVal, valLogits)
+
+        return self.loss_fn(yBatchVal, valLogits)
+
     def _save_metrics(self, lossValue, valDataset):
 
         trainAcc = self.trainAccMetric.result()
@@ -72,9 +246,7 @@ class LSTMTrainer():
 
         for xBatchVal, yBatchVal in valDataset:
 
-            valLogits = self.model(xBatchVal)
-            self.valAccMetric.update_state(yBatchVal, valLogits)
-            lossValue = self.loss_fn(yBatchVal, valLogits)
+            lossValue = self._validate_batch(xBatchVal, yBatchVal)
 
         valAcc = self.valAccMetric.result()
         self.history['valAcc'].append(valAcc)
@@ -87,11 +259,14 @@ class LSTMTrainer():
 
         for batchNum, (xBatchTrain, yBatchTrain) in enumerate(trainDataset):
 
+            if self.trainStep is None:
+                self._compile_train_step(xBatchTrain, yBatchTrain)
+
             numTimeSteps = xBatchTrain.shape[1]
 
             for t in range(numTimeSteps-1):
                 xBatchTimeStep = xBatchTrain[:, t:t+1, :]
-                lossValue = self._train_step(xBatchTimeStep, yBatchTrain)
+                lossValue = self.trainStep(xBatchTimeStep, yBatchTrain)
 
                 if batchNum == 0 and t == 10:
                     self._save_metrics(lossValue, valDataset)
@@ -101,19 +276,29 @@ class LSTMTrainer():
             # reset state after each batch
             self.model.reset_states()
 
-    def train(self, trainData, valData, epochs, batchSize, resume = False):
+    def _train_sequence_epoch(self, trainDataset, valDataset):
 
-        if resume:
-            self.model.load_weights(os.path.join(self.weightsDir, 'lstm_final_weights'))
-            print('loading weights from checkpoint')
-            print(self.weightsDir, flush=True)
-        else:
-            print('training from scratch', flush=True)
+        for batchNum, (xBatchTrain, yBatchTrain) in enumerate(trainDataset):
+
+            if self.trainStep is None:
+                self._compile_train_step(xBatchTrain, yBatchTrain)
+
+            lossValue = self.trainStep(xBatchTrain, yBatchTrain)
+
+            if batchNum % 20 == 0:
+                print("Training loss in batch number {}: {:.4f}".format(batchNum, float(lossValue)))
+
+        self._save_metrics(lossValue, valDataset)
+
+    def train(self, trainData, valData, epochs, batchSize, resume = False):
 
         x_train, y_train = trainData
         x_val, y_val = valData
 
+        # the stateful lstm needs equally sized batches
         self.batchSize = (x_train.shape[0] + x_val.shape[0]) // 100
+        if self.fullSequence:
+            self.batchSize = batchSize
         
         print('Shape of training dataset:', x_train.shape)
         print('Batch size:', self.batchSize)
@@ -124,10 +309,25 @@ class LSTMTrainer():
         valDataset = tf.data.Dataset.from_tensor_slices((x_val, y_val))
         valDataset = valDataset.batch(self.batchSize)
 
+        return self.train_datasets(trainDataset, valDataset, epochs, resume)
+
+    def train_datasets(self, trainDataset, valDataset, epochs, resume = False):
+
+        # trainDataset and valDataset are batched tf.data datasets
+        if resume:
+            self.model.load_weights(os.path.join(self.weightsDir, 'lstm_final_weights'))
+            print('loading weights from checkpoint')
+            print(self.weightsDir, flush=True)
+        else:
+            print('training from scratch', flush=True)
+
         for epoch in range(epochs):
             
             print("\nStart of epoch {}\n".format(epoch))
-            self._train_epoch(trainDataset, valDataset)
+            if self.fullSequence:
+                self._train_sequence_epoch(trainDataset, valDataset)
+            else:
+                self._train_epoch(trainDataset, valDataset)
 
             self.model.save_weights(os.path.join(self.weightsDir, 'lstm_weights_epoch_{}'.format(epoch)))
             print('saving weights {}/lstm_weights_epoch_{}'.format(self.weightsDir, epoch))
@@ -145,6 +345,7 @@ class LSTMTester:
         self.numSamples = len(dataset.data[1])
         self.accuracyInfo = {'tp': {}, 'label count': {}}
         self.weightsDir = weightsDir
+        self.timestepCall = compile_timestep_call(model)
 
     def test(self):
 
@@ -158,9 +359,9 @@ class LSTMTester:
 
             for t in range(instance.shape[1]):
 
-                inputTensor = instance[:, t, :].reshape(1,1,3)
+                inputTensor = instance[:, t, :].reshape(1,1,3).astype(np.float32)
                 
-                logits = self.model(inputTensor)
+                logits = self.timestepCall(inputTensor)
                 prediction = np.argmax(logits)
                 
                 timeToGoal = numTimeSteps - t
@@ -189,6 +390,7 @@ class LSTMGradientAnalyzer:
         self.instance = None
         self.label = None
         self.gradientMagnitudes = None
+        self.timestepJacobian = compile_timestep_jacobian(model)
 
     def _calculate_gradient_magnitudes(self, grads):
 
@@ -219,29 +421,15 @@ class LSTMGradientAnalyzer:
 
         grads = []
         predictions = []
-        label = self.label
+        label = self.label.reshape((1,5)).astype(np.float32)
         self.losses = []
 
         for t in range(self.instance.shape[1]):
 
-            success = False
-            x = tf.constant(self.instance[:, t,:], shape=(1,1,3))
-
-            logits = None
-
-            with tf.GradientTape() as tape:
-
-                tape.watch(x)
-                logits = self.model(x)
-                label = label.reshape((1,5))
-                lossValue = self.loss_fn(label, logits)
-
-                if np.argmax(logits) == np.argmax(label):
-                    success = True
-
-                self.losses.append(lossValue)
+            x = self.instance[:, t,:].reshape((1,1,3)).astype(np.float32)
 
-            jacobian = tape.jacobian(logits, x)
+            logits, lossValue, jacobian = self.timestepJacobian(x, label)
+            self.losses.append(lossValue)
 
             if t < self.timeSteps:
                 grads.append(jacobian.numpy().reshape(5,3))
@@ -0,0 +1,221 @@
+import numpy as np
+
+# Forward pass of classifiers.lstm.LSTM in plain NumPy for the planner's
+# entropy cost. Weights are copied from a trained Keras model once with
+# from_keras and saved to an npz file, loading and running the model after
+# that never imports TensorFlow.
+#
+# Kernels follow the Keras LSTM layout, the input, forget, cell and output
+# gates side by side, with a sigmoid recurrent activation and tanh
+# activation. All math is float32 like the Keras model.
+
+def sigmoid(x):
+
+    # in place
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    np.reciprocal(x, out=x)
+
+    return x
+
+def relu(x):
+
+    return np.maximum(x, 0.0, out=x)
+
+def softmax(x):
+
+    x -= np.max(x, axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= np.sum(x, axis=-1, keepdims=True)
+
+    return x
+
+def linear(x):
+
+    return x
+
+ACTIVATIONS = {'relu': relu, 'softmax': softmax, 'linear': linear, 'sigmoid': sigmoid, 'tanh': lambda x: np.tanh(x, out=x)}
+
+class NumpyLSTM:
+
+    def __init__(self, kernel, recurrentKernel, bias, denseLayers):
+
+        # denseLayers is a list of (kernel, bias, activation name)
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrentKernel = np.ascontiguousarray(recurrentKernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.denseLayers = [(np.asarray(W, dtype=np.float32), np.asarray(b, dtype=np.float32), activation) for W, b, activation in denseLayers]
+        self.units = self.recurrentKernel.shape[0]
+        self.numFeatures = self.kernel.shape[0]
+
+        for W, b, activation in self.denseLayers:
+            if activation not in ACTIVATIONS:
+                raise ValueError('unsupported activation {}'.format(activation))
+
+        # [h, c] of the stateful model, None starts from zero
+        self.states = None
+
+        # gate buffer of the last batch size, reused between timesteps
+        self._gates = None
+
+    @classmethod
+    def from_keras(cls, model):
+
+        # model is a built classifiers.lstm.LSTM
+        if model.lstm.recurrent_activation.__name__ != 'sigmoid' or model.lstm.activation.__name__ != 'tanh':
+            raise ValueError('only sigmoid recurrent and tanh activations are supported')
+
+        kernel, recurrentKernel, bias = model.lstm.get_weights()
+        denseLayers = []
+        for layer in (model.h1, model.h2, model.h3, model.outputLayer):
+            W, b = layer.get_weights()
+            denseLayers.append((W, b, layer.activation.__name__))
+
+        return cls(kernel, recurrentKernel, bias, denseLayers)
+
+    def save(self, fileName):
+
+        arrays = {'kernel': self.kernel, 'recurrent_kernel': self.recurrentKernel, 'bias': self.bias,
+                  'activations': np.array([activation for W, b, activation in self.denseLayers])}
+        for i, (W, b, activation) in enumerate(self.denseLayers):
+            arrays['dense_{}_kernel'.format(i)] = W
+            arrays['dense_{}_bias'.format(i)] = b
+
+        # np.savez appends .npz to names without it
+        with open(fileName, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, fileName):
+
+        with np.load(fileName) as weights:
+            activations = weights['activations'].tolist()
+            denseLayers = [(weights['dense_{}_kernel'.format(i)], weights['dense_{}_bias'.format(i)], activation) for i, activation in enumerate(activations)]
+
+            return cls(weights['kernel'], weights['recurrent_kernel'], weights['bias'], denseLayers)
+
+    def _get_gate_buffer(self, batchSize):
+
+        if self._gates is None or self._gates.shape[0] != batchSize:
+            self._gates = np.empty((batchSize, 4 * self.units), dtype=np.float32)
+
+        return self._gates
+
+    def _run_lstm(self, x, h, c):
+
+        # x (batch, timesteps, features), returns the lstm output of every
+        # timestep and the final h and c. All zero timesteps are masked like
+        # the Keras masking layer does, they carry the state through
+        units = self.units
+        batchSize, numTimeSteps = x.shape[0], x.shape[1]
+        mask = np.any(x != 0.0, axis=-1)
+
+        h = np.array(h, dtype=np.float32)
+        c = np.array(c, dtype=np.float32)
+        outputs = np.empty((batchSize, numTimeSteps, units), dtype=np.float32)
+        gates = self._get_gate_buffer(batchSize)
+
+        # input projection of every timestep in one product
+        projections = np.matmul(x, self.kernel)
+        projections += self.bias
+
+        for t in range(numTimeSteps):
+
+            np.dot(h, self.recurrentKernel, out=gates)
+            gates += projections[:, t]
+
+            sigmoid(gates[:, :2 * units])
+            np.tanh(gates[:, 2 * units:3 * units], out=gates[:, 2 * units:3 * units])
+            sigmoid(gates[:, 3 * units:])
+
+            inputGate = gates[:, :units]
+            forgetGate = gates[:, units:2 * units]
+            cellGate = gates[:, 2 * units:3 * units]
+            outputGate = gates[:, 3 * units:]
+
+            if mask[:, t].all():
+                c *= forgetGate
+                inputGate *= cellGate
+                c += inputGate
+                np.tanh(c, out=h)
+                h *= outputGate
+            else:
+                rows = np.flatnonzero(mask[:, t])
+                c[rows] = (forgetGate[rows] * c[rows]) + (inputGate[rows] * cellGate[rows])
+                h[rows] = outputGate[rows] * np.tanh(c[rows])
+
+            outputs[:, t] = h
+
+        return outputs, h, c
+
+    def _run_dense(self, x):
+
+        for W, b, activation in self.denseLayers:
+            x = np.matmul(x, W)
+            x += b
+            x = ACTIVATIONS[activation](x)
+
+        return x
+
+    def _get_zero_states(self, batchSize):
+
+        return [np.zeros((batchSize, self.units), dtype=np.float32), np.zeros((batchSize, self.units), dtype=np.float32)]
+
+    def __call__(self, x, training=False):
+
+        # stateful call like the Keras model, x is (batch, timesteps,
+        # features) and the prediction of the last timestep is returned
+        x = np.asarray(x, dtype=np.float32)
+
+        if self.states is None or self.states[0].shape[0] != x.shape[0]:
+            self.states = self._get_zero_states(x.shape[0])
+
+        outputs, h, c = self._run_lstm(x, self.states[0], self.states[1])
+        self.states = [h, c]
+
+        return self._run_dense(outputs[:, -1])
+
+    def get_states(self):
+
+        # copy of [h, c], None before the first call
+        if self.states is None:
+            return None
+
+        return [state.copy() for state in self.states]
+
+    def initialize_states(self, states=None):
+
+        # continue from states returned by get_states, None starts a new sequence
+        self.states = None if states is None else [np.array(state, dtype=np.float32) for state in states]
+
+    def reset_states(self):
+
+        self.states = None
+
+    def get_edge_scorer(self):
+
+        # scores batches itself, see score
+        return self
+
+    def score(self, sequences, states):
+
+        # same as classifiers.lstm.LSTMEdgeScorer.score. sequences is a list
+        # of (timesteps, features) arrays, states a list of [h, c] or None to
+        # start from zero. Returns the (timesteps, classes) predictions and
+        # final [h, c] of every sequence
+        numSequences = len(sequences)
+        pathLengths = [sequence.shape[0] for sequence in sequences]
+
+        x = np.zeros((numSequences, max(pathLengths), self.numFeatures), dtype=np.float32)
+        h, c = self._get_zero_states(numSequences)
+
+        for i, (sequence, sequenceStates) in enumerate(zip(sequences, states)):
+            x[i, :pathLengths[i]] = sequence
+            if sequenceStates is not None:
+                h[i], c[i] = sequenceStates[0][0], sequenceStates[1][0]
+
+        outputs, h, c = self._run_lstm(x, h, c)
+        predictions = self._run_dense(outputs)
+
+        return [predictions[i, :pathLengths[i]] for i in range(numSequences)], [[h[i:i+1], c[i:i+1]] for i in range(numSequences)]
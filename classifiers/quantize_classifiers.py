@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+from lstm import LSTM
+from feed_forward import FeedForward
+from tflite_classifiers import TFLiteLSTM, TFLiteFeedForward
+from data.loaders.val_loader import ValidateDataLoader
+
+# Post-training quantization of the trained lstm and feed forward models with
+# TensorFlow Lite, and a parity report of every converted model against the
+# float32 Keras model on the validation set.
+#
+# int8 stores the weights as int8 and quantizes activations on the fly
+# (dynamic range quantization), so no representative dataset is needed.
+# float16 only halves the weights on disk, they are run in float32 on CPU.
+# float32 converts without quantization and is the throughput baseline.
+
+PRECISIONS = ('float32', 'float16', 'int8')
+
+def convert(kerasModel, precision):
+
+    if precision not in PRECISIONS:
+        raise ValueError('unsupported precision {}'.format(precision))
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(kerasModel)
+
+    if precision != 'float32':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if precision == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+
+    return converter.convert()
+
+def build_lstm_step_model(model, numFeatures=3):
+
+    # single timestep of a built classifiers.lstm.LSTM with explicit states,
+    # see tflite_classifiers.TFLiteLSTM for the input and output layout
+    units = model.lstm.units
+    inputs = tf.keras.Input(shape=(numFeatures + 2 * units,), batch_size=1)
+
+    x = tf.reshape(inputs[:, :numFeatures], (1, 1, numFeatures))
+    h = inputs[:, numFeatures:numFeatures + units]
+    c = inputs[:, numFeatures + units:]
+
+    lstm = layers.LSTM(units, return_state=True)
+    y, hOut, cOut = lstm(x, initial_state=[h, c])
+    lstm.set_weights(model.lstm.get_weights())
+
+    y = model.h1(y)
+    y = model.h2(y)
+    y = model.h3(y)
+    y = model.outputLayer(y)
+
+    return tf.keras.Model(inputs, tf.concat([y, hOut, cOut], axis=1))
+
+def build_feed_forward_model(model, truncation):
+
+    # functional wrapper with a fixed batch of one, subclassed models do not
+    # convert without one
+    inputs = tf.keras.Input(shape=(3, truncation), batch_size=1)
+
+    return tf.keras.Model(inputs, model(inputs))
+
+def load_lstm(weightsDir):
+
+    model = LSTM()
+    model.load_weights(os.path.join(weightsDir, 'lstm_final_weights'))
+
+    # subclassed models restore their weights when they are built
+    model(np.zeros((1, 1, 3), dtype=np.float32))
+    model.reset_states()
+
+    return model
+
+def load_feed_forward(weightsDir, truncation):
+
+    model = FeedForward((3, truncation))
+    model.load_weights(os.path.join(weightsDir, 'feed_forward_final_weights_{}_time_steps'.format(truncation)))
+    model(np.zeros((1, 3, truncation), dtype=np.float32))
+
+    return model
+
+def get_feed_forward_instances(dataset, truncation):
+
+    # (1, 3, truncation) inputs of every validation path at least truncation
+    # timesteps long, the layout the feed forward loader trains on
+    instances = []
+    for instance, label in dataset.data:
+        if instance.shape[1] >= truncation:
+            instances.append((np.ascontiguousarray(instance[:, :truncation, :].transpose(0, 2, 1), dtype=np.float32), label))
+
+    return instances
+
+def summarize(errors, agreements, referenceCorrect, quantizedCorrect, referenceTime, quantizedTime, modelFile):
+
+    errors = np.array(errors)
+
+    return {'model file': modelFile,
+            'model bytes': os.path.getsize(modelFile),
+            'predictions': int(errors.shape[0]),
+            'max confidence error': float(np.max(errors)),
+            'mean confidence error': float(np.mean(errors)),
+            '99th percentile confidence error': float(np.percentile(errors, 99)),
+            'argmax agreement': float(np.mean(agreements)),
+            'float32 accuracy': float(np.mean(referenceCorrect)),
+            'quantized accuracy': float(np.mean(quantizedCorrect)),
+            'float32 ms per prediction': 1000.0 * referenceTime / errors.shape[0],
+            'quantized ms per prediction': 1000.0 * quantizedTime / errors.shape[0]}
+
+def lstm_parity(model, quantizedModel, dataset):
+
+    # both stateful models are fed every validation path one timestep at a
+    # time like the planner does, and compared after every timestep
+    errors, agreements, referenceCorrect, quantizedCorrect = [], [], [], []
+    referenceTime, quantizedTime = 0.0, 0.0
+
+    for instance, label in dataset.data:
+
+        instance = instance.astype(np.float32)
+        target = np.argmax(label)
+        model.reset_states()
+        quantizedModel.reset_states()
+
+        for t in range(instance.shape[1]):
+
+            x = instance[:, t:t+1, :]
+
+            start = time.perf_counter()
+            reference = model(x).numpy()[0]
+            referenceTime += time.perf_counter() - start
+
+            start = time.perf_counter()
+            prediction = quantizedModel(x)[0]
+            quantizedTime += time.perf_counter() - start
+
+            errors.append(np.max(np.abs(reference - prediction)))
+            agreements.append(np.argmax(reference) == np.argmax(prediction))
+            referenceCorrect.append(np.argmax(reference) == target)
+            quantizedCorrect.append(np.argmax(prediction) == target)
+
+    model.reset_states()
+
+    return summarize(errors, agreements, referenceCorrect, quantizedCorrect, referenceTime, quantizedTime, quantizedModel.modelFile)
+
+def feed_forward_parity(model, quantizedModel, instances):
+
+    errors, agreements, referenceCorrect, quantizedCorrect = [], [], [], []
+    referenceTime, quantizedTime = 0.0, 0.0
+
+    for x, label in instances:
+
+        target = np.argmax(label)
+
+        start = time.perf_counter()
+        reference = model(x).numpy()[0]
+        referenceTime += time.perf_counter() - start
+
+        start = time.perf_counter()
+        prediction = quantizedModel(x)[0]
+        quantizedTime += time.perf_counter() - start
+
+        errors.append(np.max(np.abs(reference - prediction)))
+        agreements.append(np.argmax(reference) == np.argmax(prediction))
+        referenceCorrect.append(np.argmax(reference) == target)
+        quantizedCorrect.append(np.argmax(prediction) == target)
+
+    return summarize(errors, agreements, referenceCorrect, quantizedCorrect, referenceTime, quantizedTime, quantizedModel.modelFile)
+
+def quantize(modelSelection, weightsDir, dataset, precisions=PRECISIONS, truncation=1):
+
+    # converts the model to every precision next to its weights and returns
+    # the parity report of each
+    report = {}
+
+    if modelSelection.lower() == 'lstm':
+        model = load_lstm(weightsDir)
+        convertedModel = build_lstm_step_model(model)
+        baseName = 'lstm_final_weights'
+    elif modelSelection.lower() == 'feedforward':
+        model = load_feed_forward(weightsDir, truncation)
+        convertedModel = build_feed_forward_model(model, truncation)
+        baseName = 'feed_forward_final_weights_{}_time_steps'.format(truncation)
+        instances = get_feed_forward_instances(dataset, truncation)
+        if len(instances) == 0:
+            print('no validation paths with at least {} timesteps'.format(truncation))
+            exit(2)
+    else:
+        print('quantization is only supported for the lstm and feed forward models')
+        exit(2)
+
+    for precision in precisions:
+
+        modelFile = os.path.join(weightsDir, '{}_{}.tflite'.format(baseName, precision))
+        with open(modelFile, 'wb') as f:
+            f.write(convert(convertedModel, precision))
+        print('saved', modelFile, flush=True)
+
+        if modelSelection.lower() == 'lstm':
+            report[precision] = lstm_parity(model, TFLiteLSTM(modelFile), dataset)
+        else:
+            report[precision] = feed_forward_parity(model, TFLiteFeedForward(modelFile), instances)
+
+        print(precision, json.dumps(report[precision], indent=4), flush=True)
+
+    reportFile = os.path.join(weightsDir, '{}_parity_report.json'.format(baseName))
+    with open(reportFile, 'w') as jsonFile:
+        json.dump(report, jsonFile, indent=4)
+    print('saved', reportFile)
+
+    return report
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Quantize a trained classifier with TensorFlow Lite and report its parity with the float32 model on the validation set.')
+    parser.add_argument('--model', type=str, help='LSTM or FeedForward.', default='LSTM')
+    parser.add_argument('--directory', type=str, default='../data/')
+    parser.add_argument('--batches', type=int, help='How many validation batches to compare on.', default=1)
+    parser.add_argument('--algo', type=str, help='Which path planning algorithm dataset to validate over.', default="RRT")
+    parser.add_argument('--scene', type=str, help='Which scene to validate over.', default="tower_defense")
+    parser.add_argument('--adv', type=str, help='If quantizing the adversary, specify "planner"(adversary) or "predictor".', default=None)
+    parser.add_argument('--truncation', type=int, help='Timesteps seen by the feed forward model.', default=1)
+    parser.add_argument('--precisions', type=str, nargs='+', help='Any of float32, float16 and int8.', default=list(PRECISIONS))
+
+    args = parser.parse_args()
+
+    modelSelection = args.model
+    dataDirectory = args.directory
+    algorithm = args.algo.lower()
+    sceneName = args.scene
+    adv = args.adv
+
+    if dataDirectory == 'tower':
+        dataDirectory = 'D:\\path_planning_data'
+
+    validationDataDir = os.path.join(dataDirectory, '{}_dataset/{}_batches_validate'.format(sceneName, algorithm))
+    dataset = ValidateDataLoader(args.batches, validationDataDir).load()
+
+    if adv is None:
+        weightsDir = os.path.join(dataDirectory, '{}_dataset/optimal_rrt_{}_weights'.format(sceneName, modelSelection.lower()))
+    else:
+        weightsDir = os.path.join(dataDirectory, '{}_dataset/optimal_rrt_{}_weights_{}'.format(sceneName, modelSelection.lower(), adv))
+
+    quantize(modelSelection, weightsDir, dataset, args.precisions, args.truncation)
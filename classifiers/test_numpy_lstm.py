@@ -0,0 +1,139 @@
+import os
+import random
+import tempfile
+import numpy as np
+from numpy_lstm import NumpyLSTM
+
+def get_random_model(units=16, numFeatures=3, numClasses=5):
+
+    # same layer stack as classifiers.lstm.LSTM at a smaller size
+    kernel = np.random.normal(scale=0.5, size=(numFeatures, 4 * units))
+    recurrentKernel = np.random.normal(scale=0.5, size=(units, 4 * units))
+    bias = np.random.normal(scale=0.1, size=(4 * units,))
+    denseLayers = [(np.random.normal(scale=0.5, size=(units, 12)), np.random.normal(scale=0.1, size=(12,)), 'relu'),
+                   (np.random.normal(scale=0.5, size=(12, 8)), np.random.normal(scale=0.1, size=(8,)), 'relu'),
+                   (np.random.normal(scale=0.5, size=(8, numClasses)), np.random.normal(scale=0.1, size=(numClasses,)), 'softmax')]
+
+    return NumpyLSTM(kernel, recurrentKernel, bias, denseLayers)
+
+def reference_forward(model, sequence, h=None, c=None):
+
+    # float64 lstm equations one timestep at a time
+    units = model.units
+    if h is None:
+        h = np.zeros(units)
+        c = np.zeros(units)
+
+    sigmoid = lambda x: 1.0 / (1.0 + np.exp(-x))
+    predictions = []
+
+    for x in sequence:
+
+        z = (x @ model.kernel.astype(float)) + (h @ model.recurrentKernel.astype(float)) + model.bias
+        i, f, g, o = sigmoid(z[:units]), sigmoid(z[units:2 * units]), np.tanh(z[2 * units:3 * units]), sigmoid(z[3 * units:])
+        c = (f * c) + (i * g)
+        h = o * np.tanh(c)
+
+        y = h
+        for W, b, activation in model.denseLayers:
+            y = (y @ W.astype(float)) + b
+            if activation == 'relu':
+                y = np.maximum(y, 0.0)
+            elif activation == 'softmax':
+                y = np.exp(y - y.max()) / np.sum(np.exp(y - y.max()))
+
+        predictions.append(y)
+
+    return np.array(predictions), h, c
+
+def test_matches_reference(numTestCases=20):
+
+    model = get_random_model()
+
+    for i in range(numTestCases):
+
+        sequence = np.random.uniform(-1.0, 1.0, size=(random.randint(1, 20), 3))
+        expected, h, c = reference_forward(model, sequence)
+
+        # stateful single timestep calls
+        model.reset_states()
+        for t in range(sequence.shape[0]):
+            prediction = model(sequence[np.newaxis, t:t+1, :])
+            assert np.allclose(prediction[0], expected[t], atol=1e-5), 'Timestep prediction differs from reference'
+
+        assert np.allclose(model.get_states()[0][0], h, atol=1e-5), 'Hidden state differs from reference'
+        assert np.allclose(model.get_states()[1][0], c, atol=1e-5), 'Cell state differs from reference'
+
+        # whole sequence in one call predicts the last timestep
+        model.reset_states()
+        assert np.allclose(model(sequence[np.newaxis])[0], expected[-1], atol=1e-5), 'Sequence prediction differs from reference'
+
+def test_states_continue_sequence():
+
+    model = get_random_model()
+    sequence = np.random.uniform(-1.0, 1.0, size=(1, 12, 3))
+
+    model.reset_states()
+    expected = model(sequence)
+
+    # split the sequence and restore the snapshot in between
+    model.reset_states()
+    model(sequence[:, :5])
+    states = model.get_states()
+    model(np.random.uniform(-1.0, 1.0, size=(1, 4, 3)))
+    model.initialize_states(states)
+
+    assert np.allclose(model(sequence[:, 5:]), expected, atol=1e-6), 'Restored states do not continue the sequence'
+
+def test_batched_scores(numSequences=10):
+
+    model = get_random_model()
+
+    sequences = [np.random.uniform(-1.0, 1.0, size=(random.randint(1, 15), 3)) for i in range(numSequences)]
+    prefixes = [np.random.uniform(-1.0, 1.0, size=(random.randint(1, 5), 3)) for i in range(numSequences)]
+
+    # every other sequence starts from zero states
+    states = []
+    for i, prefix in enumerate(prefixes):
+        model.reset_states()
+        model(prefix[np.newaxis])
+        states.append(model.get_states() if i % 2 == 0 else None)
+
+    predictions, finalStates = model.score(sequences, states)
+
+    for i in range(numSequences):
+
+        if states[i] is None:
+            expected, h, c = reference_forward(model, sequences[i])
+        else:
+            expected, h, c = reference_forward(model, np.concatenate([prefixes[i], sequences[i]]))
+            expected = expected[prefixes[i].shape[0]:]
+
+        assert predictions[i].shape == expected.shape, 'Padding leaked into the predictions'
+        assert np.allclose(predictions[i], expected, atol=1e-5), 'Batched prediction differs from reference'
+        assert np.allclose(finalStates[i][0][0], h, atol=1e-5), 'Padding changed the final hidden state'
+        assert np.allclose(finalStates[i][1][0], c, atol=1e-5), 'Padding changed the final cell state'
+
+def test_save_and_load():
+
+    model = get_random_model()
+    sequence = np.random.uniform(-1.0, 1.0, size=(1, 7, 3))
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        fileName = os.path.join(directory, 'lstm_final_weights.npz')
+        model.save(fileName)
+        loaded = NumpyLSTM.load(fileName)
+
+    model.reset_states()
+    assert np.array_equal(loaded(sequence), model(sequence)), 'Loaded model differs'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+    test_matches_reference()
+    test_states_continue_sequence()
+    test_batched_scores()
+    test_save_and_load()
+    print('passed all tests!')
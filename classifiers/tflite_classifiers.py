@@ -0,0 +1,136 @@
+import numpy as np
+
+# Reduced precision inference of the trained classifiers with TensorFlow Lite
+# models written by quantize_classifiers.py. The small tflite_runtime
+# package is enough to run them, full TensorFlow is only imported when it is
+# not installed.
+#
+# The lstm is converted as a single timestep model with explicit states,
+# stateful Keras layers do not convert. Its one input is x, y, theta, h and c
+# side by side and its one output the class confidences, h and c side by
+# side. TFLiteLSTM keeps the states between calls so it can stand in for the
+# stateful Keras model and the NumpyLSTM engine in the planner.
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+
+class TFLiteClassifier:
+
+    def __init__(self, modelFile):
+
+        self.modelFile = modelFile
+        self.interpreter = Interpreter(model_path=modelFile)
+        self.interpreter.allocate_tensors()
+
+        inputDetails = self.interpreter.get_input_details()[0]
+        self.inputIndex = inputDetails['index']
+        self.inputShape = tuple(inputDetails['shape'])
+        self.outputIndex = self.interpreter.get_output_details()[0]['index']
+
+        self._input = np.zeros(self.inputShape, dtype=np.float32)
+
+    def _invoke(self):
+
+        self.interpreter.set_tensor(self.inputIndex, self._input)
+        self.interpreter.invoke()
+
+        return self.interpreter.get_tensor(self.outputIndex)
+
+class TFLiteFeedForward(TFLiteClassifier):
+
+    def __call__(self, x, training=False):
+
+        # x is (batch, 3, timesteps), the model is converted for a batch of one
+        x = np.asarray(x, dtype=np.float32)
+        predictions = []
+
+        for instance in x:
+            self._input[0] = instance
+            predictions.append(self._invoke()[0].copy())
+
+        return np.array(predictions)
+
+class TFLiteLSTM(TFLiteClassifier):
+
+    def __init__(self, modelFile, numFeatures=3):
+
+        super(TFLiteLSTM, self).__init__(modelFile)
+
+        self.numFeatures = numFeatures
+        self.units = (self.inputShape[1] - numFeatures) // 2
+
+        # [h, c], None starts from zero
+        self.states = None
+
+    def _step(self, x, h, c):
+
+        units = self.units
+        self._input[0, :self.numFeatures] = x
+        self._input[0, self.numFeatures:self.numFeatures + units] = h
+        self._input[0, self.numFeatures + units:] = c
+
+        output = self._invoke()
+
+        return output[0, :-2 * units].copy(), output[:, -2 * units:-units].copy(), output[:, -units:].copy()
+
+    def _run(self, sequence, states):
+
+        # (timesteps, features) sequence from states, returns the prediction
+        # of every timestep and the final [h, c]
+        if states is None:
+            h = np.zeros((1, self.units), dtype=np.float32)
+            c = np.zeros((1, self.units), dtype=np.float32)
+        else:
+            h, c = states
+
+        predictions = []
+        for x in sequence:
+            prediction, h, c = self._step(x, h, c)
+            predictions.append(prediction)
+
+        return np.array(predictions), [h, c]
+
+    def __call__(self, x, training=False):
+
+        # stateful call like the Keras model, x is (1, timesteps, features)
+        # and the prediction of the last timestep is returned
+        predictions, self.states = self._run(np.asarray(x, dtype=np.float32)[0], self.states)
+
+        return predictions[-1:]
+
+    def get_states(self):
+
+        if self.states is None:
+            return None
+
+        return [state.copy() for state in self.states]
+
+    def initialize_states(self, states=None):
+
+        self.states = None if states is None else [np.array(state, dtype=np.float32) for state in states]
+
+    def reset_states(self):
+
+        self.states = None
+
+    def get_edge_scorer(self):
+
+        # scores batches itself, see score
+        return self
+
+    def score(self, sequences, states):
+
+        # same as classifiers.lstm.LSTMEdgeScorer.score, one sequence at a
+        # time since the model is converted for a batch of one
+        predictions = []
+        finalStates = []
+
+        for sequence, sequenceStates in zip(sequences, states):
+            sequencePredictions, sequenceStates = self._run(sequence, sequenceStates)
+            predictions.append(sequencePredictions)
+            finalStates.append(sequenceStates)
+
+        return predictions, finalStates
@@ -22,7 +22,7 @@ from data.loaders.lstm_train_loader import LstmTrainDataLoader
 from data.loaders.cnn_train_loader import CNNTrainDataLoader
 from training_history.plot_training_history import plot_training_history
 
-def build_model(modelSelection, inputShape):
+def build_model(modelSelection, inputShape, fullSequence=False, debug=False):
 
     print('input shape:')
 
@@ -32,15 +32,16 @@ def build_model(modelSelection, inputShape):
 
     elif modelSelection.lower() == 'lstm':
 
-        model = LSTM()
+        # weights of the sequence model load into the stateful model
+        model = LSTM(stateful=not fullSequence, returnSequences=fullSequence)
 
     elif modelSelection.lower() == 'cnn':
 
-        model = CNN()
+        model = CNN(debug=debug)
         
     return model
 
-def get_trainer(modelSelection, model, weightsDir):
+def get_trainer(modelSelection, model, weightsDir, fullSequence=False):
 
     if modelSelection.lower() == 'feedforward':
 
@@ -48,7 +49,7 @@ def get_trainer(modelSelection, model, weightsDir):
 
     elif modelSelection.lower() == 'lstm':
 
-        trainer = LSTMTrainer(model, weightsDir)
+        trainer = LSTMTrainer(model, weightsDir, fullSequence)
 
     elif modelSelection.lower() == 'cnn':
         
@@ -56,7 +57,7 @@ def get_trainer(modelSelection, model, weightsDir):
 
     return trainer
 
-def get_data_loader(modelSelection, numBatches, dataDirectory, split, truncation, stepSize):
+def get_data_loader(modelSelection, numBatches, dataDirectory, split, truncation, stepSize, fullSequence=False):
 
     if modelSelection.lower() == 'feedforward':
 
@@ -64,7 +65,7 @@ def get_data_loader(modelSelection, numBatches, dataDirectory, split, truncation
 
     elif modelSelection.lower() == 'lstm':
 
-        dataLoader = LstmTrainDataLoader(split, numBatches, dataDirectory = dataDirectory)
+        dataLoader = LstmTrainDataLoader(split, numBatches, dataDirectory = dataDirectory, zeroPadding = fullSequence)
 
     elif modelSelection.lower() == 'cnn':
 
@@ -118,19 +119,45 @@ def summary(history, modelSelection, numBatches, startBatch, algo):
     with open(historyFileName, 'w') as jsonFile:
         json.dump(trainingHistory, jsonFile)
 
-def train_model(modelSelection, epochs, batchSize, split, numBatches, resume=False, startBatch=0, dataDirectory='./data/rrt-batches-train/', algo='rrt', sceneName='tower_defense', truncation=1, stepSize=100, predictorPlanner = 'planner'):
+def train_streaming_model(modelSelection, epochs, batchSize, resume, dataLoader, startBatch, weightsDir, fullSequence=False, debug=False):
+
+    # paths are streamed from disk in length buckets instead of padded arrays
+    if modelSelection.lower() not in ('lstm', 'cnn'):
+        print('streaming is only supported for the lstm and cnn')
+        exit(2)
+
+    if modelSelection.lower() == 'lstm':
+        trainDataset, valDataset = dataLoader.load_datasets(startBatch, batchSize, dropRemainder=not fullSequence)
+    else:
+        trainDataset, valDataset = dataLoader.load_datasets(startBatch, batchSize)
+
+    model = build_model(modelSelection, None, fullSequence, debug)
+    trainer = get_trainer(modelSelection, model, weightsDir, fullSequence)
+    print('successfully built datasets and model')
+
+    history = trainer.train_datasets(trainDataset, valDataset, epochs, resume)
+    print('successfully trained model')
+
+    return history
+
+def train_model(modelSelection, epochs, batchSize, split, numBatches, resume=False, startBatch=0, dataDirectory='./data/rrt-batches-train/', algo='rrt', sceneName='tower_defense', truncation=1, stepSize=100, predictorPlanner = 'planner', stream=False, fullSequence=False, debug=False):
 
     # load training and validation data
     trainingDataDir = os.path.join(dataDirectory, '{}_dataset/{}_batches_train_{}'.format(sceneName, algo, predictorPlanner)) 
-    dataLoader = get_data_loader(modelSelection, numBatches, trainingDataDir, split, truncation, stepSize)
+    dataLoader = get_data_loader(modelSelection, numBatches, trainingDataDir, split, truncation, stepSize, fullSequence)
+
+    if stream:
+        weightsDir = os.path.join(dataDirectory, '{}_dataset/{}_{}_weights_{}'.format(sceneName, algo, modelSelection.lower(), predictorPlanner))
+        return train_streaming_model(modelSelection, epochs, batchSize, resume, dataLoader, startBatch, weightsDir, fullSequence, debug)
+
     (x_train, y_train), (x_val, y_val) = dataLoader.load(startBatch) 
     print('number of paths in training set:', len(x_train))
 
     # build classifier
     inputShape = x_train[0].shape[1]
-    model = build_model(modelSelection, inputShape)
+    model = build_model(modelSelection, inputShape, fullSequence, debug)
     weightsDir = os.path.join(dataDirectory, '{}_dataset/{}_{}_weights_{}'.format(sceneName, algo, modelSelection.lower(), predictorPlanner))
-    trainer = get_trainer(modelSelection, model, weightsDir)
+    trainer = get_trainer(modelSelection, model, weightsDir, fullSequence)
     print('successfully loaded data and built model')
 
     # fit model to training data
@@ -159,6 +186,9 @@ if __name__ == '__main__':
     parser.add_argument('--truncation', type=int, help='how much of the path to make visible to classifier', default=1)
     parser.add_argument('--step_size', type=int, help='Sample path every ? timesteps', default=100)
     parser.add_argument('--predictor', action='store_true', help='Is this LSTM is for planning or predicting', default=False)
+    parser.add_argument('--full_sequence', action='store_true', help='Train the lstm on whole masked sequences instead of one timestep per step', default=False)
+    parser.add_argument('--debug', action='store_true', help='Print shapes on every cnn call', default=False)
+    parser.add_argument('--stream', action='store_true', help='Stream length bucketed batches from disk, lstm and cnn only', default=False)
 
     args = parser.parse_args()
     modelSelection=args.model
@@ -173,6 +203,9 @@ if __name__ == '__main__':
     truncation = args.truncation
     stepSize = args.step_size
     predictor = args.predictor
+    stream = args.stream
+    fullSequence = args.full_sequence
+    debug = args.debug
     predictorPlanner = 'planner'
     if predictor:
         predictorPlanner = 'predictor'
@@ -186,4 +219,4 @@ if __name__ == '__main__':
     algorithm = args.algo.lower()
 
     # train
-    train_model(modelSelection, epochs, batchSize, split, numBatches, resume, startBatch, dataDirectory, algorithm, sceneName, truncation, stepSize, predictorPlanner)
+    train_model(modelSelection, epochs, batchSize, split, numBatches, resume, startBatch, dataDirectory, algorithm, sceneName, truncation, stepSize, predictorPlanner, stream, fullSequence, debug)
@@ -0,0 +1,23 @@
+import os
+import sys
+import argparse
+
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+from data.loaders.batch_files import PYRAMID_STRIDES
+from data.loaders.path_store import build_path_store
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Build a memory-mapped path store from json or npz training batches.')
+
+    parser.add_argument('--directory', type=str, help='Directory of batch files.', default='./optimal_rrt_batches_train')
+    parser.add_argument('--store', type=str, help='Directory to write the path store to.', default='./optimal_rrt_path_store')
+    parser.add_argument('--strides', type=int, nargs='+', help='Downsampling strides stored with the full rate paths.', default=list(PYRAMID_STRIDES))
+
+    args = parser.parse_args()
+
+    store = build_path_store(args.directory, args.store, args.strides)
+    print('stored {} paths from {} batches'.format(len(store), store.numBatches))
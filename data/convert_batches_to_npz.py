@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+import argparse
+
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+from data.loaders.batch_files import PYRAMID_STRIDES, save_batch_npz
+
+def convert_batch(jsonFileName, removeJson=False, strides=PYRAMID_STRIDES):
+
+    with open(jsonFileName, 'r') as f:
+        samplesInBatch = json.load(f)
+
+    npzFileName = os.path.splitext(jsonFileName)[0] + '.npz'
+    save_batch_npz(samplesInBatch, npzFileName, strides)
+
+    jsonSize = os.path.getsize(jsonFileName)
+    npzSize = os.path.getsize(npzFileName)
+    print('{} -> {} ({:.1f}x smaller)'.format(jsonFileName, npzFileName, jsonSize / npzSize), flush=True)
+
+    if removeJson:
+        os.remove(jsonFileName)
+
+    return npzFileName
+
+def convert_directory(dataDirectory, removeJson=False, strides=PYRAMID_STRIDES):
+
+    for fileName in sorted(os.listdir(dataDirectory)):
+
+        if fileName.endswith('.json'):
+            convert_batch(os.path.join(dataDirectory, fileName), removeJson, strides)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Convert json training batches to npz shards.')
+
+    parser.add_argument('--directory', type=str, help='Directory of batch json files.', default='./optimal_rrt_batches_train')
+    parser.add_argument('--remove_json', action='store_true', help='Delete every json batch after converting it.', default=False)
+    parser.add_argument('--strides', type=int, nargs='+', help='Downsampling strides stored with the full rate paths.', default=list(PYRAMID_STRIDES))
+
+    args = parser.parse_args()
+
+    convert_directory(args.directory, args.remove_json, args.strides)
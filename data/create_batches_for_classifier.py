@@ -7,6 +7,8 @@ import numpy as np
 import random
 import cProfile
 import re
+import time
+import multiprocessing
 
 currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
@@ -16,70 +18,227 @@ import dubins_path_planner.planning_algorithms.RRT
 from dubins_path_planner.run_RRT import run_RRT
 from dubins_path_planner.run_optimal_RRT import run_optimal_RRT
 from dubins_path_planner.run_adversarial_optimal_RRT import run_adversarial_optimal_RRT
+from data.loaders.batch_files import PYRAMID_STRIDES, save_batch_npz
+
+def get_batch_file_name(batchNum, algo, fileFormat='json'):
+
+    return './{}_batches_new/batch_{}.{}'.format(algo.lower(), batchNum, fileFormat)
+
+def get_sample_log_file_name(batchNum, algo):
+
+    return './{}_batches_new/batch_{}.log'.format(algo.lower(), batchNum)
 
 def save_json_format(samplesInBatch, batchNum, sceneName, algo):
 
-    with open('./{}_batches_new/batch_{}.json'.format(algo.lower(), batchNum), 'w') as outFile:
+    # write then rename, a crash never leaves a partial batch file behind
+    batchFileName = get_batch_file_name(batchNum, algo)
+    with open(batchFileName + '.tmp', 'w') as outFile:
         json.dump(samplesInBatch, outFile)
+    os.replace(batchFileName + '.tmp', batchFileName)
 
-def save_batch(samplesInBatch, batchNum, sceneName, algo):
-    print('saving batch {}'.format(batchNum), flush=True)
-    print('saving json')
-    save_json_format(samplesInBatch, batchNum, sceneName, algo)
+def save_npz_format(samplesInBatch, batchNum, sceneName, algo, strides=PYRAMID_STRIDES):
+
+    # full rate paths plus a downsampled copy at every stride
+    batchFileName = get_batch_file_name(batchNum, algo, 'npz')
+    save_batch_npz(samplesInBatch, batchFileName + '.tmp', strides)
+    os.replace(batchFileName + '.tmp', batchFileName)
 
-parser = argparse.ArgumentParser(description='Create batches of training data from RRT dubins planner.')
+def save_batch(samplesInBatch, batchNum, sceneName, algo, fileFormat='json', strides=PYRAMID_STRIDES):
+    print('saving batch {}'.format(batchNum), flush=True)
+    if fileFormat == 'npz':
+        print('saving npz')
+        save_npz_format(samplesInBatch, batchNum, sceneName, algo, strides)
+    else:
+        print('saving json')
+        save_json_format(samplesInBatch, batchNum, sceneName, algo)
 
-parser.add_argument('--batches', type=int, help='Number of batches to create.', default=1)
-parser.add_argument('--batchsize', type=int, help='Number of paths generated per batch.', default=10)
-parser.add_argument('--scene', type=str, help='Name of scene.', default='simple_room')
-parser.add_argument('--format', type=str, help='Format of save file..', default='json')
-parser.add_argument('--start_index', type=int, help='Index to begin saving batches at', default=0)
-parser.add_argument('--algo', type=str, help='RRT or optimal', default = 'RRT')
-parser.add_argument('--target', type=int, help='RRT or optimal', default = None)
-parser.add_argument('--seed', action='store_true', default = False)
+def append_sample_log(batchNum, sampleNum, seed, sample, algo):
 
-args = parser.parse_args()
+    # one json line per finished sample, flushed to disk before moving on
+    entry = {'sample number': sampleNum, 'seed': seed, 'sample': sample}
+    with open(get_sample_log_file_name(batchNum, algo), 'a') as logFile:
+        logFile.write(json.dumps(entry) + '\n')
+        logFile.flush()
+        os.fsync(logFile.fileno())
 
-for batchNum in range(args.start_index, args.start_index + args.batches):
+def load_sample_log(batchNum, algo):
 
+    # samples finished before a restart, failed samples are None
     samplesInBatch = {}
-    for sampleNum in range(args.batchsize):
-
-        print('sample number: {}'.format(sampleNum), flush=True)
-
-        if args.seed:
-            seed = sampleNum + (batchNum * args.batchsize)
-            print('seed:', seed)
-            np.random.seed(seed)
-            random.seed(seed)
-
-        sample = None 
-        while sample is None:
-
-
-            if args.algo.lower() == 'rrt':
-                print('running RRT')
-                sample = run_RRT(animate=False, sceneName=args.scene)
-            elif args.algo.lower() == 'optimal_rrt':
-                print('running RRT*')
-                try:
-                    sample = run_optimal_RRT(animate=False, sceneName=args.scene, target=args.target)
-                except Exception as e:
-                    print('an exception occurred')
-                    print(e)
-                    sample = None
-            elif args.algo.lower() == 'adversarial_optimal_rrt':
-                print('running AdvRRT*')
-                try:
-                    sample = run_adversarial_optimal_RRT(animate=False, sceneName=args.scene)
-                    exit(1)
-                except Exception as e:
-                    print('an exception occurred')
-                    print(e)
-                    sample = None
-
-        samplesInBatch['{}'.format(sampleNum)] = sample
-
-    save_batch(samplesInBatch, batchNum, args.scene, args.algo)
-
-print('finished')
+
+    logFileName = get_sample_log_file_name(batchNum, algo)
+    if not os.path.exists(logFileName):
+        return samplesInBatch
+
+    with open(logFileName, 'r') as logFile:
+        for line in logFile:
+
+            # last line may be cut off by a crash
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            samplesInBatch[entry['sample number']] = entry['sample']
+
+    return samplesInBatch
+
+def run_sample(algo, sceneName, target, maxIter=None, timeLimit=None):
+
+    # rerun the planner until it finds a path to the target or the sample's
+    # wall-clock budget runs out
+    startTime = time.time()
+
+    sample = None
+    while sample is None:
+
+        remainingTime = None
+        if timeLimit is not None:
+            remainingTime = timeLimit - (time.time() - startTime)
+            if remainingTime <= 0.0:
+                print('sample ran out of time')
+                return None
+
+        if algo.lower() == 'rrt':
+            print('running RRT')
+            sample = run_RRT(animate=False, sceneName=sceneName, maxIter=maxIter, timeLimit=remainingTime)
+        elif algo.lower() == 'optimal_rrt':
+            print('running RRT*')
+            try:
+                sample = run_optimal_RRT(animate=False, sceneName=sceneName, target=target, maxIter=maxIter, timeLimit=remainingTime)
+            except Exception as e:
+                print('an exception occurred')
+                print(e)
+                sample = None
+        elif algo.lower() == 'adversarial_optimal_rrt':
+            print('running AdvRRT*')
+            try:
+                sample = run_adversarial_optimal_RRT(animate=False, sceneName=sceneName, maxIter=maxIter, timeLimit=remainingTime)
+            except Exception as e:
+                print('an exception occurred')
+                print(e)
+                sample = None
+
+    return sample
+
+def generate_sample(workItem):
+
+    # one (batch, sample, seed) work item, runs in a pool worker
+    batchNum, sampleNum, seed, algo, sceneName, target, maxIter, timeLimit = workItem
+
+    print('batch {} sample number: {}'.format(batchNum, sampleNum), flush=True)
+
+    if seed is not None:
+        print('seed:', seed)
+    # forked workers share their parent's random state, unseeded samples
+    # draw fresh entropy so workers do not produce the same paths
+    np.random.seed(seed)
+    random.seed(seed)
+
+    # a failed sample is logged as None instead of killing the worker, a
+    # worker that dies never returns its task and stalls the pool. The
+    # planners call exit() on some errors, SystemExit is caught too
+    try:
+        sample = run_sample(algo, sceneName, target, maxIter, timeLimit)
+    except (Exception, SystemExit) as e:
+        print('batch {} sample {} failed: {!r}'.format(batchNum, sampleNum, e), flush=True)
+        sample = None
+
+    return batchNum, sampleNum, seed, sample
+
+def save_finished_batch(samplesInBatch, batchNum, args):
+
+    # failed samples are left out, keys stay contiguous for the loaders
+    samples = [samplesInBatch[i] for i in range(args.batchsize) if samplesInBatch[i] is not None]
+    if len(samples) < args.batchsize:
+        print('batch {} is missing {} failed samples'.format(batchNum, args.batchsize - len(samples)), flush=True)
+
+    samplesInBatch = {'{}'.format(i): sample for i, sample in enumerate(samples)}
+    save_batch(samplesInBatch, batchNum, args.scene, args.algo, args.format, args.strides)
+
+    # batch file holds everything now
+    os.remove(get_sample_log_file_name(batchNum, args.algo))
+
+def get_work_items(args, samplesByBatch):
+
+    workItems = []
+
+    for batchNum in range(args.start_index, args.start_index + args.batches):
+
+        # batch finished in an earlier run
+        if os.path.exists(get_batch_file_name(batchNum, args.algo, args.format)):
+            print('skipping finished batch {}'.format(batchNum))
+            continue
+
+        samplesInBatch = load_sample_log(batchNum, args.algo)
+        samplesByBatch[batchNum] = samplesInBatch
+
+        for sampleNum in range(args.batchsize):
+
+            # sample finished before a restart
+            if sampleNum in samplesInBatch:
+                continue
+
+            seed = None
+            if args.seed:
+                seed = sampleNum + (batchNum * args.batchsize)
+
+            workItems.append((batchNum, sampleNum, seed, args.algo, args.scene, args.target, args.max_iter, args.time_limit))
+
+    return workItems
+
+def generate_batches(args):
+
+    samplesByBatch = {}
+    workItems = get_work_items(args, samplesByBatch)
+
+    # batches whose samples were all logged before a crash
+    for batchNum in list(samplesByBatch):
+        if len(samplesByBatch[batchNum]) == args.batchsize:
+            save_finished_batch(samplesByBatch.pop(batchNum), batchNum, args)
+
+    # serial generation in this process
+    if args.workers <= 1:
+        results = map(generate_sample, workItems)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(args.workers)
+        results = pool.imap_unordered(generate_sample, workItems)
+
+    # log every sample, save every batch as soon as its last sample is done
+    for batchNum, sampleNum, seed, sample in results:
+
+        append_sample_log(batchNum, sampleNum, seed, sample, args.algo)
+
+        samplesInBatch = samplesByBatch[batchNum]
+        samplesInBatch[sampleNum] = sample
+
+        if len(samplesInBatch) == args.batchsize:
+            save_finished_batch(samplesByBatch.pop(batchNum), batchNum, args)
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Create batches of training data from RRT dubins planner.')
+
+    parser.add_argument('--batches', type=int, help='Number of batches to create.', default=1)
+    parser.add_argument('--batchsize', type=int, help='Number of paths generated per batch.', default=10)
+    parser.add_argument('--scene', type=str, help='Name of scene.', default='simple_room')
+    parser.add_argument('--format', type=str, help='Format of save file, json or npz.', default='json')
+    parser.add_argument('--strides', type=int, nargs='+', help='Downsampling strides stored in npz batches.', default=list(PYRAMID_STRIDES))
+    parser.add_argument('--start_index', type=int, help='Index to begin saving batches at', default=0)
+    parser.add_argument('--algo', type=str, help='RRT or optimal', default = 'RRT')
+    parser.add_argument('--target', type=int, help='RRT or optimal', default = None)
+    parser.add_argument('--seed', action='store_true', default = False)
+    parser.add_argument('--workers', type=int, help='Number of worker processes, 1 runs serially.', default=os.cpu_count())
+    parser.add_argument('--max_iter', type=int, help='Planner iterations per run, planner default if not set.', default=None)
+    parser.add_argument('--time_limit', type=float, help='Wall-clock seconds per sample including retries.', default=None)
+
+    args = parser.parse_args()
+
+    generate_batches(args)
+
+    print('finished')
@@ -4,12 +4,13 @@ import os
 import sys
 import json
 import matplotlib.pyplot as plt
-from mean_path_loader import MeanPathDataLoader 
 
 currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
+from data.loaders.mean_path_loader import MeanPathDataLoader 
+from data.loaders.path_store import is_path_store
 from dubins_path_planner.scene import Scene
 
 def plot_mean_paths(dataset, scene):
@@ -36,7 +37,10 @@ def save_mean_paths(dataDir, algo, meanPaths):
         
 def get_dataset(dataDir, algo, numBatches):
 
+    # batch directory or a path store built from it
     dirToLoad = os.path.join(dataDir, '{}_batches_train'.format(algo))
+    if is_path_store(os.path.join(dataDir, '{}_path_store'.format(algo))):
+        dirToLoad = os.path.join(dataDir, '{}_path_store'.format(algo))
     split = 1.0
     loader = MeanPathDataLoader(numBatches, dirToLoad)
     dataset = loader.load()
@@ -0,0 +1,173 @@
+import os
+import json
+import numpy as np
+
+# Readers and writers for the training batches shared by all loaders.
+#
+# Batches are either the original batch_N.json files, a dict of
+# {'0': {'path': {'x': [...], 'y': [...], 'theta': [...]}, 'target': {'index': ...}}, ...},
+# or batch_N.npz shards holding the same samples as flat arrays:
+#
+#   paths   (total states, 3) float32 x, y and theta of every sample back to back
+#   offsets (samples + 1,) int64, sample i is paths[offsets[i]:offsets[i + 1]]
+#   labels  (samples,) int64 target index
+#   strides (levels,) int64 downsampling strides stored in the shard
+#
+# Shards also hold a pyramid of downsampled copies, paths_stride_N and
+# offsets_stride_N for every stride N > 1 in strides. A reader asking for a
+# stride gets the coarsest stored level it is a multiple of, so the consumers'
+# strides of 10, 50 and 100 never decompress the full rate paths.
+#
+# Shards are preferred when both formats of a batch exist.
+
+BATCH_EXTENSIONS = ('.npz', '.json')
+
+PYRAMID_STRIDES = (1, 10, 50, 100)
+
+def get_level_names(stride):
+
+    if stride == 1:
+        return 'paths', 'offsets'
+
+    return 'paths_stride_{}'.format(stride), 'offsets_stride_{}'.format(stride)
+
+def get_pyramid_stride(strides, stride):
+
+    # coarsest stored stride that the requested stride is a multiple of
+    return max(levelStride for levelStride in strides if stride % levelStride == 0)
+
+def downsample_arrays(paths, offsets, stride):
+
+    # every stride-th state of every path starting at its first state, the
+    # same as path[::stride] applied to each path
+    if stride == 1:
+        return paths, offsets
+
+    downsampledLengths = (np.diff(offsets) + stride - 1) // stride
+    downsampledOffsets = np.zeros(offsets.shape[0], dtype=np.int64)
+    downsampledOffsets[1:] = np.cumsum(downsampledLengths)
+
+    stateIndices = np.arange(downsampledOffsets[-1]) - np.repeat(downsampledOffsets[:-1], downsampledLengths)
+    indices = np.repeat(offsets[:-1], downsampledLengths) + (stride * stateIndices)
+
+    return paths[indices], downsampledOffsets
+
+def samples_to_arrays(samplesInBatch, dtype=np.float32):
+
+    samples = [samplesInBatch[str(i)] for i in range(len(samplesInBatch))]
+
+    pathLengths = [len(sample['path']['x']) for sample in samples]
+    offsets = np.zeros(len(samples) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(pathLengths)
+
+    paths = np.empty((offsets[-1], 3), dtype=dtype)
+    for i, sample in enumerate(samples):
+        paths[offsets[i]:offsets[i + 1], 0] = sample['path']['x']
+        paths[offsets[i]:offsets[i + 1], 1] = sample['path']['y']
+        paths[offsets[i]:offsets[i + 1], 2] = sample['path']['theta']
+
+    labels = np.array([int(sample['target']['index']) for sample in samples], dtype=np.int64)
+
+    return paths, offsets, labels
+
+def save_batch_npz(samplesInBatch, batchFileName, strides=PYRAMID_STRIDES):
+
+    paths, offsets, labels = samples_to_arrays(samplesInBatch)
+
+    # full rate paths are always stored
+    strides = sorted(set(strides) | {1})
+    arrays = {'labels': labels, 'strides': np.array(strides, dtype=np.int64)}
+    for stride in strides:
+        pathsName, offsetsName = get_level_names(stride)
+        arrays[pathsName], arrays[offsetsName] = downsample_arrays(paths, offsets, stride)
+
+    # np.savez appends .npz to names without it
+    with open(batchFileName, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+def load_batch_npz(batchFileName, stride=1):
+
+    # members of an npz are only decompressed when accessed
+    with np.load(batchFileName) as batch:
+
+        strides = [1]
+        if 'strides' in batch.files:
+            strides = batch['strides'].tolist()
+
+        levelStride = get_pyramid_stride(strides, stride)
+        pathsName, offsetsName = get_level_names(levelStride)
+        paths, offsets, labels = batch[pathsName], batch[offsetsName], batch['labels']
+
+    paths, offsets = downsample_arrays(paths, offsets, stride // levelStride)
+
+    return paths, offsets, labels
+
+def load_batch_json(batchFileName, stride=1):
+
+    with open(batchFileName, 'r') as f:
+        rawData = json.load(f)
+
+    # keep json batches at full precision
+    paths, offsets, labels = samples_to_arrays(rawData, dtype=float)
+    paths, offsets = downsample_arrays(paths, offsets, stride)
+
+    return paths, offsets, labels
+
+def load_batch(batchFileName, stride=1):
+
+    # paths, offsets and labels of a json or npz batch, downsampled by stride
+    if batchFileName.endswith('.npz'):
+        return load_batch_npz(batchFileName, stride)
+
+    return load_batch_json(batchFileName, stride)
+
+def get_batch_file_name(dataDirectory, batchName):
+
+    # batchName without extension, eg. batch_3
+    for extension in BATCH_EXTENSIONS:
+
+        batchFileName = os.path.join(dataDirectory, batchName + extension)
+        if os.path.exists(batchFileName):
+            return batchFileName
+
+    raise FileNotFoundError('no batch {} in {}'.format(batchName, dataDirectory))
+
+def list_batch_files(dataDirectory):
+
+    # batch file names in directory order, one per batch
+    batchFileNames = []
+    batchNames = set()
+
+    for fileName in os.listdir(dataDirectory):
+
+        batchName, extension = os.path.splitext(fileName)
+        if extension not in BATCH_EXTENSIONS or batchName in batchNames:
+            continue
+
+        batchNames.add(batchName)
+        batchFileNames.append(os.path.basename(get_batch_file_name(dataDirectory, batchName)))
+
+    return batchFileNames
+
+def read_batch_instances(batchFileName, stride=1):
+
+    # list of (3, timesteps) float arrays of x, y and theta and list of labels,
+    # the layout the loaders build their datasets from
+    paths, offsets, labels = load_batch(batchFileName, stride)
+
+    instances = []
+    for i in range(labels.shape[0]):
+        instances.append(paths[offsets[i]:offsets[i + 1]].T.astype(float))
+
+    return instances, labels.tolist()
+
+def get_path_lengths(batchFileName):
+
+    # number of states in every path and the labels, without touching the paths
+    if batchFileName.endswith('.npz'):
+        with np.load(batchFileName) as batch:
+            offsets, labels = batch['offsets'], batch['labels']
+    else:
+        paths, offsets, labels = load_batch_json(batchFileName)
+
+    return np.diff(offsets).tolist(), labels.tolist()
@@ -3,6 +3,8 @@ import os
 import json
 import math
 from tensorflow.keras.utils import to_categorical
+from data.loaders.batch_files import get_batch_file_name, read_batch_instances
+from data.loaders.streaming_dataset import make_streaming_dataset
 
 class CNNTrainDataLoader():
 
@@ -95,42 +97,20 @@ class CNNTrainDataLoader():
 
         pass
 
-    def _load_batch_json(self, batchFileName):
+    def _load_batch(self, batchFileName):
 
-        rawData = {}
-        with open(os.path.join(self.dataDirectory, batchFileName), 'r') as f:
-            rawData = json.load(f)
+        paths, labels = read_batch_instances(batchFileName, self.stepSize)
 
         instances = []
-        labels = []
-
-        for sampleNumber in range(len(rawData)):
-
-            sample = rawData[str(sampleNumber)]
-        
-            x = sample['path']['x'][::self.stepSize]
-            y = sample['path']['y'][::self.stepSize]
-            theta = sample['path']['theta'][::self.stepSize]
-
-            if len(x) < self.truncatedPathLength:
-                instance = np.zeros((3, self.truncatedPathLength))
-                x = np.array(x)
-                y = np.array(y)
-                theta = np.array(theta)
-                instance[0, :x.shape[0]] = x
-                instance[0, :y.shape[0]] = y
-                instance[0, :theta.shape[0]] = theta
-            else:
-                instance = np.array([\
-                                    x[:self.truncatedPathLength],\
-                                    y[:self.truncatedPathLength],\
-                                    theta[:self.truncatedPathLength]\
-                                    ])
-
-            label = sample['target']['index']
+
+        for path in paths:
+
+            # zero pad or truncate every path to the same length
+            instance = np.zeros((3, self.truncatedPathLength))
+            pathLength = min(path.shape[1], self.truncatedPathLength)
+            instance[:, :pathLength] = path[:, :pathLength]
 
             instances.append(instance)
-            labels.append(label)
 
         x_batch = np.array(instances)
         y_batch = np.array(labels)
@@ -144,10 +124,10 @@ class CNNTrainDataLoader():
         print('loading data...')
         for i in range(startBatch, startBatch+self.numBatchesToLoad):
 
-            batchFileName = 'batch_{}.json'.format(i)
+            batchFileName = get_batch_file_name(self.dataDirectory, 'batch_{}'.format(i))
             print(batchFileName)
 
-            x_batch, y_batch = self._load_batch_json(batchFileName)
+            x_batch, y_batch = self._load_batch(batchFileName)
             self.batches.append((x_batch, y_batch))
 
             self.numBatchesToLoad -= 1
@@ -157,3 +137,17 @@ class CNNTrainDataLoader():
         self._pre_process_data()
 
         return (self.x_train, self.y_train), (self.x_val, self.y_val)
+
+    def load_datasets(self, startBatch=0, batchSize=None):
+
+        # streamed and length bucketed tf.data datasets, paths shorter than
+        # the truncated length are no longer padded up to it
+        if batchSize is None:
+            batchSize = self.batchSize
+
+        batchNumbers = range(startBatch, startBatch + self.numBatchesToLoad)
+
+        self.trainData = make_streaming_dataset(self.dataDirectory, batchNumbers, batchSize, self.stepSize, self.split, training=True, truncatedPathLength=self.truncatedPathLength)
+        self.valData = make_streaming_dataset(self.dataDirectory, batchNumbers, batchSize, self.stepSize, self.split, training=False, truncatedPathLength=self.truncatedPathLength)
+
+        return self.trainData, self.valData
@@ -3,6 +3,7 @@ import json
 import os
 import math
 from tensorflow.keras.utils import to_categorical
+from data.loaders.batch_files import get_batch_file_name, read_batch_instances
 
 class FeedForwardTrainDataLoader:
 
@@ -85,44 +86,20 @@ class FeedForwardTrainDataLoader:
         self.trainData = (self.x_train, self.y_train)
         self.valData = (self.x_val, self.y_val)
 
-    def _load_batch_json(self, batchFileName):
+    def _load_batch(self, batchFileName):
 
-        # load raw json dict
-        rawData = {}
-        with open('{}/{}'.format(self.dataDirectory, batchFileName), 'r') as f:
-            rawData = json.load(f)
+        paths, labels = read_batch_instances(batchFileName, self.stepSize)
 
-        # build a list of instances and labels
-        instances = [] 
-        labels = [] 
+        instances = []
 
-        for sampleNumber in range(len(rawData)):
+        for path in paths:
 
-            sample = rawData[str(sampleNumber)]
-        
-            x = sample['path']['x'][::self.stepSize]
-            y = sample['path']['y'][::self.stepSize]
-            theta = sample['path']['theta'][::self.stepSize]
-
-            if len(x) < self.truncatedPathLength:
-                instance = np.zeros((3, self.truncatedPathLength))
-                x = np.array(x)
-                y = np.array(y)
-                theta = np.array(theta)
-                instance[0, :x.shape[0]] = x
-                instance[0, :y.shape[0]] = y
-                instance[0, :theta.shape[0]] = theta
-            else:
-                instance = np.array([\
-                                    x[:self.truncatedPathLength],\
-                                    y[:self.truncatedPathLength],\
-                                    theta[:self.truncatedPathLength]\
-                                    ])
-
-            label = sample['target']['index']
+            # zero pad or truncate every path to the same length
+            instance = np.zeros((3, self.truncatedPathLength))
+            pathLength = min(path.shape[1], self.truncatedPathLength)
+            instance[:, :pathLength] = path[:, :pathLength]
 
             instances.append(instance)
-            labels.append(label)
 
         x_batch = np.array(instances)
         y_batch = np.array(labels)
@@ -136,10 +113,10 @@ class FeedForwardTrainDataLoader:
         print('Loading data...')
         for i in range(startBatch, startBatch + self.numBatchesToLoad):
 
-            batchFileName = 'batch_{}.json'.format(i)
+            batchFileName = get_batch_file_name(self.dataDirectory, 'batch_{}'.format(i))
             print(batchFileName)
 
-            x_batch, y_batch = self._load_batch_json(batchFileName)
+            x_batch, y_batch = self._load_batch(batchFileName)
             self.batches.append((x_batch, y_batch))
 
             self.numBatchesToLoad -= 1
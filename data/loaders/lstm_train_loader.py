@@ -5,12 +5,17 @@ import tensorflow as tf
 import math
 from tensorflow.keras.utils import to_categorical
 import matplotlib.pyplot as plt
+from data.loaders.batch_files import get_batch_file_name, read_batch_instances
+from data.loaders.path_store import PathStore, is_path_store
+from data.loaders.streaming_dataset import make_streaming_dataset
 
 class LstmTrainDataLoader():
 
-    def __init__(self, split, numBatches, dataDirectory, batchSize = 100, downSampleStride = 50):
+    def __init__(self, split, numBatches, dataDirectory, batchSize = 100, downSampleStride = 50, zeroPadding = False):
 
         self.batchSize = batchSize
+        self.zeroPadding = zeroPadding
+        self.pathLengths = None
         self.downSampleStride = downSampleStride
         self.numBatchesToLoad = int(numBatches)
         self.dataDirectory = dataDirectory
@@ -46,33 +51,19 @@ class LstmTrainDataLoader():
         shuffled_x = np.empty(self.x.shape, dtype=self.x.dtype)
         shuffled_y = np.empty(self.y.shape, dtype=self.y.dtype)
         permutation = np.random.permutation(len(self.x))
-        for old_index, new_index in enumerate(permutation):
-            shuffled_x[new_index] = self.x[old_index]
-            shuffled_y[new_index] = self.y[old_index]
+
+        # instance i moves to permutation[i]
+        shuffled_x[permutation] = self.x
+        shuffled_y[permutation] = self.y
     
         self.x = shuffled_x
         self.y = shuffled_y
 
     def _transform_timeseries(self):
 
-        X = self.x[:, 0, :]
-        Y = self.x[:, 1, :]
-        T = self.x[:, 2, :]
-
         # transform each instance from features, timesteps (n x t)
         # to timesteps, features (t x n)
-        listX = []
-
-        for i in range(X.shape[0]):
-
-            timesteps = []
-
-            for j in range(X.shape[1]):
-
-                timesteps.append([X[i,j], Y[i,j], T[i,j]])
-
-            listX.append(timesteps)
-        self.x = np.array(listX) 
+        self.x = np.ascontiguousarray(np.transpose(self.x, (0, 2, 1)))
     
     def _normalize_instances(self):
 
@@ -100,26 +91,18 @@ class LstmTrainDataLoader():
 
     def _pad_instances(self):
 
-        maxLen = 0
-        for i in range(self.numSamples):
-            if len(self.x[i][0]) > maxLen:
-                maxLen = len(self.x[i][0])
+        pathLengths = np.array([instance.shape[1] for instance in self.x])
+        self.pathLengths = pathLengths
+        maxLen = int(np.max(pathLengths))
         print('longest path:', maxLen)
 
         padded_samples = np.zeros(shape = (self.numSamples, 3, maxLen))
-        
-        # insert each sample into our numpy array of zeros
-        for i in range(self.numSamples):
-
-            broadcast = min(len(self.x[i][0]), maxLen)
-            if broadcast == maxLen:
-                padded_samples[i][0] = self.x[i][0][:maxLen]
-                padded_samples[i][1] = self.x[i][1][:maxLen]
-                padded_samples[i][2] = self.x[i][2][:maxLen]
-            else:
-                padded_samples[i][0][:broadcast] = self.x[i][0]
-                padded_samples[i][1][:broadcast] = self.x[i][1]
-                padded_samples[i][2][:broadcast] = self.x[i][2]
+
+        # scatter all timesteps into the zeros in one assignment, the mask
+        # selects each sample's leading timesteps in the same order the
+        # samples are concatenated
+        isTimestep = np.arange(maxLen) < pathLengths[:, np.newaxis]
+        np.transpose(padded_samples, (0, 2, 1))[isTimestep] = np.concatenate(self.x, axis=1).T
 
         self.x = padded_samples
 
@@ -151,6 +134,12 @@ class LstmTrainDataLoader():
         # center mean at zero
         self._normalize_instances()
 
+        # normalization shifts padded theta away from zero, put it back so
+        # the masking layer skips padding
+        if self.zeroPadding:
+            isPadding = np.arange(self.x.shape[2]) >= self.pathLengths[:, np.newaxis]
+            np.transpose(self.x, (0, 2, 1))[isPadding] = 0.0
+
         # timesteps by features
         self._transform_timeseries()
 
@@ -163,57 +152,33 @@ class LstmTrainDataLoader():
         self.trainData = (self.x_train, self.y_train)
         self.valData = (self.x_val, self.y_val)
         
-    def _load_batch_json(self, batchFileName):
-
-        # load raw json dict
-        rawData = {}
-        with open(os.path.join(self.dataDirectory, batchFileName), 'r') as f:
-            rawData = json.load(f)
-
-        # build a list of instances and labels
-        instances = [] 
-        labels = [] 
+    def _load_batch(self, batchFileName):
 
-        for sampleNumber in range(len(rawData)):
-
-            sample = rawData[str(sampleNumber)]
-            
-            x = sample['path']['x']
-            y = sample['path']['y']
-            theta = sample['path']['theta']
-
-            downSampledX = []
-            downSampledY = []
-            downSampledTheta = []
-
-            # DOWNSAMPLING
-            for i in range(0, len(x), self.downSampleStride):
-                downSampledX.append(x[i])
-                downSampledY.append(y[i])
-                downSampledTheta.append(theta[i])
-
-            instance = np.array([downSampledX, downSampledY, downSampledTheta])
-            label = sample['target']['index']
-
-            instances.append(instance)
-            labels.append(label)
-
-        x_batch = instances
-        y_batch = labels
+        # downsampled (3, timesteps) instances and labels of a json or npz batch
+        x_batch, y_batch = read_batch_instances(batchFileName, self.downSampleStride)
 
         return (x_batch, y_batch)
 
     def load(self, startBatch=0):
 
         self.batches = []
+
+        # data directory can also be a memory-mapped path store
+        store = None
+        if is_path_store(self.dataDirectory):
+            store = PathStore(self.dataDirectory)
         
         print('Loading data...')
         for i in range(startBatch, startBatch + self.numBatchesToLoad):
 
-            batchFileName = 'batch_{}.json'.format(i)
-            print(batchFileName)
+            if store is not None:
+                print('batch {} from path store'.format(i))
+                x_batch, y_batch = store.read_batch_instances(i, self.downSampleStride)
+            else:
+                batchFileName = get_batch_file_name(self.dataDirectory, 'batch_{}'.format(i))
+                print(batchFileName)
+                x_batch, y_batch = self._load_batch(batchFileName)
 
-            x_batch, y_batch = self._load_batch_json(batchFileName)
             self.batches.append((x_batch, y_batch))
 
             self.numBatchesToLoad -= 1
@@ -223,3 +188,17 @@ class LstmTrainDataLoader():
         self._pre_process_data()
         
         return (self.x_train, self.y_train), (self.x_val, self.y_val)
+
+    def load_datasets(self, startBatch=0, batchSize=None, dropRemainder=True):
+
+        # streamed and length bucketed tf.data datasets instead of padded
+        # arrays, the stateful lstm needs every batch to be full
+        if batchSize is None:
+            batchSize = self.batchSize
+
+        batchNumbers = range(startBatch, startBatch + self.numBatchesToLoad)
+
+        self.trainData = make_streaming_dataset(self.dataDirectory, batchNumbers, batchSize, self.downSampleStride, self.split, training=True, dropRemainder=dropRemainder)
+        self.valData = make_streaming_dataset(self.dataDirectory, batchNumbers, batchSize, self.downSampleStride, self.split, training=False, dropRemainder=dropRemainder)
+
+        return self.trainData, self.valData
@@ -4,6 +4,8 @@ import os
 import tensorflow as tf
 import math
 from tensorflow.keras.utils import to_categorical
+from data.loaders.batch_files import get_batch_file_name, read_batch_instances
+from data.loaders.path_store import PathStore, is_path_store
 
 class meanPathDataset:
 
@@ -122,31 +124,21 @@ class MeanPathDataLoader:
 
         self._calculate_mean_paths()
 
-    def _load_batch_json(self, batchFileName):
+    def _load_batch(self, batchFileName):
 
-        rawData = {}
-        with open(os.path.join(self.dataDirectory, batchFileName), 'r') as f:
-            rawData = json.load(f)
+        x_batch, y_batch = read_batch_instances(batchFileName)
 
-        instances = []
-        labels = []
-
-        for sampleNumber in range(len(rawData)):
-
-            sample = rawData[str(sampleNumber)]
-
-            x = sample['path']['x']
-            y = sample['path']['y']
-            theta = sample['path']['theta']
+        return (x_batch, y_batch)
 
-            instance = np.array([x, y, theta])
-            label = sample['target']['index']
+    def _load_store_batch(self, store, batchNum):
 
-            instances.append(instance)
-            labels.append(label)
+        # take the sampled nodes straight from the memory map, the rest of
+        # each path is never read
+        pathLengths = store.get_path_lengths()
+        indices = store.get_batch_indices(batchNum)
 
-        x_batch = instances
-        y_batch = labels
+        x_batch = [store.get_instance(i, pathLengths[i]//self.sampleNodes, self.sampleNodes) for i in indices]
+        y_batch = store.labels[indices.start:indices.stop].tolist()
 
         return (x_batch, y_batch)
 
@@ -154,13 +146,22 @@ class MeanPathDataLoader:
 
         self.batches = []
 
+        # data directory can also be a memory-mapped path store
+        store = None
+        if is_path_store(self.dataDirectory):
+            store = PathStore(self.dataDirectory)
+
         print('Loading data...')
         for i in range(startBatch, startBatch + self.numBatchesToLoad):
 
-            batchFileName = 'test_room_batch_{}.json'.format(i)
-            print(batchFileName)
+            if store is not None:
+                print('batch {} from path store'.format(i))
+                x_batch, y_batch = self._load_store_batch(store, i)
+            else:
+                batchFileName = get_batch_file_name(self.dataDirectory, 'test_room_batch_{}'.format(i))
+                print(batchFileName)
+                x_batch, y_batch = self._load_batch(batchFileName)
 
-            x_batch, y_batch = self._load_batch_json(batchFileName)
             self.batches.append((x_batch, y_batch))
 
             self.numBatchesToLoad -= 1
@@ -0,0 +1,153 @@
+import os
+import re
+import numpy as np
+from numpy.lib.format import open_memmap
+from data.loaders.batch_files import PYRAMID_STRIDES, list_batch_files, load_batch, get_path_lengths, get_level_names, get_pyramid_stride
+
+# Memory-mapped store of every path in a dataset, built once from a directory
+# of json or npz batches. Paths are only read from disk when they are
+# indexed, so datasets larger than RAM can be sampled, profiled and averaged.
+#
+#   paths.npy          (total states, 3) float32 x, y and theta, memory-mapped
+#   offsets.npy        (samples + 1,) int64, path i is paths[offsets[i]:offsets[i + 1]]
+#   labels.npy         (samples,) int64 target index
+#   batch_offsets.npy  (batches + 1,) int64, first sample of each source batch
+#   batch_numbers.npy  (batches,) int64, number N of each source batch_N file
+#   strides.npy        (levels,) int64 downsampling strides stored in the store
+#
+# Like the npz shards the store keeps paths_stride_N.npy and
+# offsets_stride_N.npy for every stride N > 1, see batch_files.py. Strided
+# reads then touch only the pages of the matching level.
+
+STORE_FILES = ('paths.npy', 'offsets.npy', 'labels.npy', 'batch_offsets.npy', 'batch_numbers.npy')
+
+def is_path_store(directory):
+
+    return all(os.path.exists(os.path.join(directory, fileName)) for fileName in STORE_FILES)
+
+def _get_batch_number(batchFileName):
+
+    # batch_12.npz -> 12
+    return int(re.findall(r'\d+', os.path.splitext(batchFileName)[0])[-1])
+
+def build_path_store(batchDirectory, storeDirectory, strides=PYRAMID_STRIDES):
+
+    strides = sorted(set(strides) | {1})
+    batchFileNames = sorted(list_batch_files(batchDirectory), key=_get_batch_number)
+    batchFileNames = [os.path.join(batchDirectory, batchFileName) for batchFileName in batchFileNames]
+    os.makedirs(storeDirectory, exist_ok=True)
+
+    # first pass sizes the store from path lengths alone
+    pathLengths = []
+    labels = []
+    batchOffsets = [0]
+
+    for batchFileName in batchFileNames:
+
+        lengths, targets = get_path_lengths(batchFileName)
+        pathLengths += lengths
+        labels += targets
+        batchOffsets.append(len(labels))
+
+    pathLengths = np.array(pathLengths, dtype=np.int64)
+
+    for stride in strides:
+
+        pathsName, offsetsName = get_level_names(stride)
+        offsets = np.zeros(pathLengths.shape[0] + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum((pathLengths + stride - 1) // stride)
+
+        # second pass copies one batch at a time into the memory-mapped array
+        paths = open_memmap(os.path.join(storeDirectory, pathsName + '.npy'), mode='w+', dtype=np.float32, shape=(int(offsets[-1]), 3))
+
+        for i, batchFileName in enumerate(batchFileNames):
+
+            print('adding {} to path store at stride {}'.format(batchFileName, stride), flush=True)
+            batchPaths, batchPathOffsets, batchLabels = load_batch(batchFileName, stride)
+            start = offsets[batchOffsets[i]]
+            paths[start:start + batchPaths.shape[0]] = batchPaths
+
+        paths.flush()
+        del paths
+
+        np.save(os.path.join(storeDirectory, offsetsName + '.npy'), offsets)
+
+    np.save(os.path.join(storeDirectory, 'strides.npy'), np.array(strides, dtype=np.int64))
+    np.save(os.path.join(storeDirectory, 'labels.npy'), np.array(labels, dtype=np.int64))
+    np.save(os.path.join(storeDirectory, 'batch_offsets.npy'), np.array(batchOffsets, dtype=np.int64))
+    np.save(os.path.join(storeDirectory, 'batch_numbers.npy'), np.array([_get_batch_number(f) for f in batchFileNames], dtype=np.int64))
+
+    return PathStore(storeDirectory)
+
+class PathStore:
+
+    def __init__(self, storeDirectory):
+
+        self.storeDirectory = storeDirectory
+
+        self.strides = [1]
+        if os.path.exists(os.path.join(storeDirectory, 'strides.npy')):
+            self.strides = np.load(os.path.join(storeDirectory, 'strides.npy')).tolist()
+
+        # paths of every level are memory-mapped, index tables are small
+        # and kept in memory
+        self.levelPaths = {}
+        self.levelOffsets = {}
+        for stride in self.strides:
+            pathsName, offsetsName = get_level_names(stride)
+            self.levelPaths[stride] = np.load(os.path.join(storeDirectory, pathsName + '.npy'), mmap_mode='r')
+            self.levelOffsets[stride] = np.load(os.path.join(storeDirectory, offsetsName + '.npy'))
+
+        self.paths = self.levelPaths[1]
+        self.offsets = self.levelOffsets[1]
+        self.labels = np.load(os.path.join(storeDirectory, 'labels.npy'))
+        self.batchOffsets = np.load(os.path.join(storeDirectory, 'batch_offsets.npy'))
+        self.batchNumbers = np.load(os.path.join(storeDirectory, 'batch_numbers.npy'))
+
+        self.numSamples = self.labels.shape[0]
+        self.numBatches = self.batchNumbers.shape[0]
+
+    def __len__(self):
+
+        return self.numSamples
+
+    def get_path_lengths(self):
+
+        return np.diff(self.offsets)
+
+    def get_path(self, sampleIdx, stride=1, numStates=None):
+
+        # (timesteps, 3) read-only view into the memory map of the coarsest
+        # matching level, only the indexed states are read from disk
+        levelStride = get_pyramid_stride(self.strides, stride)
+        stride = stride // levelStride
+        paths = self.levelPaths[levelStride]
+        offsets = self.levelOffsets[levelStride]
+
+        end = offsets[sampleIdx + 1]
+        if numStates is not None:
+            end = min(end, offsets[sampleIdx] + (numStates * stride))
+
+        return paths[offsets[sampleIdx]:end:stride]
+
+    def get_instance(self, sampleIdx, stride=1, numStates=None):
+
+        # (3, timesteps) float copy, the layout the loaders use
+        return self.get_path(sampleIdx, stride, numStates).T.astype(float)
+
+    def get_batch_indices(self, batchNum):
+
+        # samples of source file batch_{batchNum}
+        position = np.flatnonzero(self.batchNumbers == batchNum)
+        if position.shape[0] == 0:
+            raise KeyError('batch {} is not in path store {}'.format(batchNum, self.storeDirectory))
+
+        return range(self.batchOffsets[position[0]], self.batchOffsets[position[0] + 1])
+
+    def read_batch_instances(self, batchNum, stride=1):
+
+        # same output as batch_files.read_batch_instances for batch_{batchNum}
+        indices = self.get_batch_indices(batchNum)
+        instances = [self.get_instance(i, stride) for i in indices]
+
+        return instances, self.labels[indices.start:indices.stop].tolist()
@@ -0,0 +1,134 @@
+import math
+import numpy as np
+import tensorflow as tf
+from data.loaders.batch_files import get_batch_file_name, load_batch, get_path_lengths
+from data.loaders.path_store import PathStore, is_path_store
+
+# tf.data pipeline streaming training paths from npz or json batches or a
+# path store instead of padding the whole dataset to its longest path.
+#
+# Batch files are read in parallel, one generator per file, and samples are
+# normalized in parallel map calls. Samples are grouped into buckets of
+# similar length so every training batch is only padded to the longest path
+# in its bucket, and batches are prefetched while the model trains. At most
+# a few batch files and the shuffle buffer are held in memory.
+
+NUM_TARGETS = 5
+
+def get_split_index(numSamples, split):
+
+    # the first samples of every batch train, the rest validate
+    return int(numSamples * split)
+
+def open_path_store(dataDirectory):
+
+    # None for a directory of batch files
+    if is_path_store(dataDirectory):
+        return PathStore(dataDirectory)
+
+    return None
+
+def iterate_batch_samples(dataDirectory, batchNum, stride=1, split=1.0, training=True, truncatedPathLength=None, store=None):
+
+    # (timesteps, 3) float32 path and label of every sample in batch_{batchNum}
+    # that falls into the training or validation part of the split. store is
+    # an open PathStore of dataDirectory, opened here if not given
+    if store is None:
+        store = open_path_store(dataDirectory)
+
+    if store is not None:
+        indices = store.get_batch_indices(batchNum)
+        splitIndex = indices.start + get_split_index(len(indices), split)
+        indices = range(indices.start, splitIndex) if training else range(splitIndex, indices.stop)
+
+        for i in indices:
+            path = store.get_path(i, stride, truncatedPathLength)
+            yield np.asarray(path, dtype=np.float32), store.labels[i]
+
+        return
+
+    batchFileName = get_batch_file_name(dataDirectory, 'batch_{}'.format(batchNum))
+    paths, offsets, labels = load_batch(batchFileName, stride)
+
+    splitIndex = get_split_index(labels.shape[0], split)
+    indices = range(splitIndex) if training else range(splitIndex, labels.shape[0])
+
+    for i in indices:
+        end = offsets[i + 1]
+        if truncatedPathLength is not None:
+            end = min(end, offsets[i] + truncatedPathLength)
+
+        yield paths[offsets[i]:end].astype(np.float32), labels[i]
+
+def get_stream_path_lengths(dataDirectory, batchNumbers, stride=1, truncatedPathLength=None, store=None):
+
+    # downsampled lengths of every path, read without touching the paths
+    if store is None:
+        store = open_path_store(dataDirectory)
+
+    if store is not None:
+        storePathLengths = store.get_path_lengths()
+        pathLengths = [storePathLengths[store.get_batch_indices(batchNum)] for batchNum in batchNumbers]
+    else:
+        pathLengths = [get_path_lengths(get_batch_file_name(dataDirectory, 'batch_{}'.format(batchNum)))[0] for batchNum in batchNumbers]
+
+    pathLengths = (np.concatenate(pathLengths).astype(np.int64) + stride - 1) // stride
+    if truncatedPathLength is not None:
+        pathLengths = np.minimum(pathLengths, truncatedPathLength)
+
+    return pathLengths
+
+def get_bucket_boundaries(pathLengths, numBuckets):
+
+    # quantiles of the path lengths, every bucket gets about as many paths
+    quantiles = np.linspace(0.0, 1.0, numBuckets + 1)[1:-1]
+    boundaries = np.unique(np.ceil(np.quantile(pathLengths, quantiles)).astype(np.int64))
+
+    # a bucket holds lengths below its boundary
+    return [int(boundary) + 1 for boundary in boundaries]
+
+def normalize_sample(path, label):
+
+    # same normalization as the training loaders, applied after padding is
+    # removed so padded timesteps stay zero for the masking layer
+    path = tf.concat([path[:, :2] / 10.0, (path[:, 2:] - math.pi) / math.pi], axis=1)
+    label = tf.one_hot(label, NUM_TARGETS)
+
+    return path, label
+
+def make_streaming_dataset(dataDirectory, batchNumbers, batchSize, stride=1, split=1.0, training=True, truncatedPathLength=None, numBuckets=8, shuffleBufferSize=1000, dropRemainder=False):
+
+    batchNumbers = list(batchNumbers)
+
+    # opened once and shared by every generator, loading a store reads the
+    # offsets of every sample and the paths are only memory-mapped reads
+    store = open_path_store(dataDirectory)
+
+    def generate_samples(batchNum):
+        return iterate_batch_samples(dataDirectory, int(batchNum), stride, split, training, truncatedPathLength, store)
+
+    def read_batch(batchNum):
+        return tf.data.Dataset.from_generator(generate_samples, args=(batchNum,),
+                                              output_signature=(tf.TensorSpec(shape=(None, 3), dtype=tf.float32),
+                                                                tf.TensorSpec(shape=(), dtype=tf.int64)))
+
+    # several batch files are decompressed at once, the order they finish in
+    # only matters for training
+    dataset = tf.data.Dataset.from_tensor_slices(np.array(batchNumbers, dtype=np.int64))
+    dataset = dataset.interleave(read_batch, cycle_length=min(len(batchNumbers), 4), num_parallel_calls=tf.data.AUTOTUNE, deterministic=not training)
+
+    if training:
+        dataset = dataset.shuffle(shuffleBufferSize)
+
+    dataset = dataset.map(normalize_sample, num_parallel_calls=tf.data.AUTOTUNE)
+
+    pathLengths = get_stream_path_lengths(dataDirectory, batchNumbers, stride, truncatedPathLength, store)
+    boundaries = get_bucket_boundaries(pathLengths, numBuckets)
+
+    # each batch is zero padded to the longest path in it
+    dataset = dataset.apply(tf.data.experimental.bucket_by_sequence_length(lambda path, label: tf.shape(path)[0],
+                                                                           boundaries,
+                                                                           [batchSize] * (len(boundaries) + 1),
+                                                                           drop_remainder=dropRemainder))
+
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -4,6 +4,7 @@ import os
 import math
 import tensorflow as tf
 from tensorflow.keras.utils import to_categorical
+from data.loaders.batch_files import list_batch_files, read_batch_instances
 
 class ValidationDataSet:
 
@@ -53,9 +54,9 @@ class ValidateDataLoader:
 
         for i in range(len(self.x)):
             
+            # instances are read at the dataset's step size, see load_batch
             timeSeries = self._transform_timeseries(self.x[i])
-            downSampledTimeSeries = timeSeries[:, ::self.dataset.stepSize, :]
-            newX.append(downSampledTimeSeries)
+            newX.append(timeSeries)
 
         self.x = newX
 
@@ -95,44 +96,22 @@ class ValidateDataLoader:
         self._normalize_instances()
         self._downsample()
 
-    def load_batch_json(self, batchFileName):
+    def load_batch(self, batchFileName):
 
-        # load raw json dict
-        rawData = {}
-        with open('{}/{}'.format(self.dataDirectory, batchFileName), 'r') as f:
-            rawData = json.load(f)
-
-        # build a list of instances and labels
-        instances = [] 
-        labels = [] 
-
-        for sampleNumber in range(len(rawData)):
-
-            sample = rawData[str(sampleNumber)]
-            
-            x = sample['path']['x']
-            y = sample['path']['y']
-            theta = sample['path']['theta']
-            instance = np.array([x,y,theta])
-            label = sample['target']['index']
-
-            instances.append(instance)
-            labels.append(label)
-
-        x_batch = instances
-        y_batch = labels
+        # (3, timesteps) instances straight from the matching pyramid level
+        x_batch, y_batch = read_batch_instances(os.path.join(self.dataDirectory, batchFileName), self.dataset.stepSize)
 
         return x_batch, y_batch
 
     def load(self, startBatch=0):
 
         self.batches = []
-        self.batchFileNames = os.listdir(self.dataDirectory)[startBatch: startBatch+self.numBatchesToLoad]
+        self.batchFileNames = list_batch_files(self.dataDirectory)[startBatch: startBatch+self.numBatchesToLoad]
     
         for batchFileName in self.batchFileNames:
 
             print('loading ' + batchFileName)
-            x_batch, y_batch = self.load_batch_json(batchFileName)
+            x_batch, y_batch = self.load_batch(batchFileName)
             self.batches.append((x_batch, y_batch))
     
         self._pre_process_data()
@@ -1,8 +1,16 @@
 import os
+import sys
 import json
 import argparse
 import numpy as np
 import matplotlib.pyplot as plt
+
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+from data.loaders.batch_files import list_batch_files, get_path_lengths
+from data.loaders.path_store import PathStore, is_path_store
  
 def histogram_path_lengths(pathLengths):
      
@@ -30,43 +38,30 @@ def get_mean_and_std(data):
 
     return mean, std
 
-def load_batch_json(batchFileName):
-
-    # load raw json dict
-    rawData = {}
-    with open('./{}'.format(batchFileName), 'r') as f:
-        rawData = json.load(f)
-
-    # build a list of instances and labels
-    labels = [] 
-    pathLengths = []
-
-    print('sample length:', len(rawData))
-    for sampleNumber in range(len(rawData)):
-
-        sample = rawData[str(sampleNumber)]
-        
-        x = sample['path']['x']
-        label = int(sample['target']['index'])
-
-        pathLengths.append(len(x))
-        labels.append(label)
-
-    return pathLengths, labels
-
 def profile_data(datasetDirectory, sceneName, algo):
 
     pathLengths = []
     labels = []
     trainDataDir = '{}/{}_dataset/{}_batches_train/'.format(datasetDirectory, sceneName, algo)
-    batchFileNames = os.listdir(trainDataDir)
+
+    storeDir = '{}/{}_dataset/{}_path_store/'.format(datasetDirectory, sceneName, algo)
+
+    # a path store is profiled from its offset table, no path is read
+    if is_path_store(storeDir):
+        store = PathStore(storeDir)
+        pathLengths = store.get_path_lengths().tolist()
+        labels = store.labels.tolist()
+        batchFileNames = []
+    else:
+        batchFileNames = list_batch_files(trainDataDir)
 
     for batchFileName in batchFileNames:
 
         batchFileName = os.path.join(trainDataDir, batchFileName)
         print(batchFileName)
 
-        lengths, targets = load_batch_json(batchFileName)
+        # npz shards are profiled from their offsets alone
+        lengths, targets = get_path_lengths(batchFileName)
 
         labels += targets 
         pathLengths += lengths
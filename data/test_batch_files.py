@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import numpy as np
+
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+from data.loaders.batch_files import save_batch_npz, load_batch, get_batch_file_name, list_batch_files, read_batch_instances, get_path_lengths
+
+def get_random_batch(numSamples):
+
+    samplesInBatch = {}
+
+    for i in range(numSamples):
+
+        numStates = random.randint(1, 500)
+        path = np.random.uniform(low = -10.0, high = 10.0, size = (3, numStates))
+        samplesInBatch[str(i)] = {'target': {'index': random.randint(0, 4)},
+                                  'path': {'x': path[0].tolist(), 'y': path[1].tolist(), 'theta': path[2].tolist()}}
+
+    return samplesInBatch
+
+def test_npz_matches_json():
+
+    samplesInBatch = get_random_batch(20)
+
+    with tempfile.TemporaryDirectory() as dataDirectory:
+
+        with open(os.path.join(dataDirectory, 'batch_0.json'), 'w') as f:
+            json.dump(samplesInBatch, f)
+        save_batch_npz(samplesInBatch, os.path.join(dataDirectory, 'batch_1.npz'))
+
+        for stride in [1, 50]:
+
+            jsonInstances, jsonLabels = read_batch_instances(os.path.join(dataDirectory, 'batch_0.json'), stride)
+            npzInstances, npzLabels = read_batch_instances(os.path.join(dataDirectory, 'batch_1.npz'), stride)
+
+            assert jsonLabels == npzLabels, 'Labels differ between formats'
+            for i, (jsonInstance, npzInstance) in enumerate(zip(jsonInstances, npzInstances)):
+
+                sample = samplesInBatch[str(i)]['path']
+                expected = np.array([sample['x'][::stride], sample['y'][::stride], sample['theta'][::stride]])
+                assert np.array_equal(jsonInstance, expected), 'Json instance differs from batch'
+                assert np.allclose(npzInstance, expected, atol=1e-5), 'Npz instance differs from batch'
+
+        assert get_path_lengths(os.path.join(dataDirectory, 'batch_1.npz')) == get_path_lengths(os.path.join(dataDirectory, 'batch_0.json')), 'Path lengths differ'
+
+        paths, offsets, labels = load_batch(os.path.join(dataDirectory, 'batch_1.npz'))
+        assert paths.dtype == np.float32 and paths.shape == (offsets[-1], 3), 'Wrong path array'
+
+def test_npz_preferred_over_json():
+
+    samplesInBatch = get_random_batch(2)
+
+    with tempfile.TemporaryDirectory() as dataDirectory:
+
+        with open(os.path.join(dataDirectory, 'batch_0.json'), 'w') as f:
+            json.dump(samplesInBatch, f)
+        assert get_batch_file_name(dataDirectory, 'batch_0').endswith('.json'), 'Json batch not found'
+
+        save_batch_npz(samplesInBatch, os.path.join(dataDirectory, 'batch_0.npz'))
+        assert get_batch_file_name(dataDirectory, 'batch_0').endswith('.npz'), 'Npz batch not preferred'
+        assert list_batch_files(dataDirectory) == ['batch_0.npz'], 'Batch listed more than once'
+
+def test_pyramid_levels():
+
+    samplesInBatch = get_random_batch(10)
+
+    with tempfile.TemporaryDirectory() as dataDirectory:
+
+        jsonFileName = os.path.join(dataDirectory, 'batch_0.json')
+        with open(jsonFileName, 'w') as f:
+            json.dump(samplesInBatch, f)
+        save_batch_npz(samplesInBatch, os.path.join(dataDirectory, 'batch_0.npz'), strides=(10, 50))
+        save_batch_npz(samplesInBatch, os.path.join(dataDirectory, 'batch_1.npz'), strides=(1,))
+
+        with np.load(os.path.join(dataDirectory, 'batch_0.npz')) as batch:
+            assert batch['strides'].tolist() == [1, 10, 50], 'Wrong strides in metadata'
+            assert 'paths_stride_50' in batch.files and 'paths_stride_100' not in batch.files, 'Wrong pyramid levels'
+
+        # stored levels, multiples of stored levels and unstored strides
+        for stride in [1, 7, 10, 20, 50, 100]:
+
+            expectedInstances, expectedLabels = read_batch_instances(jsonFileName, stride)
+            for batchName in ['batch_0.npz', 'batch_1.npz']:
+
+                instances, labels = read_batch_instances(os.path.join(dataDirectory, batchName), stride)
+                assert labels == expectedLabels, 'Labels differ at stride {}'.format(stride)
+                for instance, expected in zip(instances, expectedInstances):
+                    assert np.allclose(instance, expected, atol=1e-5), 'Path differs at stride {}'.format(stride)
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_npz_matches_json()
+    test_npz_preferred_over_json()
+    test_pyramid_levels()
+
+    print('passed all tests!')
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import numpy as np
+
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+from data.loaders.batch_files import save_batch_npz, read_batch_instances
+from data.loaders.path_store import PathStore, build_path_store, is_path_store
+from test_batch_files import get_random_batch
+
+def test_store_matches_batches():
+
+    with tempfile.TemporaryDirectory() as dataDirectory:
+
+        # mixed formats, numbered out of directory order
+        batchDirectory = os.path.join(dataDirectory, 'batches')
+        os.makedirs(batchDirectory)
+        for batchNum in [2, 0, 10, 1]:
+            samplesInBatch = get_random_batch(random.randint(1, 10))
+            if batchNum % 2 == 0:
+                save_batch_npz(samplesInBatch, os.path.join(batchDirectory, 'batch_{}.npz'.format(batchNum)))
+            else:
+                with open(os.path.join(batchDirectory, 'batch_{}.json'.format(batchNum)), 'w') as f:
+                    json.dump(samplesInBatch, f)
+
+        storeDirectory = os.path.join(dataDirectory, 'store')
+        build_path_store(batchDirectory, storeDirectory)
+        assert is_path_store(storeDirectory), 'Path store files missing'
+
+        store = PathStore(storeDirectory)
+        assert isinstance(store.paths, np.memmap), 'Paths are not memory-mapped'
+        assert store.batchNumbers.tolist() == [0, 1, 2, 10], 'Batches out of order'
+
+        for batchNum, extension in [(0, 'npz'), (1, 'json'), (2, 'npz'), (10, 'npz')]:
+
+            batchFileName = os.path.join(batchDirectory, 'batch_{}.{}'.format(batchNum, extension))
+            expectedInstances, expectedLabels = read_batch_instances(batchFileName, 7)
+            instances, labels = store.read_batch_instances(batchNum, 7)
+
+            assert labels == expectedLabels, 'Labels differ from batch'
+            for instance, expected in zip(instances, expectedInstances):
+                assert np.allclose(instance, expected, atol=1e-5), 'Path differs from batch'
+
+def test_get_path():
+
+    with tempfile.TemporaryDirectory() as dataDirectory:
+
+        samplesInBatch = get_random_batch(5)
+        save_batch_npz(samplesInBatch, os.path.join(dataDirectory, 'batch_0.npz'))
+        store = build_path_store(dataDirectory, os.path.join(dataDirectory, 'store'))
+
+        x = np.array(samplesInBatch['3']['path']['x'])
+        assert store.get_path_lengths()[3] == x.shape[0], 'Wrong path length'
+        assert np.allclose(store.get_path(3)[:, 0], x, atol=1e-5), 'Wrong path'
+        assert np.allclose(store.get_path(3, 3, 4)[:, 0], x[:12:3], atol=1e-5), 'Wrong downsampled path'
+        assert np.shares_memory(store.get_path(3), store.paths), 'Path is not a view into the store'
+
+        # strided reads come from the matching pyramid level
+        assert np.shares_memory(store.get_path(3, 50), store.levelPaths[50]), 'Stride 50 not read from its level'
+        assert np.allclose(store.get_path(3, 20)[:, 0], x[::20], atol=1e-5), 'Wrong path from stride 10 level'
+        assert np.allclose(store.get_path(3, 100, 2)[:, 0], x[:200:100], atol=1e-5), 'Wrong truncated path from stride 100 level'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_store_matches_batches()
+    test_get_path()
+
+    print('passed all tests!')
@@ -10,6 +10,7 @@ from matplotlib import gridspec
 from scene import Scene
 from car_models.dubins_model import DubinsCar
 from car_models.dubins_optimal_planner_final_heading_extended import DubinsOptimalPlannerFinalHeading 
+from car_models.path import Path
 
 currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
@@ -105,11 +106,9 @@ class AdversarialPlanner:
         self.dubinsCar = self._setup_dubins_car(startPosition)
         planner = DubinsOptimalPlannerFinalHeading(self.dubinsCar, startPosition, endPosition)
         secondPath = planner.run()
-        path['x'].extend(secondPath['x'])
-        path['y'].extend(secondPath['y'])
-        path['theta'].extend(secondPath['theta'])
+        path = Path.concatenate([path, secondPath])
 
-        rerouting = np.transpose(np.array([path['x'][::10], path['y'][::10], path['theta'][::10]]))
+        rerouting = np.copy(path.downsample(10).states)
         print(rerouting.shape)
         rerouting[:, 0] /= 10.0
         rerouting[:, 1] /= 10.0
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from .dubins_distance import heading_free_dubins_path, shortest_dubins_path
+
+# Size bounded LRU cache in front of the closed form dubins queries. The
+# planners ask for the same (node, point) pair several times per iteration,
+# once for the length, once for the edge and again with the final heading.
+#
+# Keys are the start pose, target pose and turning radius rounded to the
+# given resolutions plus whether the final heading matters, so repeated
+# queries hit the cache even after small floating point drift. Results are
+# the (word, params, length) triples of dubins_distance.py.
+
+class DubinsQueryCache:
+
+    def __init__(self, maxSize=4096, positionResolution=1e-6, headingResolution=1e-6):
+
+        self.maxSize = maxSize
+        self.positionResolution = positionResolution
+        self.headingResolution = headingResolution
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def _get_key(self, startPosition, target, turningRadius, finalHeading):
+
+        key = [round(startPosition[0] / self.positionResolution),
+               round(startPosition[1] / self.positionResolution),
+               round(startPosition[2] / self.headingResolution),
+               round(target[0] / self.positionResolution),
+               round(target[1] / self.positionResolution),
+               round(turningRadius / self.positionResolution),
+               finalHeading]
+
+        # target heading only matters for final heading queries
+        if finalHeading:
+            key.append(round(target[2] / self.headingResolution))
+
+        return tuple(key)
+
+    def _query(self, startPosition, target, turningRadius, finalHeading):
+
+        key = self._get_key(startPosition, target, turningRadius, finalHeading)
+
+        result = self._entries.get(key)
+        if result is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return result
+
+        self.misses += 1
+        if finalHeading:
+            result = shortest_dubins_path(startPosition, target, turningRadius)
+        else:
+            result = heading_free_dubins_path(startPosition, target, turningRadius)
+
+        # evict least recently used query
+        self._entries[key] = result
+        if len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+
+        return result
+
+    def shortest_dubins_path(self, startPosition, target, turningRadius):
+
+        return self._query(startPosition, target, turningRadius, True)
+
+    def heading_free_dubins_path(self, startPosition, target, turningRadius):
+
+        return self._query(startPosition, target, turningRadius, False)
+
+    def dubins_path_length(self, startPosition, target, turningRadius):
+
+        word, params, pathLength = self.shortest_dubins_path(startPosition, target, turningRadius)
+
+        return pathLength
+
+    def heading_free_path_length(self, startPosition, target, turningRadius):
+
+        word, params, pathLength = self.heading_free_dubins_path(startPosition, target, turningRadius)
+
+        return pathLength
+
+    def get_hit_rate(self):
+
+        numQueries = self.hits + self.misses
+        if numQueries == 0:
+            return 0.0
+
+        return self.hits / numQueries
+
+    def clear(self):
+
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+
+        return len(self._entries)
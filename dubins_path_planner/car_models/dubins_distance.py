@@ -0,0 +1,382 @@
+# See planning.cs.uiuc.edu chapter 15.3.1(Dubins Curves) for reference material
+#
+# Length only dubins queries. Nothing in here needs a DubinsCar or steers
+# anything, so planners can rank candidate connections before deciding which
+# paths are worth sampling. Path parameters use the same (t, p, q) convention
+# as the optimal planners, segment lengths normalized by the turning radius.
+#
+# The batch_* functions score many start poses against one target, or every
+# start against every target, in a single vectorized pass. Infeasible
+# connections get a nan length and a word index of -1.
+import math
+import numpy as np
+
+WORDS = ('LSL', 'RSR', 'LSR', 'RSL', 'RLR', 'LRL')
+
+# CCC words can only be optimal when the targets are closer than 4 turning radii
+LONG_PATH_WORDS = ('LSL', 'RSR', 'LSR', 'RSL')
+
+HEADING_FREE_WORDS = ('LS', 'RS')
+
+def _mod_2_pi(theta):
+
+    return theta - 2.0 * math.pi * math.floor(theta / 2.0 / math.pi)
+
+def _transform_target_to_start_frame(startPosition, target):
+
+    deltaX = target[0] - startPosition[0]
+    deltaY = target[1] - startPosition[1]
+    theta = startPosition[2]
+
+    targetXRelativeToStart = (deltaX * math.cos(theta)) + (deltaY * math.sin(theta))
+    targetYRelativeToStart = (-1.0 * deltaX * math.sin(theta)) + (deltaY * math.cos(theta))
+
+    return targetXRelativeToStart, targetYRelativeToStart
+
+def get_path_parameters(startPosition, target, turningRadius):
+
+    # normalized distance and headings relative to the line from start to target
+    deltaX = target[0] - startPosition[0]
+    deltaY = target[1] - startPosition[1]
+
+    d = math.hypot(deltaX, deltaY) / turningRadius
+    psi = math.atan2(deltaY, deltaX)
+    alpha = _mod_2_pi(startPosition[2] - psi)
+    beta = _mod_2_pi(target[2] - psi)
+
+    return alpha, beta, d
+
+def _calculate_LSL_params(alpha, beta, d):
+
+    pSquared = 2.0 + (d * d) - (2.0 * math.cos(alpha - beta)) + (2.0 * d * (math.sin(alpha) - math.sin(beta)))
+    if pSquared < 0:
+        return None, None, None
+
+    tmp = math.atan2(math.cos(beta) - math.cos(alpha), d + math.sin(alpha) - math.sin(beta))
+    t = _mod_2_pi(-1.0 * alpha + tmp)
+    p = math.sqrt(pSquared)
+    q = _mod_2_pi(beta - tmp)
+
+    return t, p, q
+
+def _calculate_RSR_params(alpha, beta, d):
+
+    pSquared = 2.0 + (d * d) - (2.0 * math.cos(alpha - beta)) + (2.0 * d * (math.sin(beta) - math.sin(alpha)))
+    if pSquared < 0:
+        return None, None, None
+
+    tmp = math.atan2(math.cos(alpha) - math.cos(beta), d - math.sin(alpha) + math.sin(beta))
+    t = _mod_2_pi(alpha - tmp)
+    p = math.sqrt(pSquared)
+    q = _mod_2_pi(-1.0 * beta + tmp)
+
+    return t, p, q
+
+def _calculate_LSR_params(alpha, beta, d):
+
+    pSquared = (d * d) - 2.0 + (2.0 * math.cos(alpha - beta)) + (2.0 * d * (math.sin(alpha) + math.sin(beta)))
+    if pSquared < 0:
+        return None, None, None
+
+    p = math.sqrt(pSquared)
+    tmp = math.atan2(-1.0 * (math.cos(alpha) + math.cos(beta)), d + math.sin(alpha) + math.sin(beta)) - math.atan2(-2.0, p)
+    t = _mod_2_pi(-1.0 * alpha + tmp)
+    q = _mod_2_pi(-1.0 * beta + tmp)
+
+    return t, p, q
+
+def _calculate_RSL_params(alpha, beta, d):
+
+    pSquared = (d * d) - 2.0 + (2.0 * math.cos(alpha - beta)) - (2.0 * d * (math.sin(alpha) + math.sin(beta)))
+    if pSquared < 0:
+        return None, None, None
+
+    p = math.sqrt(pSquared)
+    tmp = math.atan2(math.cos(alpha) + math.cos(beta), d - math.sin(alpha) - math.sin(beta)) - math.atan2(2.0, p)
+    t = _mod_2_pi(alpha - tmp)
+    q = _mod_2_pi(beta - tmp)
+
+    return t, p, q
+
+def _calculate_RLR_params(alpha, beta, d):
+
+    expr = (6.0 - (d * d) + (2.0 * math.cos(alpha - beta)) + (2.0 * d * (math.sin(alpha) - math.sin(beta)))) / 8.0
+    if abs(expr) > 1.0:
+        return None, None, None
+
+    p = _mod_2_pi((2.0 * math.pi) - math.acos(expr))
+    t = _mod_2_pi(alpha - math.atan2(math.cos(alpha) - math.cos(beta), d - math.sin(alpha) + math.sin(beta)) + _mod_2_pi(p / 2.0))
+    q = _mod_2_pi(alpha - beta - t + _mod_2_pi(p))
+
+    return t, p, q
+
+def _calculate_LRL_params(alpha, beta, d):
+
+    expr = (6.0 - (d * d) + (2.0 * math.cos(alpha - beta)) + (2.0 * d * (math.sin(beta) - math.sin(alpha)))) / 8.0
+    if abs(expr) > 1.0:
+        return None, None, None
+
+    p = _mod_2_pi((2.0 * math.pi) - math.acos(expr))
+    t = _mod_2_pi(-1.0 * alpha - math.atan2(math.cos(alpha) - math.cos(beta), d + math.sin(alpha) - math.sin(beta)) + (p / 2.0))
+    q = _mod_2_pi(_mod_2_pi(beta) - alpha - t + _mod_2_pi(p))
+
+    return t, p, q
+
+WORD_PARAM_FUNCTIONS = {'LSL': _calculate_LSL_params,
+                        'RSR': _calculate_RSR_params,
+                        'LSR': _calculate_LSR_params,
+                        'RSL': _calculate_RSL_params,
+                        'RLR': _calculate_RLR_params,
+                        'LRL': _calculate_LRL_params}
+
+def calculate_word_params(word, alpha, beta, d):
+
+    if word not in WORD_PARAM_FUNCTIONS:
+        raise ValueError('unknown dubins word supplied: {}'.format(word))
+
+    return WORD_PARAM_FUNCTIONS[word](alpha, beta, d)
+
+def shortest_dubins_path(startPosition, target, turningRadius, words=None):
+
+    # shortest path reaching target position with target heading,
+    # returns word, (t, p, q) and length in meters
+    alpha, beta, d = get_path_parameters(startPosition, target, turningRadius)
+
+    if words is None:
+        words = LONG_PATH_WORDS if d >= 4.0 else WORDS
+
+    bestWord = None
+    bestParams = None
+    shortestPathLength = None
+
+    for word in words:
+
+        t, p, q = calculate_word_params(word, alpha, beta, d)
+        if t is None:
+            continue
+
+        length = (t + p + q) * turningRadius
+        if shortestPathLength is None or length < shortestPathLength:
+            bestWord = word
+            bestParams = (t, p, q)
+            shortestPathLength = length
+
+    return bestWord, bestParams, shortestPathLength
+
+def dubins_path_length(startPosition, target, turningRadius, words=None):
+
+    word, params, pathLength = shortest_dubins_path(startPosition, target, turningRadius, words)
+
+    return pathLength
+
+def heading_free_dubins_path(startPosition, target, turningRadius):
+
+    # shortest turn then straight path to target position, final heading is
+    # free, returns word, (arc, line) and length in meters
+    r = turningRadius
+    deltaX, deltaY = _transform_target_to_start_frame(startPosition, target)
+
+    # is target left or right of car
+    if deltaY > 0:
+        turn = 'L'
+    else:
+        turn = 'R'
+
+    # target within the car's turning radius cannot be reached by turning first
+    if math.hypot(deltaX, deltaY) <= r:
+        return None, None, None
+
+    targetInFrontOfCar = deltaX > 0
+    deltaX = abs(deltaX)
+    deltaY = abs(deltaY)
+
+    # target inside the turning circle
+    distanceSquared = (deltaX * deltaX) + (deltaY * deltaY) - (2.0 * r * deltaY)
+    if distanceSquared < 0:
+        return None, None, None
+    distance = math.sqrt(distanceSquared)
+
+    if targetInFrontOfCar:
+        alpha = -2.0 * math.atan((deltaX - distance) / (deltaY - (2.0 * r)))
+    else:
+        alpha = -2.0 * math.atan2(deltaX + distance, deltaY - (2.0 * r))
+
+    arcLength = abs(r * alpha)
+
+    return turn + 'S', (arcLength / r, distance / r), arcLength + distance
+
+def heading_free_path_length(startPosition, target, turningRadius):
+
+    word, params, pathLength = heading_free_dubins_path(startPosition, target, turningRadius)
+
+    return pathLength
+
+def _mod_2_pi_array(theta):
+
+    return theta - 2.0 * np.pi * np.floor(theta / 2.0 / np.pi)
+
+def _broadcast_start_and_target(startPositions, targets):
+
+    # (N, k) starts against a single (k,) target gives (N,) results,
+    # against (M, k) targets gives (N, M) results
+    startPositions = np.atleast_2d(np.asarray(startPositions, dtype=float))
+    targets = np.asarray(targets, dtype=float)
+    singleTarget = targets.ndim == 1
+
+    starts = startPositions[:, np.newaxis, :]
+    targets = np.atleast_2d(targets)[np.newaxis, :, :]
+
+    return starts, targets, singleTarget
+
+def _select_shortest(lengths, singleTarget):
+
+    # lengths are stacked along the last axis, one entry per word
+    lengths = np.where(np.isnan(lengths), np.inf, lengths)
+    wordIndices = np.argmin(lengths, axis=-1)
+    shortestLengths = np.take_along_axis(lengths, wordIndices[..., np.newaxis], axis=-1)[..., 0]
+
+    infeasible = np.isinf(shortestLengths)
+    shortestLengths[infeasible] = np.nan
+    wordIndices[infeasible] = -1
+
+    if singleTarget:
+        return shortestLengths[:, 0], wordIndices[:, 0]
+
+    return shortestLengths, wordIndices
+
+def _batch_LSL_length(alpha, beta, d, sa, sb, ca, cb, cab):
+
+    pSquared = 2.0 + (d * d) - (2.0 * cab) + (2.0 * d * (sa - sb))
+    tmp = np.arctan2(cb - ca, d + sa - sb)
+    t = _mod_2_pi_array(-1.0 * alpha + tmp)
+    q = _mod_2_pi_array(beta - tmp)
+
+    return np.where(pSquared < 0, np.nan, t + np.sqrt(np.abs(pSquared)) + q)
+
+def _batch_RSR_length(alpha, beta, d, sa, sb, ca, cb, cab):
+
+    pSquared = 2.0 + (d * d) - (2.0 * cab) + (2.0 * d * (sb - sa))
+    tmp = np.arctan2(ca - cb, d - sa + sb)
+    t = _mod_2_pi_array(alpha - tmp)
+    q = _mod_2_pi_array(-1.0 * beta + tmp)
+
+    return np.where(pSquared < 0, np.nan, t + np.sqrt(np.abs(pSquared)) + q)
+
+def _batch_LSR_length(alpha, beta, d, sa, sb, ca, cb, cab):
+
+    pSquared = (d * d) - 2.0 + (2.0 * cab) + (2.0 * d * (sa + sb))
+    p = np.sqrt(np.abs(pSquared))
+    tmp = np.arctan2(-1.0 * (ca + cb), d + sa + sb) - np.arctan2(-2.0, p)
+    t = _mod_2_pi_array(-1.0 * alpha + tmp)
+    q = _mod_2_pi_array(-1.0 * beta + tmp)
+
+    return np.where(pSquared < 0, np.nan, t + p + q)
+
+def _batch_RSL_length(alpha, beta, d, sa, sb, ca, cb, cab):
+
+    pSquared = (d * d) - 2.0 + (2.0 * cab) - (2.0 * d * (sa + sb))
+    p = np.sqrt(np.abs(pSquared))
+    tmp = np.arctan2(ca + cb, d - sa - sb) - np.arctan2(2.0, p)
+    t = _mod_2_pi_array(alpha - tmp)
+    q = _mod_2_pi_array(beta - tmp)
+
+    return np.where(pSquared < 0, np.nan, t + p + q)
+
+def _batch_RLR_length(alpha, beta, d, sa, sb, ca, cb, cab):
+
+    expr = (6.0 - (d * d) + (2.0 * cab) + (2.0 * d * (sa - sb))) / 8.0
+    p = _mod_2_pi_array((2.0 * np.pi) - np.arccos(np.clip(expr, -1.0, 1.0)))
+    t = _mod_2_pi_array(alpha - np.arctan2(ca - cb, d - sa + sb) + _mod_2_pi_array(p / 2.0))
+    q = _mod_2_pi_array(alpha - beta - t + _mod_2_pi_array(p))
+
+    return np.where(np.abs(expr) > 1.0, np.nan, t + p + q)
+
+def _batch_LRL_length(alpha, beta, d, sa, sb, ca, cb, cab):
+
+    expr = (6.0 - (d * d) + (2.0 * cab) + (2.0 * d * (sb - sa))) / 8.0
+    p = _mod_2_pi_array((2.0 * np.pi) - np.arccos(np.clip(expr, -1.0, 1.0)))
+    t = _mod_2_pi_array(-1.0 * alpha - np.arctan2(ca - cb, d + sa - sb) + (p / 2.0))
+    q = _mod_2_pi_array(_mod_2_pi_array(beta) - alpha - t + _mod_2_pi_array(p))
+
+    return np.where(np.abs(expr) > 1.0, np.nan, t + p + q)
+
+BATCH_WORD_LENGTH_FUNCTIONS = {'LSL': _batch_LSL_length,
+                               'RSR': _batch_RSR_length,
+                               'LSR': _batch_LSR_length,
+                               'RSL': _batch_RSL_length,
+                               'RLR': _batch_RLR_length,
+                               'LRL': _batch_LRL_length}
+
+def batch_dubins_path_lengths(startPositions, targets, turningRadius, words=None):
+
+    # shortest lengths in meters and indices into WORDS, see
+    # shortest_dubins_path for the single query version
+    starts, targets, singleTarget = _broadcast_start_and_target(startPositions, targets)
+
+    deltaX = targets[..., 0] - starts[..., 0]
+    deltaY = targets[..., 1] - starts[..., 1]
+
+    d = np.hypot(deltaX, deltaY) / turningRadius
+    psi = np.arctan2(deltaY, deltaX)
+    alpha = _mod_2_pi_array(starts[..., 2] - psi)
+    beta = _mod_2_pi_array(targets[..., 2] - psi)
+
+    # trig terms shared by every word
+    terms = (alpha, beta, d, np.sin(alpha), np.sin(beta), np.cos(alpha), np.cos(beta), np.cos(alpha - beta))
+
+    lengths = np.full(d.shape + (len(WORDS),), np.nan)
+    for i, word in enumerate(WORDS):
+
+        if words is not None and word not in words:
+            continue
+
+        wordLengths = BATCH_WORD_LENGTH_FUNCTIONS[word](*terms)
+
+        # CCC words are only considered for nearby targets by default
+        if words is None and word not in LONG_PATH_WORDS:
+            wordLengths = np.where(d >= 4.0, np.nan, wordLengths)
+
+        lengths[..., i] = wordLengths * turningRadius
+
+    return _select_shortest(lengths, singleTarget)
+
+def batch_heading_free_path_lengths(startPositions, targets, turningRadius):
+
+    # shortest turn then straight lengths in meters and indices into
+    # HEADING_FREE_WORDS, see heading_free_dubins_path for the single query
+    # version. Targets only need x and y.
+    r = turningRadius
+    starts, targets, singleTarget = _broadcast_start_and_target(startPositions, targets)
+
+    deltaX = targets[..., 0] - starts[..., 0]
+    deltaY = targets[..., 1] - starts[..., 1]
+    theta = starts[..., 2]
+
+    # target relative to the car's frame
+    relativeX = (deltaX * np.cos(theta)) + (deltaY * np.sin(theta))
+    relativeY = (-1.0 * deltaX * np.sin(theta)) + (deltaY * np.cos(theta))
+
+    # is target left or right of car
+    wordIndices = np.where(relativeY > 0, HEADING_FREE_WORDS.index('LS'), HEADING_FREE_WORDS.index('RS'))
+
+    targetInFrontOfCar = relativeX > 0
+    relativeX = np.abs(relativeX)
+    relativeY = np.abs(relativeY)
+
+    # targets within the turning radius or inside the turning circle are unreachable
+    distanceSquared = (relativeX * relativeX) + (relativeY * relativeY) - (2.0 * r * relativeY)
+    unreachable = (np.hypot(relativeX, relativeY) <= r) | (distanceSquared < 0)
+    distance = np.sqrt(np.abs(distanceSquared))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frontAlpha = -2.0 * np.arctan((relativeX - distance) / (relativeY - (2.0 * r)))
+    behindAlpha = -2.0 * np.arctan2(relativeX + distance, relativeY - (2.0 * r))
+    alpha = np.where(targetInFrontOfCar, frontAlpha, behindAlpha)
+
+    lengths = np.where(unreachable, np.nan, np.abs(r * alpha) + distance)
+    wordIndices = np.where(unreachable, -1, wordIndices)
+
+    if singleTarget:
+        return lengths[:, 0], wordIndices[:, 0]
+
+    return lengths, wordIndices
@@ -0,0 +1,59 @@
+import numpy as np
+from .dubins_distance import heading_free_dubins_path, shortest_dubins_path
+from .dubins_path_sampler import get_path_end_position, sample_dubins_path_as_path
+
+# Edge of a planning tree kept as its dubins path parameters: start pose,
+# word and (t, p, q). The sampled path is only generated when asked for and
+# is dropped again afterwards unless cachePath is set.
+class DubinsEdge:
+
+    def __init__(self, startPosition, word, params, turningRadius, stepSize, cachePath=False):
+
+        self.startPosition = np.array(startPosition[:3], dtype=float)
+        self.word = word
+        self.params = tuple(params)
+        self.turningRadius = turningRadius
+        self.stepSize = stepSize
+        self.cachePath = cachePath
+        self.length = sum(abs(param) for param in self.params) * turningRadius
+        self.endPosition = get_path_end_position(self.startPosition, word, self.params, turningRadius)
+        self._path = None
+
+    def get_path(self):
+
+        if self._path is not None:
+            return self._path
+
+        path = sample_dubins_path_as_path(self.startPosition, self.word, self.params, self.turningRadius, self.stepSize)
+        if self.cachePath:
+            self._path = path
+
+        return path
+
+    def clear_cache(self):
+
+        self._path = None
+
+def get_heading_free_edge(startPosition, target, turningRadius, stepSize, cachePath=False, queryCache=None):
+
+    # turn then straight edge to target position, None if unreachable
+    if queryCache is not None:
+        word, params, pathLength = queryCache.heading_free_dubins_path(startPosition, target, turningRadius)
+    else:
+        word, params, pathLength = heading_free_dubins_path(startPosition, target, turningRadius)
+    if word is None:
+        return None
+
+    return DubinsEdge(startPosition, word, params, turningRadius, stepSize, cachePath)
+
+def get_final_heading_edge(startPosition, target, turningRadius, stepSize, cachePath=False, queryCache=None):
+
+    # shortest edge to target position and heading, None if unreachable
+    if queryCache is not None:
+        word, params, pathLength = queryCache.shortest_dubins_path(startPosition, target, turningRadius)
+    else:
+        word, params, pathLength = shortest_dubins_path(startPosition, target, turningRadius)
+    if word is None:
+        return None
+
+    return DubinsEdge(startPosition, word, params, turningRadius, stepSize, cachePath)
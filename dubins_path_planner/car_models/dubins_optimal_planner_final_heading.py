@@ -2,6 +2,7 @@ import math
 from math import sin, cos
 import numpy as np
 from .dubins_model import DubinsCar
+from .dubins_path_sampler import sample_dubins_path_as_path
 import copy
 
 class DubinsOptimalPlannerFinalHeading:
@@ -122,49 +123,24 @@ class DubinsOptimalPlannerFinalHeading:
 
         return t, p, q
 
-    def _get_angular_velocity(self, letter):
-
-        if letter == 'L':
-            return self.dubinsCar.umax
-        elif letter == 'R':
-            return self.dubinsCar.umin
-        else:
-            print('Unrecognized turning character:', letter)
-            exit(-1)
-
     def _steer_car_to_target(self, t, p, q, word):
 
-        path = {'x': [], 'y': [], 'theta': []}
-        angularVelocity = self._get_angular_velocity(word[0])
-
-        while self.firstCurveDistanceTraveled < t:
-
-            self.firstCurveDistanceTraveled += (self.dubinsCar.velocity * self.dubinsCar.dt)
-            state = self.dubinsCar.step(angularVelocity)
-
-            path['x'].append(self.dubinsCar.state['x'])
-            path['y'].append(self.dubinsCar.state['y'])
-            path['theta'].append(self.dubinsCar.state['theta'])
-
-        while self.linearDistanceTraveled < p:
-
-            self.linearDistanceTraveled += (self.dubinsCar.velocity * self.dubinsCar.dt)
-            state = self.dubinsCar.step(0.0)
-
-            path['x'].append(self.dubinsCar.state['x'])
-            path['y'].append(self.dubinsCar.state['y'])
-            path['theta'].append(self.dubinsCar.state['theta'])
-
-        angularVelocity = self._get_angular_velocity(word[-1])
+        # evaluate arcs and lines in closed form instead of stepping the car once per dt
+        carState = self.dubinsCar.state
+        startPosition = np.array([carState['x'], carState['y'], carState['theta']])
+        stepSize = self.dubinsCar.velocity * self.dubinsCar.dt
 
-        while self.secondCurveDistanceTraveled < q:
+        # negative segment lengths are not driven at all
+        t, p, q = max(t, 0.0), max(p, 0.0), max(q, 0.0)
+        path = sample_dubins_path_as_path(startPosition, word, [t, p, q], self.minTurningRadius, stepSize)
 
-            self.secondCurveDistanceTraveled += (self.dubinsCar.velocity * self.dubinsCar.dt)
-            state = self.dubinsCar.step(angularVelocity)
+        # leave car at the end of the path, as if it had been driven there
+        if len(path) > 0:
+            self.dubinsCar.set_state(path.get_end_position())
 
-            path['x'].append(self.dubinsCar.state['x'])
-            path['y'].append(self.dubinsCar.state['y'])
-            path['theta'].append(self.dubinsCar.state['theta'])
+        self.firstCurveDistanceTraveled = t * self.minTurningRadius
+        self.linearDistanceTraveled = p * self.minTurningRadius
+        self.secondCurveDistanceTraveled = q * self.minTurningRadius
 
         return path
 
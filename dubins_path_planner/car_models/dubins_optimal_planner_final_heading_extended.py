@@ -2,6 +2,8 @@ import math
 from math import sin, cos
 import numpy as np
 from .dubins_model import DubinsCar
+from .dubins_path_sampler import sample_dubins_path_as_path
+from .dubins_distance import calculate_word_params
 import copy
 import sys
 
@@ -73,196 +75,25 @@ class DubinsOptimalPlannerFinalHeading:
         self.alpha = self._mod_2_pi(theta - self.psi)
         self.beta = self._mod_2_pi(phi - self.psi)
 
-    def _calculate_LSL_params(self):
-
-        t = self._mod_2_pi((-1.0 * self.alpha) + (math.atan2((cos(self.beta) - cos(self.alpha)), (self.d + sin(self.alpha) - sin(self.beta))))) 
-        pSquared = (2.0 + (self.d*self.d) - (2.0 * cos(self.alpha - self.beta)) + (2.0 * self.d * (sin(self.alpha) - sin(self.beta))))
-        if pSquared < 0:
-            return None, None, None
-        p = math.sqrt(pSquared)
-
-        q = self._mod_2_pi(self.beta - (math.atan2((cos(self.beta) - cos(self.alpha)), (self.d + sin(self.alpha) - sin(self.beta)))))
-
-        return t, p, q
-
-    def _calculate_RSR_params(self):
-
-        t = self.alpha - (math.atan2((cos(self.alpha) - cos(self.beta)), (self.d - sin(self.alpha) + sin(self.beta))) % (2.0 * math.pi))
-        pSquared = (2.0 + (self.d**2) - (2.0 * cos(self.alpha - self.beta)) + (2.0 * self.d * (sin(self.beta) - sin(self.alpha))))
-        if pSquared < 0:
-            return None, None, None
-        p = math.sqrt(pSquared)
-        q = (-1.0 * self.beta % (2.0 * math.pi)) + (math.atan2((cos(self.alpha) - cos(self.beta)), (self.d - sin(self.alpha) + sin(self.beta))) % (2.0 * math.pi))
-
-        return t, p, q
-
-    def _calculate_LSR_params(self):
-
-        pSquared = (self.d*self.d) - 2.0 + (2.0 * cos(self.alpha - self.beta)) + (2.0 * self.d * (sin(self.alpha) + sin(self.beta)))
-        if pSquared < 0:
-            return None, None, None
-        p = math.sqrt(pSquared)
-            
-        t = self._mod_2_pi((-1.0 * self.alpha) + math.atan2((-1.0 * (cos(self.alpha) + cos(self.beta))), (self.d + sin(self.alpha) + sin(self.beta))) - math.atan2(-2.0, p))
-        q = self._mod_2_pi(self._mod_2_pi(-1.0 * self.beta) + math.atan2((-1.0 * (cos(self.alpha) + cos(self.beta))), (self.d + sin(self.alpha) + sin(self.beta))) - math.atan2(-2.0, p))
-
-        return t, p, q
-
-    def _calculate_RSL_params(self):
-
-        pSquared = (self.d*self.d) - 2.0 + (2.0 * cos(self.alpha - self.beta)) - (2.0 * self.d * (sin(self.alpha) + sin(self.beta)))
-        if pSquared < 0:
-            return None, None, None
-        p = math.sqrt(pSquared)
-
-        t = self._mod_2_pi(self.alpha - math.atan2((cos(self.alpha) + cos(self.beta)), (self.d - sin(self.alpha) - sin(self.beta))) + math.atan2(2.0, p))
-        q = self._mod_2_pi(self.beta - math.atan2((cos(self.alpha) + cos(self.beta)), (self.d - sin(self.alpha) - sin(self.beta))) + math.atan2(2.0, p))
-
-        return t, p, q
-
-    def _calculate_RLR_params(self):
-
-        theta = math.atan2((cos(self.alpha) - cos(self.beta)), (self.d - sin(self.alpha) + sin(self.beta)))
-        expr = (6.0 - (self.d*self.d) + (2.0 * cos(self.alpha - self.beta) + (2.0 * self.d * (sin(self.alpha) - sin(self.beta))))) / 8.0
-
-        if abs(expr) > 1.0:
-            return None, None, None
-        
-        p1 = self._mod_2_pi(math.acos(expr))
-        t1 = self._mod_2_pi(self.alpha - theta + self._mod_2_pi(p1/2.0))
-        q1 = self._mod_2_pi(self.alpha - self.beta - t1 + self._mod_2_pi(p1))
-
-        p2 = self._mod_2_pi((2.0 * math.pi) - math.acos(expr))
-        t2 = self._mod_2_pi(self.alpha - theta + self._mod_2_pi(p2/2.0))
-        q2 = self._mod_2_pi(self.alpha - self.beta - t2 + self._mod_2_pi(p2))
-
-        return t2, p2, q2
-        """
-        if p1 + t1 + q2 < p2 + t2 + q2:
-            return t1, p1, q1
-        else:
-            return t2, p2, q2
-        """
-
-    def _calculate_LRL_params(self):
-
-        theta = math.atan2(cos(self.alpha) - cos(self.beta), self.d + sin(self.alpha) - sin(self.beta))
-        if (self.d + sin(self.alpha) - sin(self.beta)) < 0.0:
-            theta += math.pi
-
-        expr = (6.0 - (self.d*self.d) + (2.0 * cos(self.alpha - self.beta) + (2.0 * self.d * (sin(self.beta) - sin(self.alpha))))) / 8.0
-
-        if abs(expr) > 1.0:
-            return None, None, None
-
-        p1 = self._mod_2_pi(math.acos(expr))
-        t1 = self._mod_2_pi((-1.0 * self.alpha) - theta + (p1/2.0))
-        q1 = self._mod_2_pi(self._mod_2_pi(self.beta) - self.alpha - t1 + self._mod_2_pi(p1))
-
-        p2 = self._mod_2_pi((2.0 * math.pi) - math.acos(expr))
-        t2 = self._mod_2_pi((-1.0 * self.alpha) - theta + (p2/2.0))
-        q2 = self._mod_2_pi(self._mod_2_pi(self.beta) - self.alpha - t2 + self._mod_2_pi(p2))
-
-        return t2, p2, q2
-        """
-        if p1 + t1 + q2 < p2 + t2 + q2:
-            return t1, p1, q1
-        else:
-            return t2, p2, q2
-        """
-
-    def _get_angular_velocity(self, letter):
-
-        if letter == 'L':
-            return self.dubinsCar.umax
-        elif letter == 'R':
-            return self.dubinsCar.umin
-        elif letter == 'S':
-            return 0.0
-        else:
-            print('Unrecognized turning character:', letter)
-            exit(-1)
-
     def _steer_car_to_target(self, t, p, q, word):
 
-        path = {'x': [], 'y': [], 'theta': []}
-
-        distances = [t,p,q]
-        firstMove = 0.0
-        secondMove = 0.0
-        thirdMove = 0.0
-        traveled = [firstMove, secondMove, thirdMove]
-
-        
-        for letter, dist, trav in zip(word, distances, traveled):
-
-            angularVelocity = self._get_angular_velocity(letter)
-            trav = 0.0
-            while trav < dist:
-
-                trav += (self.dubinsCar.velocity * self.dubinsCar.dt)
-                state = self.dubinsCar.step(angularVelocity)
-
-                path['x'].append(self.dubinsCar.state['x'])
-                path['y'].append(self.dubinsCar.state['y'])
-                path['theta'].append(self.dubinsCar.state['theta'])
+        # evaluate arcs and lines in closed form instead of stepping the car once per dt
+        carState = self.dubinsCar.state
+        startPosition = np.array([carState['x'], carState['y'], carState['theta']])
+        stepSize = self.dubinsCar.velocity * self.dubinsCar.dt
+        path = sample_dubins_path_as_path(startPosition, word, [t, p, q], self.minTurningRadius, stepSize)
 
-            self.totalDistanceTraveled += trav
+        # leave car at the end of the path, as if it had been driven there
+        if len(path) > 0:
+            self.dubinsCar.set_state(path.get_end_position())
 
-        """
-        angularVelocity = self._get_angular_velocity(word[0])
-
-        while self.firstCurveDistanceTraveled < p:
-
-            self.firstCurveDistanceTraveled += (self.dubinsCar.velocity * self.dubinsCar.dt)
-            state = self.dubinsCar.step(angularVelocity)
-
-            path['x'].append(self.dubinsCar.state['x'])
-            path['y'].append(self.dubinsCar.state['y'])
-            path['theta'].append(self.dubinsCar.state['theta'])
-
-        angularVelocity = self._get_angular_velocity(word[2])
-
-
-        angularVelocity = self._get_angular_velocity(word[1])
-
-        while self.linearDistanceTraveled < p:
-
-            self.linearDistanceTraveled += (self.dubinsCar.velocity * self.dubinsCar.dt)
-            state = self.dubinsCar.step(angularVelocity)
-
-            path['x'].append(self.dubinsCar.state['x'])
-            path['y'].append(self.dubinsCar.state['y'])
-            path['theta'].append(self.dubinsCar.state['theta'])
-
-        angularVelocity = self._get_angular_velocity(word[2])
-
-        while self.secondCurveDistanceTraveled < q:
-
-            self.secondCurveDistanceTraveled += (self.dubinsCar.velocity * self.dubinsCar.dt)
-            state = self.dubinsCar.step(angularVelocity)
-
-            path['x'].append(self.dubinsCar.state['x'])
-            path['y'].append(self.dubinsCar.state['y'])
-            path['theta'].append(self.dubinsCar.state['theta'])
-        """
+        self.totalDistanceTraveled += (t + p + q) * self.minTurningRadius
 
         return path
 
     def _calculate_path_params(self, word):
 
-        if word == 'LSL':
-            return self._calculate_LSL_params()
-        elif word == 'RSR':
-            return self._calculate_RSR_params()
-        elif word == 'RSL':
-            return self._calculate_RSL_params()
-        elif word == 'LSR':
-            return self._calculate_LSR_params()
-        elif word == 'LRL':
-            return self._calculate_LRL_params()
-        elif word == 'RLR':
-            return self._calculate_RLR_params()
+        return calculate_word_params(word, self.alpha, self.beta, self.d)
 
     def _get_shortest_path_params(self):
 
@@ -0,0 +1,104 @@
+# See planning.cs.uiuc.edu chapter 15.3.1(Dubins Curves) for reference material
+#
+# Closed form evaluation of dubins paths. A path is described by its word
+# (eg. 'LSL', 'RS') and one parameter per primitive. Parameters are segment
+# lengths normalized by the turning radius, ie. the (t, p, q) convention used
+# by the optimal planners, so a turn parameter is the angle swept in radians.
+import math
+import numpy as np
+from .path import Path
+
+# signed curvature of each primitive for a unit turning radius
+PRIMITIVE_CURVATURE = {'L': 1.0, 'S': 0.0, 'R': -1.0}
+
+def _get_curvature(primitive, turningRadius):
+
+    if primitive not in PRIMITIVE_CURVATURE:
+        raise ValueError('unknown dubins primitive supplied: {}'.format(primitive))
+
+    return PRIMITIVE_CURVATURE[primitive] / turningRadius
+
+def _evaluate_segment(startPosition, curvature, distances):
+
+    x0, y0, theta0 = startPosition[0], startPosition[1], startPosition[2]
+
+    # straight line
+    if curvature == 0.0:
+        x = x0 + (distances * math.cos(theta0))
+        y = y0 + (distances * math.sin(theta0))
+        theta = theta0 + np.zeros_like(distances)
+
+    # circular arc, heading changes linearly with distance traveled
+    else:
+        theta = theta0 + (curvature * distances)
+        x = x0 + ((np.sin(theta) - math.sin(theta0)) / curvature)
+        y = y0 - ((np.cos(theta) - math.cos(theta0)) / curvature)
+
+    return x, y, theta
+
+def get_segment_end_position(startPosition, primitive, param, turningRadius):
+
+    curvature = _get_curvature(primitive, turningRadius)
+    segmentLength = abs(param) * turningRadius
+    x, y, theta = _evaluate_segment(startPosition, curvature, np.array([segmentLength]))
+
+    return np.array([x[0], y[0], theta[0] % (2.0 * math.pi)])
+
+def get_path_end_position(startPosition, word, params, turningRadius):
+
+    position = np.asarray(startPosition, dtype=float)
+
+    for primitive, param in zip(word, params):
+        position = get_segment_end_position(position, primitive, param, turningRadius)
+
+    return position
+
+def get_segment_start_positions(startPosition, word, params, turningRadius):
+
+    # pose of the car at the beginning of each primitive in the word
+    positions = [np.asarray(startPosition, dtype=float)]
+
+    for primitive, param in zip(word[:-1], params[:-1]):
+        positions.append(get_segment_end_position(positions[-1], primitive, param, turningRadius))
+
+    return positions
+
+def sample_dubins_path(startPosition, word, params, turningRadius, stepSize):
+
+    # states are sampled every stepSize meters along each segment, the start
+    # pose itself is excluded (same as stepping a DubinsCar once per dt) and
+    # the last sample of each segment is clamped to the segment end
+    xs = []
+    ys = []
+    thetas = []
+    position = np.asarray(startPosition, dtype=float)
+
+    for primitive, param in zip(word, params):
+
+        curvature = _get_curvature(primitive, turningRadius)
+        segmentLength = abs(param) * turningRadius
+        numSteps = int(math.ceil(segmentLength / stepSize))
+
+        distances = np.minimum(np.arange(1, numSteps + 1) * stepSize, segmentLength)
+        x, y, theta = _evaluate_segment(position, curvature, distances)
+
+        xs.append(x)
+        ys.append(y)
+        thetas.append(theta)
+
+        position = get_segment_end_position(position, primitive, param, turningRadius)
+
+    if len(xs) == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+
+    x = np.concatenate(xs)
+    y = np.concatenate(ys)
+    theta = np.concatenate(thetas) % (2.0 * math.pi)
+
+    return x, y, theta
+
+def sample_dubins_path_as_path(startPosition, word, params, turningRadius, stepSize):
+
+    x, y, theta = sample_dubins_path(startPosition, word, params, turningRadius, stepSize)
+
+    return Path.from_columns(x, y, theta)
@@ -0,0 +1,90 @@
+import numpy as np
+
+# Car path backed by an (N, 3) float array of x, y and theta samples.
+#
+# Concatenation only collects the arrays of the joined paths, they are copied
+# into one contiguous array the first time the samples are needed. Slicing
+# and downsampling return views, nothing is copied. Columns can still be read
+# as path['x'], path['y'] and path['theta'] like the {'x': [...], ...} dicts
+# in the JSON batches, use to_dict/from_dict to convert.
+
+COLUMNS = {'x': 0, 'y': 1, 'theta': 2}
+
+class Path:
+
+    def __init__(self, states=None):
+
+        if states is None:
+            states = np.zeros((0, 3))
+
+        self._segments = [np.asarray(states, dtype=float).reshape(-1, 3)]
+        self._numStates = self._segments[0].shape[0]
+
+    @classmethod
+    def from_columns(cls, x, y, theta):
+
+        return cls(np.column_stack((x, y, theta)))
+
+    @classmethod
+    def from_dict(cls, pathDict):
+
+        return cls.from_columns(pathDict['x'], pathDict['y'], pathDict['theta'])
+
+    @classmethod
+    def concatenate(cls, paths):
+
+        # zero copy, segments are only joined once states are accessed
+        path = cls()
+        path._segments = [segment for p in paths for segment in p._segments if segment.shape[0] > 0]
+        path._numStates = sum(segment.shape[0] for segment in path._segments)
+
+        if len(path._segments) == 0:
+            path._segments = [np.zeros((0, 3))]
+
+        return path
+
+    @property
+    def states(self):
+
+        if len(self._segments) > 1:
+            self._segments = [np.concatenate(self._segments)]
+
+        return self._segments[0]
+
+    def __len__(self):
+
+        return self._numStates
+
+    def __add__(self, otherPath):
+
+        return Path.concatenate([self, otherPath])
+
+    def __getitem__(self, key):
+
+        # column by name, eg. path['x']
+        if isinstance(key, str):
+            return self.states[:, COLUMNS[key]]
+
+        # sub path view
+        if isinstance(key, slice):
+            return Path(self.states[key])
+
+        # single state
+        return self.states[key]
+
+    def downsample(self, stride):
+
+        return Path(self.states[::stride])
+
+    def get_end_position(self):
+
+        # last state without joining segments
+        return np.copy(self._segments[-1][-1])
+
+    def copy(self):
+
+        return Path(np.copy(self.states))
+
+    def to_dict(self):
+
+        return {'x': self.states[:, 0].tolist(), 'y': self.states[:, 1].tolist(), 'theta': self.states[:, 2].tolist()}
@@ -0,0 +1,130 @@
+import math
+import numpy as np
+from car_models.dubins_path_sampler import PRIMITIVE_CURVATURE, get_segment_start_positions
+
+# Collision checks for paths against a scene's circular obstacles and
+# rectangular bounds. Obstacles are a (K, 3) array of x, y and radius,
+# see Scene.obstacleArray.
+
+def _is_out_of_bounds(points, dimensions):
+
+    return (points[:, 0] > dimensions['xmax'])\
+            | (points[:, 0] < dimensions['xmin'])\
+            | (points[:, 1] > dimensions['ymax'])\
+            | (points[:, 1] < dimensions['ymin'])
+
+def find_first_collision(points, obstacles, dimensions):
+
+    # index of the first (N, 2) path point that leaves the scene or lands
+    # inside an obstacle, None if the whole path is collision free
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    collisions = _is_out_of_bounds(points, dimensions)
+
+    if obstacles.shape[0] > 0:
+
+        # (N, K) distances from every point to every obstacle center
+        deltas = points[:, np.newaxis, :] - obstacles[np.newaxis, :, :2]
+        distancesSquared = np.sum(deltas * deltas, axis=-1)
+        collisions |= np.any(distancesSquared < (obstacles[:, 2] * obstacles[:, 2]), axis=1)
+
+    collisionIndices = np.flatnonzero(collisions)
+    if collisionIndices.shape[0] == 0:
+        return None
+
+    return int(collisionIndices[0])
+
+def is_path_collision_free(path, obstacles, dimensions):
+
+    # path in the {'x': [...], 'y': [...], 'theta': [...]} layout used by the planners
+    points = np.column_stack((path['x'], path['y']))
+
+    return find_first_collision(points, obstacles, dimensions) is None
+
+# Exact checks for dubins paths straight from their (word, params), see
+# car_models/dubins_path_sampler.py. Each arc and line segment is intersected
+# with every obstacle circle and the scene bounds, so invalid edges can be
+# rejected before any path is sampled and nothing slips between samples.
+
+def _is_any_out_of_bounds(points, dimensions):
+
+    return bool(np.any(_is_out_of_bounds(np.asarray(points).reshape(-1, 2), dimensions)))
+
+def _line_collides(startPosition, length, obstacles, dimensions):
+
+    start = startPosition[:2]
+    direction = np.array([math.cos(startPosition[2]), math.sin(startPosition[2])])
+    end = start + (length * direction)
+
+    # the scene is convex, a line stays inside if both of its ends do
+    if _is_any_out_of_bounds([start, end], dimensions):
+        return True
+
+    if obstacles.shape[0] == 0:
+        return False
+
+    # closest point on the segment to each obstacle center
+    distancesAlongLine = np.clip((obstacles[:, :2] - start) @ direction, 0.0, length)
+    closestPoints = start + (distancesAlongLine[:, np.newaxis] * direction)
+    deltas = closestPoints - obstacles[:, :2]
+
+    return bool(np.any(np.sum(deltas * deltas, axis=1) < (obstacles[:, 2] * obstacles[:, 2])))
+
+def _is_angle_on_arc(angles, startAngle, turnDirection, sweep):
+
+    if sweep >= 2.0 * math.pi:
+        return np.ones(np.shape(angles), dtype=bool)
+
+    return np.mod(turnDirection * (np.asarray(angles) - startAngle), 2.0 * math.pi) <= sweep
+
+def _get_points_on_circle(center, radius, angles):
+
+    angles = np.asarray(angles, dtype=float)
+
+    return np.column_stack((center[0] + (radius * np.cos(angles)), center[1] + (radius * np.sin(angles))))
+
+def _arc_collides(startPosition, turnDirection, sweep, turningRadius, obstacles, dimensions):
+
+    # turnDirection is 1 for left (counter clockwise) and -1 for right turns,
+    # sweep is the angle turned through in radians
+    r = turningRadius
+    x0, y0, theta0 = startPosition[0], startPosition[1], startPosition[2]
+    center = np.array([x0 - (turnDirection * r * math.sin(theta0)), y0 + (turnDirection * r * math.cos(theta0))])
+    startAngle = math.atan2(y0 - center[1], x0 - center[0])
+    endAngle = startAngle + (turnDirection * sweep)
+
+    # furthest points of the arc along x and y are its ends or the circle's extremes
+    extremeAngles = np.array([0.0, 0.5 * math.pi, math.pi, 1.5 * math.pi])
+    boundaryAngles = np.concatenate(([startAngle, endAngle], extremeAngles[_is_angle_on_arc(extremeAngles, startAngle, turnDirection, sweep)]))
+    if _is_any_out_of_bounds(_get_points_on_circle(center, r, boundaryAngles), dimensions):
+        return True
+
+    if obstacles.shape[0] == 0:
+        return False
+
+    # closest point on the circle to an obstacle lies along the line to its
+    # center, if that point is not on the arc one of the arc ends is closest
+    offsets = obstacles[:, :2] - center
+    distancesToCenter = np.hypot(offsets[:, 0], offsets[:, 1])
+    obstacleAngles = np.arctan2(offsets[:, 1], offsets[:, 0])
+
+    arcEnds = _get_points_on_circle(center, r, [startAngle, endAngle])
+    distancesToEnds = np.hypot(obstacles[:, np.newaxis, 0] - arcEnds[:, 0], obstacles[:, np.newaxis, 1] - arcEnds[:, 1])
+    distances = np.where(_is_angle_on_arc(obstacleAngles, startAngle, turnDirection, sweep), np.abs(distancesToCenter - r), np.min(distancesToEnds, axis=1))
+
+    return bool(np.any(distances < obstacles[:, 2]))
+
+def is_dubins_path_collision_free(startPosition, word, params, turningRadius, obstacles, dimensions):
+
+    segmentStartPositions = get_segment_start_positions(startPosition, word, params, turningRadius)
+
+    for primitive, param, segmentStart in zip(word, params, segmentStartPositions):
+
+        if primitive == 'S':
+            collides = _line_collides(segmentStart, abs(param) * turningRadius, obstacles, dimensions)
+        else:
+            collides = _arc_collides(segmentStart, PRIMITIVE_CURVATURE[primitive], abs(param), turningRadius, obstacles, dimensions)
+
+        if collides:
+            return False
+
+    return True
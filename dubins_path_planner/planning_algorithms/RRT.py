@@ -14,8 +14,11 @@ sys.path.append(parentdir)
 
 from car_models.dubins_optimal_planner import DubinsOptimalPlanner
 from car_models.dubins_model import DubinsCar
+from car_models.path import Path
+from car_models.dubins_distance import heading_free_path_length, heading_free_dubins_path
 from matplotlib.lines import Line2D
 from scene import Scene
+from collision_checker import is_path_collision_free, is_dubins_path_collision_free
 
 """
 USAGE: python RRT.py [animate] [scene_selection]
@@ -33,7 +36,7 @@ class DubinsCarRRT:
             self.theta = position[2] 
             self.position = position
             self.parent = None
-            self.path = {'x':[], 'y':[], 'theta':[]}
+            self.path = Path()
             if path is not None:
                 self.path = path
 
@@ -47,6 +50,8 @@ class DubinsCarRRT:
         self.fig = None
         self.ax = None
         self.maxIter = 100
+        # wall-clock budget in seconds, None runs all iterations
+        self.timeLimit = None
         self.pathFromStartToTarget = None 
         self.leg=None
         if self.animate:
@@ -69,48 +74,29 @@ class DubinsCarRRT:
 
         return randomPoint
 
-    def _is_path_out_of_bounds(self, x, y):
-
-        if x > self.scene.dimensions['xmax']\
-                or x < self.scene.dimensions['xmin']\
-                or y > self.scene.dimensions['ymax']\
-                or y < self.scene.dimensions['ymin']:
-                    return True
-        return False
-
     def _is_point_reachable(self, originNode, destinationPoint, path=None):
 
         if originNode == None:
             return False
 
-        # checking if target is reachable
-        if path is None:
-            path = self._get_path_from_node_to_point(originNode, destinationPoint)
-            if path is None:
-                return False
-        
-        i = 0
-        # check for obstacle collisions
-        for x,y in zip(path['x'], path['y']):
-            point = np.array([x,y])
+        # check an already generated path for obstacle collisions and leaving the scene
+        if path is not None:
+            return is_path_collision_free(path, self.scene.obstacleArray, self.scene.dimensions)
 
-            if i % 10 == 0:
-
-                if self._is_path_out_of_bounds(x, y):
-                    return False
+        # otherwise check the dubins path exactly, before generating it
+        r = self.car.minTurningRadius
+        if abs(np.linalg.norm(originNode.position[:2] - destinationPoint[:2])) < (2.0 * r):
+            return False
+        word, params, pathLength = heading_free_dubins_path(originNode.position, destinationPoint, r)
 
-                # invalid path if point collides with obstacle
-                for obstacle in self.scene.obstacles:
-                    if abs(np.linalg.norm(point - obstacle[:2])) < obstacle[2]:
-                        return False
-            i += 1
+        if word is None:
+            return False
 
-        return True
+        return is_dubins_path_collision_free(originNode.position, word, params, r, self.scene.obstacleArray, self.scene.dimensions)
 
     def _find_nearest_node_to_new_point(self, randomPoint):
 
         # setup to begin search 
-        shortestPath = None
         shortestPathLength = None
         startNode = None
         
@@ -121,19 +107,23 @@ class DubinsCarRRT:
             if abs(np.linalg.norm(node.position[:2] - randomPoint)) < (2.0 * self.car.minTurningRadius):
                 continue
 
-            # get dubins optimal path and length
-            path, pathLength = self._calculate_dubins_path_length(node, randomPoint)
+            # get dubins optimal path length
+            pathLength = self._calculate_dubins_path_length(node, randomPoint)
+            if pathLength is None:
+                continue
 
             # store shortest path
             if shortestPathLength is None or pathLength < shortestPathLength:
                 shortestPathLength = pathLength
-                shortestPath = path
                 startNode = node
 
                 if self.animate:
-                    self._update_animation(point=randomPoint, path=shortestPath, event='candidate')
+                    path = self._get_path_from_node_to_point(node, randomPoint)
+                    self._update_animation(point=randomPoint, path=path, event='candidate')
 
-        return shortestPath, shortestPathLength, startNode
+        # paths are checked for collisions before being generated, so only
+        # the length is returned here
+        return shortestPathLength, startNode
 
     def _get_path_from_node_to_point(self, startNode, destinationPoint):
 
@@ -149,22 +139,12 @@ class DubinsCarRRT:
 
     def _calculate_dubins_path_length(self, originNode, destinationPoint):
 
-        # re-initialize dubins car to be at origin node
-        dubinsState = originNode.position 
-        self.car.set_state(dubinsState)
-
-        # instantiate optimal planner
-        planner = DubinsOptimalPlanner(self.car, dubinsState, destinationPoint)
-
-        # get optimal path produced by planner
-        path = planner.run()
-        pathLength = planner.angularDistanceTraveled + planner.linearDistanceTraveled
-
-        return path, pathLength
+        # closed form length, no car is steered
+        return heading_free_path_length(originNode.position, destinationPoint, self.car.minTurningRadius)
 
     def _add_node(self, startNode, shortestPath):
 
-        carStateAtPoint = np.array([shortestPath['x'][-1], shortestPath['y'][-1], shortestPath['theta'][-1]])
+        carStateAtPoint = shortestPath.get_end_position()
         nodeToAdd = self.NodeRRT(carStateAtPoint, shortestPath)
         nodeToAdd.parent = startNode
         nodeToAdd.path = shortestPath
@@ -177,17 +157,18 @@ class DubinsCarRRT:
         finalPathToTarget = self._get_path_from_node_to_point(self.nodeList[-1], target)
         targetNode = self._add_node(self.nodeList[-1], finalPathToTarget)
 
-        self.pathFromStartToTarget = {'nodes': [], 'path': {'x': [], 'y': [], 'theta': []}} 
+        self.pathFromStartToTarget = {'nodes': [], 'path': Path()} 
         node = targetNode
 
         while node is not None:
 
             self.pathFromStartToTarget['nodes'].append(node)
-            self.pathFromStartToTarget['path']['x'] = node.path['x'] + self.pathFromStartToTarget['path']['x']
-            self.pathFromStartToTarget['path']['y'] = node.path['y'] + self.pathFromStartToTarget['path']['y']
-            self.pathFromStartToTarget['path']['theta'] = node.path['theta'] + self.pathFromStartToTarget['path']['theta']
             node = node.parent
 
+        # nodes were collected target to root, join their edges root to target in one copy
+        edges = [node.path for node in reversed(self.pathFromStartToTarget['nodes'])]
+        self.pathFromStartToTarget['path'] = Path.concatenate(edges)
+
         if self.animate:
             self._update_animation(target, path=self.pathFromStartToTarget['path'], event='reached target') 
         
@@ -292,24 +273,30 @@ class DubinsCarRRT:
         isTargetReachable = False
 
         randomPoint = self._sample_random_point()
-        shortestPath, shortestPathLength, startNode = self._find_nearest_node_to_new_point(randomPoint)
+        shortestPathLength, startNode = self._find_nearest_node_to_new_point(randomPoint)
 
-        # check for viable path from parent node to new point
-        isPointReachable = self._is_point_reachable(startNode, randomPoint, shortestPath)
+        # check for viable path from parent node to new point, before generating it
+        isPointReachable = self._is_point_reachable(startNode, randomPoint)
 
         if isPointReachable:
+            shortestPath = self._get_path_from_node_to_point(startNode, randomPoint)
             self._add_node(startNode, shortestPath)
             isTargetReachable = self._is_point_reachable(self.nodeList[-1], target)
 
             if self.animate:
                 self._update_animation(point=randomPoint, path=shortestPath, event='valid path')
 
-        elif self.animate:
+        elif self.animate and startNode is not None:
+            shortestPath = self._get_path_from_node_to_point(startNode, randomPoint)
             self._update_animation(point=randomPoint, path=shortestPath, event='invalid path')
 
         return isTargetReachable
     
        
+    def _is_out_of_time(self, startTime):
+
+        return self.timeLimit is not None and (time.time() - startTime) > self.timeLimit
+
     # RRT ALGORITHM
     def simulate(self):
         
@@ -324,7 +311,8 @@ class DubinsCarRRT:
         isTargetReachable = self._is_point_reachable(self.root, target)
 
         iteration = 0
-        while not isTargetReachable and iteration < self.maxIter:
+        startTime = time.time()
+        while not isTargetReachable and iteration < self.maxIter and not self._is_out_of_time(startTime):
 
             # extend tree
             isTargetReachable = self._extend(target)
@@ -332,11 +320,11 @@ class DubinsCarRRT:
 
         sample = None
         # finally, connect last node to target and add target to nodelist
-        if iteration < self.maxIter:
+        if iteration < self.maxIter and isTargetReachable:
             self._set_final_path_from_start_to_target(target)
             sample = {}
             sample['target'] = {'coordinates': target, 'index': targetIdx }
-            sample['path'] = self.pathFromStartToTarget['path']
+            sample['path'] = self.pathFromStartToTarget['path'].to_dict()
 
         if self.animate:
             legend_elements = [ Line2D([0], [0], marker='o', linestyle='', fillstyle='none', label='Non-selected Target',
@@ -7,7 +7,6 @@ import matplotlib.pyplot as plt
 import sys
 import json
 import csv
-import tensorflow as tf
 import scipy
 from scipy import stats
 
@@ -15,79 +14,21 @@ currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
-from car_models.dubins_optimal_planner import DubinsOptimalPlanner
-from car_models.dubins_optimal_planner_final_heading_extended import DubinsOptimalPlannerFinalHeading, DubinsError
 from car_models.dubins_model import DubinsCar
+from car_models.path import Path
+from car_models.dubins_distance import batch_heading_free_path_lengths
+from car_models.dubins_cache import DubinsQueryCache
+from car_models.dubins_edge import get_heading_free_edge, get_final_heading_edge
+from planning_algorithms.node_grid import NodeGrid
+from planning_algorithms.child_list import ChildList
+from planning_algorithms.ancestry import set_ancestor_jumps, is_ancestor
 from matplotlib.lines import Line2D
 from scene import Scene
-
-class ChildList:
-
-    def __init__(self, firstChild=None):
-
-        self.head = firstChild
-        self.tail = firstChild
-
-    def is_empty(self, node):
-
-        if self.head is None and self.tail is None:
-            return True
-        return False
-
-    def is_in_child_list(self, node):
-
-        n = self.head
-        
-        while n != None:
-
-            n = n.sibling
-            if n == node:
-                return True
-
-        return False
-
-    def remove(self, nodeToRemove):
-
-        n = self.head
-
-        if n == nodeToRemove:
-            n.head = n.sibling
-            return n 
-
-        while n.sibling != nodeToRemove:
-
-            n = n.sibling
-
-        if self.tail == n.sibling:
-            self.tail = n
-
-        n.sibling = n.sibling.sibling
-
-        return n
-
-    def add(self, nodeToAdd):
-
-        self.tail.sibling = nodeToAdd
-        self.tail = nodetoAdd
-
-        return nodeToAdd
-
-    def as_list(self):
-
-        childList = []
-
-        n = self.head
-
-        while n != None:
-
-            childList.append(n)
-            n = n.sibling
-
-        return childList
+from collision_checker import is_path_collision_free, is_dubins_path_collision_free
 
 class NodeAdvRRT:
 
-    def __init__(self, position, pathLength=None, path=None, name=None):
+    def __init__(self, position, pathLength=None, edge=None, name=None):
 
         self.x = position[0] 
         self.y = position[1] 
@@ -98,15 +39,32 @@ class NodeAdvRRT:
         self.childList = ChildList()
         self.sibling = None
 
-        self.path = {'x':[], 'y':[], 'theta':[]}
-        if path is not None:
-            self.path = path
+        self.pathLength = 0.0
+        self.edge = None
+        if edge is not None:
+            self.edge = edge
             self.pathLength = pathLength
         self.plottedPath = None
         self.name = name
-        self.pathLength = 0.0
         self.entropy = 0.0
+        # distance and entropy cost-to-come from root, kept up to date on rewires
+        self.distanceCost = 0.0
+        self.entropyCost = 0.0
+        # lstm [h, c] after the path from the root to this node, None at the
+        # root, and the number of path states from the root
         self.lstmStates = None
+        self.numStates = 0
+        self.treeIndex = None
+        # depth and 2^k-th ancestors for cycle checks, see ancestry.py
+        self.depth = 0
+        self.ancestorJumps = []
+
+    @property
+    def path(self):
+        # edge geometry is only sampled when needed
+        if self.edge is None:
+            return Path()
+        return self.edge.get_path()
 
     def _set_position(self, position):
 
@@ -128,7 +86,7 @@ class NodeAdvRRT:
 
 class DubinsCarAdversarialOptimalRRT:
         
-    def __init__(self, dubinsCar, scene, model, animate = False):
+    def __init__(self, dubinsCar, scene, model, animate = False, cachePaths = False, dubinsCacheSize = 4096):
 
         # tree primitives
         self.car = dubinsCar
@@ -139,12 +97,26 @@ class DubinsCarAdversarialOptimalRRT:
         self.minCostGoalPath = []
         self.scene = scene
         self.nearestNeighborRadius = 6.0
+
+        # keep sampled edge paths on the nodes instead of regenerating them
+        self.cachePaths = cachePaths
+
+        # repeated length and edge queries between the same poses, see
+        # dubinsCache.hits and dubinsCache.misses
+        self.dubinsCache = DubinsQueryCache(dubinsCacheSize)
+
+        # spatial index over tree node positions
+        self.nodeGrid = NodeGrid(self.nearestNeighborRadius)
+        self.root.treeIndex = self.nodeGrid.insert(self.root.position)
         self.goalNearestNeighborRadius = 2.0
         self.targetIdx = None
 
         # integrated classifier
         self.model = model
 
+        # scores the edges of many candidate nodes in one batched model call
+        self.edgeScorer = model.get_edge_scorer()
+
         # path to goal
         self.pathToGoalNodes = None
         self.plottedPathToGoal = [] 
@@ -154,6 +126,8 @@ class DubinsCarAdversarialOptimalRRT:
         self.fig = None
         self.ax = None
         self.maxIter = 250
+        # wall-clock budget in seconds, the best path so far is returned
+        self.timeLimit = None
         self.iteration=0
         self.leg=None
         if self.animate:
@@ -175,122 +149,90 @@ class DubinsCarAdversarialOptimalRRT:
 
         return randomPoint
 
-    def _is_path_out_of_bounds(self, x, y):
-
-        if x > self.scene.dimensions['xmax']\
-                or x < self.scene.dimensions['xmin']\
-                or y > self.scene.dimensions['ymax']\
-                or y < self.scene.dimensions['ymin']:
-                    return True
-        return False
-
-    def _is_point_reachable(self, originNode, destinationPoint, path=None):
+    def _is_point_reachable(self, originNode, destinationPoint, path=None, finalHeading=False):
 
         if originNode == None:
             return False
 
-        # checking if target is reachable
-        if path is None:
-            path = self._get_path_from_node_to_point(originNode, destinationPoint)
-            if path is None:
-                return False
-        
-        i = 0
-        # check for obstacle collisions
-        for x,y in zip(path['x'], path['y']):
-            point = np.array([x,y])
-
-            if i % 10 == 0:
-
-                if self._is_path_out_of_bounds(x, y):
-                    return False
-
-                # invalid path if point collides with obstacle
-                for obstacle in self.scene.obstacles:
-                    if abs(np.linalg.norm(point - obstacle[:2])) < obstacle[2]:
-                        return False
-            i += 1
-
-        return True
+        # check an already generated path for obstacle collisions and leaving the scene
+        if path is not None:
+            return is_path_collision_free(path, self.scene.obstacleArray, self.scene.dimensions)
 
-    def _get_path_from_node_to_point(self, startNode, destinationPoint):
+        # otherwise check the dubins path exactly, before generating it
+        if finalHeading:
+            edge = self._get_dubins_edge_final_heading(originNode, destinationPoint)
+        else:
+            if abs(np.linalg.norm(originNode.position[:2] - destinationPoint[:2])) < (2.0 * self.car.minTurningRadius):
+                return False
+            edge = self._get_dubins_edge(originNode, destinationPoint)
 
-        if abs(np.linalg.norm(startNode.position[:2] - destinationPoint[:2])) < (2.0 * self.car.minTurningRadius):
-            return None 
+        return self._is_edge_collision_free(edge)
 
-        dubinsState = np.array([startNode.x, startNode.y, startNode.theta])
-        self.car.set_state(dubinsState)
-        planner = DubinsOptimalPlanner(self.car, dubinsState, destinationPoint)
-        path = planner.run()
+    def _is_edge_collision_free(self, edge):
 
-        return path
+        if edge is None:
+            return False
 
-    def _get_dubins_path(self, originNode, destinationPoint):
- 
-        # re-initialize dubins car to be at origin node
-        dubinsState = originNode.position 
-        self.car.set_state(dubinsState)
+        return is_dubins_path_collision_free(edge.startPosition, edge.word, edge.params, edge.turningRadius,
+                self.scene.obstacleArray, self.scene.dimensions)
 
-        # instantiate optimal planner
-        planner = DubinsOptimalPlanner(self.car, dubinsState, destinationPoint)
+    def _get_dubins_edge(self, originNode, destinationPoint):
 
-        # get optimal path produced by planner
-        path = planner.run()
+        # dubins parameters only, the path is sampled on demand
+        stepSize = self.car.velocity * self.car.dt
 
-        return path
+        return get_heading_free_edge(originNode.position, destinationPoint, self.car.minTurningRadius, stepSize, self.cachePaths, self.dubinsCache)
    
     def _calculate_dubins_path_length_node_to_point(self, originNode, destinationPoint):
         ### Final heading does NOT matter
 
-        # re-initialize dubins car to be at origin node
-        dubinsState = originNode.position 
-        self.car.set_state(dubinsState)
-
-        # instantiate optimal planner
-        planner = DubinsOptimalPlanner(self.car, dubinsState, destinationPoint)
-
-        # get optimal pathlength produced by planner
-        pathLength = planner.calculate_shortest_pathlength()
-
-        return pathLength
+        # closed form length, no car is steered
+        return self.dubinsCache.heading_free_path_length(originNode.position, destinationPoint, self.car.minTurningRadius)
 
     def _calculate_dubins_path_length_final_heading(self, originNode, destinationPoint):
         ### Final heading DOES matter (rewiring to non-leaf node)
 
-        dubinsState = originNode.position
-        self.car.set_state(dubinsState)
+        return self.dubinsCache.dubins_path_length(originNode.position, destinationPoint, self.car.minTurningRadius)
 
-        planner = DubinsOptimalPlannerFinalHeading(self.car, dubinsState, destinationPoint)
+    def _get_dubins_edge_final_heading(self, originNode, destinationPoint):
 
-        path = planner.run()
-
-        # planner will return None if a path cannot be calculated
-        if path is None:
-            return None, None
-        
-        pathLength = planner.totalDistanceTraveled
+        stepSize = self.car.velocity * self.car.dt
 
-        return path, pathLength
+        return get_final_heading_edge(originNode.position, destinationPoint, self.car.minTurningRadius, stepSize, self.cachePaths, self.dubinsCache)
 
-    def _create_node(self, startNode, shortestPathLength, shortestPath):
+    def _create_node(self, startNode, shortestPathLength, shortestEdge, score=True):
 
         # x, y, heading
-        carStateAtPoint = np.array([shortestPath['x'][-1], shortestPath['y'][-1], shortestPath['theta'][-1]])
+        carStateAtPoint = shortestEdge.endPosition
 
         # initialize node
-        newNode = NodeAdvRRT(carStateAtPoint, shortestPathLength, shortestPath)
+        newNode = NodeAdvRRT(carStateAtPoint, shortestPathLength, shortestEdge)
         newNode.name = 'Temp'
         newNode.parent = startNode
-        newNode.path = shortestPath
-        newNode.entropy = self._calculate_entropy(newNode)
+        newNode.numStates = startNode.numStates + len(newNode.path)
+        newNode.distanceCost = startNode.distanceCost + newNode.pathLength
+
+        # callers scoring many candidates batch them with _score_nodes
+        if score:
+            self._score_nodes([newNode])
 
         return newNode
 
-    def _add_node(self, startNode, shortestPathLength, shortestPath, goal=False):
+    def _score_nodes(self, nodes):
+
+        entropies, lstmStates = self._calculate_entropies(nodes)
+
+        for node, entropy, states in zip(nodes, entropies, lstmStates):
+            node.entropy = entropy
+            node.lstmStates = states
+            node.entropyCost = node.parent.entropyCost + entropy
+
+    def _add_node(self, startNode, shortestPathLength, shortestEdge, goal=False):
 
-        nodeToAdd = self._create_node(startNode, shortestPathLength, shortestPath)
+        nodeToAdd = self._create_node(startNode, shortestPathLength, shortestEdge)
         startNode.numChildren += 1
         startNode.childList.add(nodeToAdd)
+        set_ancestor_jumps(nodeToAdd)
 
         if goal:
             # adding node to goal list
@@ -299,73 +241,65 @@ class DubinsCarAdversarialOptimalRRT:
         else:
             # adding node to rrt* tree
             nodeToAdd.name = '{}'.format(len(self.nodeList)) 
+            nodeToAdd.treeIndex = self.nodeGrid.insert(nodeToAdd.position)
             self.nodeList.append(nodeToAdd)
             
         return nodeToAdd
 
-    def _calculate_entropy(self, node):
+    def _get_edge_instance(self, node):
 
-        branch = self._get_nodes_leaf_to_root(node)
+        # calculate entropy once per second of the path from the root, the
+        # first state of the path is not scored
+        sampleRate = 100
+        parentNumStates = node.parent.numStates
+        firstSample = max(sampleRate, -(-parentNumStates // sampleRate) * sampleRate) - parentNumStates
 
-        path = {'x':[], 'y':[], 'theta'[]}
-        path = node.path
+        instance = np.copy(node.path.states[firstSample::sampleRate])
+        instance[:, :2] /= 10.0
+        instance[:, 2] -= math.pi
+        instance[:, 2] /= math.pi
 
-        # calculate entropy once per second
-        sampleRate = 100
-        instance = np.array([path['x'], path['y'], path['theta']]).transpose()
-        instance = instance[np.newaxis, ::sampleRate, :]
-        instance[:, :, :2] /= 10.0
-        instance[:, :, 2] -= math.pi
-        instance[:, :, 2] /= math.pi
+        return instance
+
+    def _calculate_entropies(self, nodes):
 
-        cumulativeEntropy = node.parent.entropy
-        self.model.initialize_states(node.parent.lstmStates)
+        # entropy summed over every node's edge and the lstm states after it.
+        # The lstm continues from each parent's cached states, so only the
+        # edges' timesteps are run through the model, all edges in one batch
+        entropies = [0.0] * len(nodes)
+        lstmStates = [node.parent.lstmStates for node in nodes]
 
-        for i in range(1, instance.shape[1]):
+        instances = [self._get_edge_instance(node) for node in nodes]
+        scored = [i for i, instance in enumerate(instances) if instance.shape[0] > 0]
+        if len(scored) == 0:
+            return entropies, lstmStates
 
-            # give model a timestep and ask for prediction
-            inputTensor = tf.constant(instance[:, i, :])
-            logits = self.model(instance)[0, :].numpy()
+        predictions, states = self.edgeScorer.score([instances[i] for i in scored], [lstmStates[i] for i in scored])
+
+        for i, logits, edgeStates in zip(scored, predictions, states):
 
             #entropy = -1.0 * np.sum(scipy.special.xlogy(logits, logits))
-            entropy = stats.entropy(logits) / math.log(logits.shape[0])
-            #entropy = 1.0 - logits[self.targetIdx]
-            #entropy = logits[self.targetIdx]
-            #print(self.targetIdx)
-            #print(logits)
+            entropy = stats.entropy(logits, axis=1) / math.log(logits.shape[1])
 
             # debug, entropy should be normalized to timesteps
-            if entropy > (1.0):
+            if np.any(entropy > (1.0)):
                 print('entropy cannot be greater than 1')
                 exit(1)
 
-            cumulativeEntropy += entropy 
-
-        # reset model after predicting entire path
-        self.model.reset_states()
+            entropies[i] = float(np.sum(entropy))
+            lstmStates[i] = edgeStates
 
-        return entropy 
+        return entropies, lstmStates
 
     def _get_cost(self, node):
         
         if node.name == 'Root':
             return 0.0
 
-        # sum costs from node to root
-        distanceCost = node.pathLength
-        entropyCost = node.entropy
-
-        fullPath = node.path.copy()
-
-        while node.name != 'Root':
-
-            node = node.parent
-            distanceCost += node.pathLength
-            entropyCost += node.entropy
-
+        # cached costs-to-come, see _update_subtree
         alpha = -.99
 
-        cost = distanceCost + (alpha * entropyCost) 
+        cost = node.distanceCost + (alpha * node.entropyCost) 
         #print('totalCost:', cost, flush=True)
 
         # debug, rrt* cannot have negative costs
@@ -375,53 +309,94 @@ class DubinsCarAdversarialOptimalRRT:
 
         return cost 
 
+    def _update_subtree(self, node):
+
+        # update costs-to-come and ancestor tables of node and its whole
+        # subtree after a rewire, parents are always updated before children
+        node.distanceCost = node.parent.distanceCost + node.pathLength
+        node.entropyCost = node.parent.entropyCost + node.entropy
+        set_ancestor_jumps(node)
+
+        level = list(node.childList)
+
+        while len(level) > 0:
+
+            for n in level:
+                n.numStates = n.parent.numStates + len(n.path)
+                n.distanceCost = n.parent.distanceCost + n.pathLength
+                set_ancestor_jumps(n)
+
+            # descendants are rescored from their new ancestors' lstm states,
+            # one batch per depth. Node itself was scored as the rewire candidate
+            self._score_nodes(level)
+
+            level = [child for n in level for child in n.childList]
+
+    def _get_rewire_candidate(self, newNode, nearNode):
+
+        # unscored candidate node for rewiring near node from new node, None
+        # if near node cannot be rewired
+        # cannot rewire root node
+        if nearNode.name == 'Root':
+            return None
+        # cannot rewire to node in own path(cycle)
+        elif is_ancestor(nearNode, newNode):
+            print('cannot create cycle in rewire')
+            return None
+
+        # Only consider heading for rewiring to non leaf nodes
+        finalHeading = nearNode.numChildren > 0
+        if not finalHeading:
+            euclideanDistance = abs(np.linalg.norm(newNode.position[:2] - nearNode.position[:2]))
+            if euclideanDistance <= (2.0 * self.car.minTurningRadius):
+                return None
+
+        # check obstacle collisions before generating the path
+        collisionFree = self._is_point_reachable(newNode, nearNode.position, finalHeading=finalHeading)
+
+        if not collisionFree:
+            return None
+
+        if finalHeading:
+            pathLengthToNear = self._calculate_dubins_path_length_final_heading(newNode, nearNode.position)
+            edgeToNear = self._get_dubins_edge_final_heading(newNode, nearNode.position)
+        else:
+            pathLengthToNear = self._calculate_dubins_path_length_node_to_point(newNode, nearNode.position)
+            edgeToNear = self._get_dubins_edge(newNode, nearNode.position)
+
+        if edgeToNear is None:
+            return None
+
+        candidateNode = self._create_node(newNode, pathLengthToNear, edgeToNear, score=False)
+        candidateNode.finalHeading = finalHeading
+
+        return candidateNode
+
     def _rewire(self, newNode, nearestNodes):
 
         rewire = False
 
         #print(newNode.name,[x.name for x in nearestNodes])
-        for nearNode in nearestNodes:
-
-            valid = True 
-            # cannot rewire root node
-            if nearNode.name == 'Root':
-                valid = False 
-            # cannot rewire to node in own path(cycle)
-            else:
-                nodesInPath = self._get_nodes_leaf_to_root(newNode)
-                for n in nodesInPath:
-
-                    if n.name == nearNode.name:
-                        print('cannot create cycle in rewire')
-                        valid = False
-
-            if not valid:
-                continue
+        candidates = [(nearNode, self._get_rewire_candidate(newNode, nearNode)) for nearNode in nearestNodes]
+        candidates = [(nearNode, candidateNode) for nearNode, candidateNode in candidates if candidateNode is not None]
 
-            # Only consider heading for rewiring to non leaf nodes
-            if nearNode.numChildren > 0:
-                pathToNear, pathLengthToNear = self._calculate_dubins_path_length_final_heading(newNode, nearNode.position)
-            else:
-                euclideanDistance = abs(np.linalg.norm(newNode.position[:2] - nearNode.position[:2]))
-                pathToNear = None
-                if euclideanDistance > (2.0 * self.car.minTurningRadius):
-                    pathLengthToNear = self._calculate_dubins_path_length_node_to_point(newNode, nearNode.position)
-                    pathToNear = self._get_dubins_path(newNode, nearNode.position)
-
-            if pathToNear is None:
-                continue
+        # candidates only depend on new node, score all of them at once
+        self._score_nodes([candidateNode for nearNode, candidateNode in candidates])
 
-            # check obstacle collisions
-            collisionFree = self._is_point_reachable(newNode, nearNode, pathToNear)
+        for nearNode, candidateNode in candidates:
 
-            if not collisionFree:
-                continue
+            # an earlier rewire took the last child of near node, its edge
+            # no longer needs the final heading
+            if candidateNode.finalHeading != (nearNode.numChildren > 0):
+                candidateNode = self._get_rewire_candidate(newNode, nearNode)
+                if candidateNode is None:
+                    continue
+                self._score_nodes([candidateNode])
 
             # get current cost to near node
             nearNodeCost = self._get_cost(nearNode)
 
             # check cost to near node with candidate rewiring
-            candidateNode = self._create_node(newNode, pathLengthToNear, pathToNear)
             candidateCost = self._get_cost(candidateNode)
 
             # rewire from new node
@@ -430,15 +405,22 @@ class DubinsCarAdversarialOptimalRRT:
                 #print('rewiring {} to be the parent of {}'.format( newNode, nearNode))
                 rewire = True
                 nearNode.parent.numChildren -= 1
-                carStateAtPoint = np.array([pathToNear['x'][-1], pathToNear['y'][-1], pathToNear['theta'][-1]])
+                nearNode.parent.childList.remove(nearNode)
+                carStateAtPoint = candidateNode.edge.endPosition
                 nearNode.parent = newNode
                 nearNode._set_position(carStateAtPoint)
+                self.nodeGrid.update(nearNode.treeIndex, carStateAtPoint)
                 newNode.numChildren += 1
-                nearNode.path = pathToNear
-                nearNode.pathLength = pathLengthToNear
+                newNode.childList.add(nearNode)
+                nearNode.edge = candidateNode.edge
+                nearNode.pathLength = candidateNode.pathLength
+                nearNode.entropy = candidateNode.entropy
+                nearNode.lstmStates = candidateNode.lstmStates
+                nearNode.numStates = candidateNode.numStates
+                self._update_subtree(nearNode)
 
                 if self.animate:
-                    self._update_animation(point=nearNode.position, path=pathToNear, event='rewire', node=nearNode)
+                    self._update_animation(point=nearNode.position, path=nearNode.path, event='rewire', node=nearNode)
 
 
         return rewire
@@ -482,62 +464,67 @@ class DubinsCarAdversarialOptimalRRT:
 
     def _get_final_path_start_to_goal(self):
 
-        # build path backwards from goal to root
-        finalPath = {'x': [], 'y': [], 'theta': []}
+        # collect edges backwards from goal to root
+        edges = []
 
         for node in self.minCostGoalPath:
 
             if node.name != 'Root':
 
                 # Debug: rewiring has not been propogated to goal path  
-                if len(finalPath['x']) > 1 and abs(finalPath['x'][0]) - abs(node.path['x'][-1]) > 0.1:
+                if len(edges) > 0 and len(edges[-1]) > 1 and abs(edges[-1]['x'][0]) - abs(node.path['x'][-1]) > 0.1:
                     print('DISCONTINUITY IN FINAL PATH!')
                     sys.exit(-1)
 
-                finalPath['x'] = node.path['x'] + finalPath['x']
-                finalPath['y'] = node.path['y'] + finalPath['y']
-                finalPath['theta'] = node.path['theta'] + finalPath['theta']
+                edges.append(node.path)
 
-        return finalPath
+        # join edges root to leaf in one copy
+        return Path.concatenate(edges[::-1])
 
     def _connect_along_min_cost_path(self, point, nearestNodes, nearestNode):
 
-        minPath = None
+        minEdge = None
         minPathLength = None
         minPathStartNode = None
 
         # initialize mincost to nearest node
         minPathStartNode = nearestNode 
         minPathLength = self._calculate_dubins_path_length_node_to_point(nearestNode, point)
-        minPath = self._get_dubins_path(nearestNode, point)
+        minEdge = self._get_dubins_edge(nearestNode, point)
 
-        # get cost to new node, connecting from nearest node
-        tempNode = self._create_node(nearestNode, minPathLength, minPath)
-        minCost = self._get_cost(tempNode) 
+        # temp node connecting from nearest node, then from every reachable
+        # near node
+        tempNodes = [self._create_node(nearestNode, minPathLength, minEdge, score=False)]
 
         for node in nearestNodes:
 
-            # path from near node to new point
-            path = self._get_dubins_path(node, point)
-
-            # check obstacle collision
-            collisionFree = self._is_point_reachable(node, point, path)
+            # check obstacle collision before generating the path
+            collisionFree = self._is_point_reachable(node, point)
             if not collisionFree:
                 continue
 
-            # calculate cost to new node, connecting from near node
+            # edge from near node to new point
+            edge = self._get_dubins_edge(node, point)
+
             pathLength = self._calculate_dubins_path_length_node_to_point(node, point)
-            tempNode = self._create_node(node, pathLength, path)
+            tempNodes.append(self._create_node(node, pathLength, edge, score=False))
+
+        # cost to new node from every start node, one batched model call
+        self._score_nodes(tempNodes)
+        minCost = self._get_cost(tempNodes[0]) 
+
+        for tempNode in tempNodes[1:]:
+
             costToNewPoint = self._get_cost(tempNode)
 
             # set min path
-            if minPath is None or costToNewPoint < minCost:
-                minPath = path
-                minPathLength = pathLength
-                minPathStartNode = node
+            if minEdge is None or costToNewPoint < minCost:
+                minEdge = tempNode.edge
+                minPathLength = tempNode.pathLength
+                minPathStartNode = tempNode.parent
                 minCost = costToNewPoint
 
-        return minPath, minPathLength, minPathStartNode
+        return minEdge, minPathLength, minPathStartNode
 
     def _find_nearest_nodes_to_new_point(self, randomPoint, goal=False):
 
@@ -547,30 +534,36 @@ class DubinsCarAdversarialOptimalRRT:
         nearestNode = None
         nearestNodes = []
         
-        # search tree for nearest neighbor to new point
-        for node in self.nodeList:
-
-            euclideanDistance = abs(np.linalg.norm(node.position[:2] - randomPoint[:2]))
-
-            # ignore nodes that are too close to point or too far from point
-            if euclideanDistance < (2.0 * self.car.minTurningRadius) or euclideanDistance > self.nearestNeighborRadius:
-                continue
-
-            # get dubins optimal path and length
-            pathLength = self._calculate_dubins_path_length_node_to_point(node, randomPoint)
-
-            if pathLength < self.nearestNeighborRadius:
-                nearestNodes.append(node)
-
-            # store shortest path
-            if shortestPathLength is None or pathLength < shortestPathLength:
-                path = self._get_dubins_path(node, randomPoint)
-                shortestPathLength = pathLength
-                shortestPath = path
-                nearestNode = node
-
-                if self.animate:
-                    self._update_animation(point=randomPoint, path=shortestPath, event='candidate')
+        # euclidean distance is a lower bound on dubins length, only nodes
+        # within the neighbor radius can be near nodes
+        candidateIndices = self.nodeGrid.query_radius(randomPoint, self.nearestNeighborRadius)
+        positions = self.nodeGrid.get_positions(candidateIndices)
+        euclideanDistances = np.hypot(positions[:, 0] - randomPoint[0], positions[:, 1] - randomPoint[1])
+
+        # ignore nodes that are too close to point
+        farEnough = euclideanDistances >= (2.0 * self.car.minTurningRadius)
+        candidateIndices = candidateIndices[farEnough]
+        positions = positions[farEnough]
+
+        # score remaining candidates against new point at once
+        pathLengths, _ = batch_heading_free_path_lengths(positions, randomPoint[:2], self.car.minTurningRadius)
+        reachable = ~np.isnan(pathLengths)
+        candidateIndices = candidateIndices[reachable]
+        pathLengths = pathLengths[reachable]
+
+        nearestNodes = [self.nodeList[i] for i in candidateIndices[pathLengths < self.nearestNeighborRadius]]
+
+        # store shortest path
+        if candidateIndices.shape[0] > 0:
+            nearestIdx = candidateIndices[np.argmin(pathLengths)]
+            shortestPathLength = float(np.min(pathLengths))
+            nearestNode = self.nodeList[nearestIdx]
+
+            # paths are checked for collisions before being generated, only
+            # needed here to draw the candidate
+            if self.animate:
+                shortestPath = self._get_dubins_edge(nearestNode, randomPoint).get_path()
+                self._update_animation(point=randomPoint, path=shortestPath, event='candidate')
 
         return shortestPath, shortestPathLength, nearestNode, nearestNodes
 
@@ -584,7 +577,7 @@ class DubinsCarAdversarialOptimalRRT:
         shortestPath, shortestPathLength, nearestNode, nearestNodes = self._find_nearest_nodes_to_new_point(point, goal)
 
         # check for viable path from parent node to new point
-        isPointReachable = self._is_point_reachable(nearestNode, point, shortestPath)
+        isPointReachable = self._is_point_reachable(nearestNode, point)
 
         newNode = None
 
@@ -592,7 +585,7 @@ class DubinsCarAdversarialOptimalRRT:
         if isPointReachable:
 
             # connect along a minimum-cost path
-            minCostPath, minCostPathLength, minCostNode = self._connect_along_min_cost_path(point, nearestNodes, nearestNode)
+            minCostEdge, minCostPathLength, minCostNode = self._connect_along_min_cost_path(point, nearestNodes, nearestNode)
             
             if goal:
                 # check if this path is already in goal node list
@@ -601,13 +594,13 @@ class DubinsCarAdversarialOptimalRRT:
                         return node, None 
             
             # add node to tree/add goal node to goal node list
-            newNode = self._add_node(minCostNode, minCostPathLength, minCostPath, goal)
+            newNode = self._add_node(minCostNode, minCostPathLength, minCostEdge, goal)
 
 
             if goal:
                 return newNode, nearestNodes
             elif self.animate:
-                self._update_animation(point=point, path=minCostPath, event='valid path', node=newNode)
+                self._update_animation(point=point, path=newNode.path, event='valid path', node=newNode)
 
         elif self.animate:
             self._update_animation(point=point, path=shortestPath, event='invalid path')
@@ -618,6 +611,10 @@ class DubinsCarAdversarialOptimalRRT:
     #### RRT* ALGORITHM ####
     ########################
 
+    def _is_out_of_time(self, startTime):
+
+        return self.timeLimit is not None and (time.time() - startTime) > self.timeLimit
+
     def simulate(self):
         
         # get target
@@ -627,7 +624,8 @@ class DubinsCarAdversarialOptimalRRT:
             self.leg.remove()
         
         # ALGORITHM
-        while self.iteration < self.maxIter:
+        startTime = time.time()
+        while self.iteration < self.maxIter and not self._is_out_of_time(startTime):
 
             # extend tree
             newNode, nearestNodes = self._extend()
@@ -651,7 +649,7 @@ class DubinsCarAdversarialOptimalRRT:
         # package output path and target pair
         sample = {}
         sample['target'] = {'index': self.targetIdx }
-        sample['path'] = self._get_final_path_start_to_goal()
+        sample['path'] = self._get_final_path_start_to_goal().to_dict()
 
         if len(sample['path']['x']) <= 1:
             return None
@@ -759,12 +757,7 @@ class DubinsCarAdversarialOptimalRRT:
         if self.plottedPathToGoal is not None:
             self.plottedPathToGoal.remove()
 
-        finalPath = {'x':[], 'y':[], 'theta':[]} 
-        for path in self.pathToGoal:
-
-            finalPath['x'].extend(path['x'])
-            finalPath['y'].extend(path['y'])
-            finalPath['theta'].extend(path['theta'])
+        finalPath = Path.concatenate(self.pathToGoal)
 
         plottedGoal, plottedPathToGoal= self._draw_point_and_path(self.goal, finalPath, 'pink')
         self.plottedPathToGoal = plottedPathToGoal
@@ -18,6 +18,7 @@ sys.path.append(parentdir)
 from car_models.dubins_optimal_planner import DubinsOptimalPlanner
 from car_models.dubins_optimal_planner_final_heading_extended import DubinsOptimalPlannerFinalHeading, DubinsError
 from car_models.dubins_model import DubinsCar
+from car_models.path import Path
 from matplotlib.lines import Line2D
 from scene import Scene
 
@@ -98,7 +99,7 @@ class NodeAdvRRT:
         self.childList = ChildList()
         self.sibling = None
         self.pathLength = 0.0
-        self.path = {'x':[], 'y':[], 'theta':[]}
+        self.path = Path()
         if path is not None:
             self.path = path
             self.pathLength = pathLength
@@ -346,16 +347,16 @@ class DubinsCarAdversarialOptimalRRT:
         # sum costs from node to root
         distanceCost = node.pathLength
 
-        fullPath = node.path.copy()
+        edges = [node.path]
 
         while node.name != 'Root':
 
             node = node.parent
             distanceCost += node.pathLength
+            edges.append(node.path)
 
-            fullPath['x'] = node.path['x'] + fullPath['x'] 
-            fullPath['y'] = node.path['y'] + fullPath['y'] 
-            fullPath['theta'] = node.path['theta'] + fullPath['theta'] 
+        # edges were collected node to root, join them root to node in one copy
+        fullPath = Path.concatenate(reversed(edges))
 
         entropyCost = 0.0
         entropyCost = self._calculate_entropy(fullPath) 
@@ -405,7 +406,8 @@ class DubinsCarAdversarialOptimalRRT:
                 pathToNear = None
                 if euclideanDistance > (2.0 * self.car.minTurningRadius):
                     pathLengthToNear = self._calculate_dubins_path_length_node_to_point(newNode, nearNode.position)
-                    pathToNear = self._get_dubins_path(newNode, nearNode.position)
+                    if pathLengthToNear is not None:
+                        pathToNear = self._get_dubins_path(newNode, nearNode.position)
 
             if pathToNear is None:
                 continue
@@ -481,23 +483,22 @@ class DubinsCarAdversarialOptimalRRT:
 
     def _get_final_path_start_to_goal(self):
 
-        # build path backwards from goal to root
-        finalPath = {'x': [], 'y': [], 'theta': []}
+        # collect edges backwards from goal to root
+        edges = []
 
         for node in self.minCostGoalPath:
 
             if node.name != 'Root':
 
                 # Debug: rewiring has not been propogated to goal path  
-                if len(finalPath['x']) > 1 and abs(finalPath['x'][0]) - abs(node.path['x'][-1]) > 0.1:
+                if len(edges) > 0 and len(edges[-1]) > 1 and abs(edges[-1]['x'][0]) - abs(node.path['x'][-1]) > 0.1:
                     print('DISCONTINUITY IN FINAL PATH!')
                     sys.exit(-1)
 
-                finalPath['x'] = node.path['x'] + finalPath['x']
-                finalPath['y'] = node.path['y'] + finalPath['y']
-                finalPath['theta'] = node.path['theta'] + finalPath['theta']
+                edges.append(node.path)
 
-        return finalPath
+        # join edges root to goal in one copy
+        return Path.concatenate(reversed(edges))
 
     def _connect_along_min_cost_path(self, point, nearestNodes, nearestNode):
 
@@ -516,6 +517,11 @@ class DubinsCarAdversarialOptimalRRT:
 
         for node in nearestNodes:
 
+            # point is inside the node's turning circle
+            pathLength = self._calculate_dubins_path_length_node_to_point(node, point)
+            if pathLength is None:
+                continue
+
             # path from near node to new point
             path = self._get_dubins_path(node, point)
 
@@ -525,7 +531,6 @@ class DubinsCarAdversarialOptimalRRT:
                 continue
 
             # calculate cost to new node, connecting from near node
-            pathLength = self._calculate_dubins_path_length_node_to_point(node, point)
             tempNode = self._create_node(node, pathLength, path)
             costToNewPoint = self._get_cost(tempNode)
 
@@ -558,6 +563,10 @@ class DubinsCarAdversarialOptimalRRT:
             # get dubins optimal path and length
             pathLength = self._calculate_dubins_path_length_node_to_point(node, randomPoint)
 
+            # point is inside the node's turning circle
+            if pathLength is None:
+                continue
+
             if pathLength < self.nearestNeighborRadius:
                 nearestNodes.append(node)
 
@@ -649,7 +658,7 @@ class DubinsCarAdversarialOptimalRRT:
         # package output path and target pair
         sample = {}
         sample['target'] = {'index': self.targetIdx }
-        sample['path'] = self._get_final_path_start_to_goal()
+        sample['path'] = self._get_final_path_start_to_goal().to_dict()
 
         if len(sample['path']['x']) <= 1:
             return None
@@ -757,12 +766,7 @@ class DubinsCarAdversarialOptimalRRT:
         if self.plottedPathToGoal is not None:
             self.plottedPathToGoal.remove()
 
-        finalPath = {'x':[], 'y':[], 'theta':[]} 
-        for path in self.pathToGoal:
-
-            finalPath['x'].extend(path['x'])
-            finalPath['y'].extend(path['y'])
-            finalPath['theta'].extend(path['theta'])
+        finalPath = Path.concatenate(self.pathToGoal)
 
         plottedGoal, plottedPathToGoal= self._draw_point_and_path(self.goal, finalPath, 'pink')
         self.plottedPathToGoal = plottedPathToGoal
@@ -0,0 +1,52 @@
+# Ancestor queries on a planning tree by binary lifting. Every node keeps its
+# depth and ancestorJumps, where ancestorJumps[k] is its 2^k-th ancestor, so
+# checking whether one node is an ancestor of another takes O(log n) parent
+# jumps instead of walking to the root.
+#
+# A node's table is built from its parent's, when a node is rewired the
+# tables of its whole subtree have to be rebuilt parents first.
+
+def set_ancestor_jumps(node):
+
+    parent = node.parent
+
+    if parent is None:
+        node.depth = 0
+        node.ancestorJumps = []
+        return
+
+    node.depth = parent.depth + 1
+    jumps = [parent]
+
+    # 2^(k+1)-th ancestor is the 2^k-th ancestor of the 2^k-th ancestor
+    k = 0
+    while k < len(jumps[k].ancestorJumps):
+        jumps.append(jumps[k].ancestorJumps[k])
+        k += 1
+
+    node.ancestorJumps = jumps
+
+def get_ancestor(node, numGenerations):
+
+    # ancestor numGenerations above node, None above the root
+    if numGenerations > node.depth:
+        return None
+
+    k = 0
+    while numGenerations > 0:
+
+        if numGenerations & 1:
+            node = node.ancestorJumps[k]
+
+        numGenerations >>= 1
+        k += 1
+
+    return node
+
+def is_ancestor(ancestor, node):
+
+    # a node counts as its own ancestor
+    if ancestor.depth > node.depth:
+        return False
+
+    return get_ancestor(node, node.depth - ancestor.depth) is ancestor
@@ -0,0 +1,89 @@
+# Singly linked list of a tree node's children, threaded through the
+# children's sibling pointers so no extra containers are allocated per node.
+# Nodes are compared by identity, temporary nodes share the name 'Temp'.
+
+class ChildList:
+
+    def __init__(self, firstChild=None):
+
+        self.head = firstChild
+        self.tail = firstChild
+
+    def is_empty(self):
+
+        return self.head is None
+
+    def is_in_child_list(self, node):
+
+        n = self.head
+
+        while n is not None:
+
+            if n is node:
+                return True
+            n = n.sibling
+
+        return False
+
+    def remove(self, nodeToRemove):
+
+        previous = None
+        n = self.head
+
+        while n is not None and n is not nodeToRemove:
+
+            previous = n
+            n = n.sibling
+
+        # not a child
+        if n is None:
+            return None
+
+        if previous is None:
+            self.head = n.sibling
+        else:
+            previous.sibling = n.sibling
+
+        if self.tail is n:
+            self.tail = previous
+
+        n.sibling = None
+
+        return n
+
+    def add(self, nodeToAdd):
+
+        nodeToAdd.sibling = None
+
+        if self.tail is None:
+            self.head = nodeToAdd
+        else:
+            self.tail.sibling = nodeToAdd
+        self.tail = nodeToAdd
+
+        return nodeToAdd
+
+    def as_list(self):
+
+        childList = []
+
+        n = self.head
+
+        while n is not None:
+
+            childList.append(n)
+            n = n.sibling
+
+        return childList
+
+    def __iter__(self):
+
+        # next sibling is read before yielding so a child can be moved
+        # to another list while iterating
+        n = self.head
+
+        while n is not None:
+
+            nextSibling = n.sibling
+            yield n
+            n = nextSibling
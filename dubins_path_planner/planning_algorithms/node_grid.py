@@ -0,0 +1,120 @@
+import math
+import numpy as np
+
+# Uniform grid over the (x, y) positions of rrt tree nodes. Nodes are
+# identified by the index returned from insert, which matches their position
+# in the planner's nodeList. Poses are kept in one contiguous array so
+# candidates can be handed straight to the batched dubins kernels.
+class NodeGrid:
+
+    def __init__(self, cellSize, initialCapacity=1024):
+
+        self.cellSize = cellSize
+        self.positions = np.zeros((initialCapacity, 3))
+        self.numNodes = 0
+        self.cells = {}
+        self.nodeCells = []
+
+    def __len__(self):
+
+        return self.numNodes
+
+    def _get_cell(self, position):
+
+        return (int(math.floor(position[0] / self.cellSize)), int(math.floor(position[1] / self.cellSize)))
+
+    def insert(self, position):
+
+        # double storage when full so inserts stay amortized O(1)
+        if self.numNodes == self.positions.shape[0]:
+            self.positions = np.concatenate([self.positions, np.zeros_like(self.positions)])
+
+        idx = self.numNodes
+        self.positions[idx] = position[:3]
+
+        cell = self._get_cell(position)
+        self.cells.setdefault(cell, []).append(idx)
+        self.nodeCells.append(cell)
+        self.numNodes += 1
+
+        return idx
+
+    def update(self, idx, position):
+
+        # node moved, eg. after rewiring with a final heading
+        self.positions[idx] = position[:3]
+
+        cell = self._get_cell(position)
+        oldCell = self.nodeCells[idx]
+        if cell == oldCell:
+            return
+
+        self.cells[oldCell].remove(idx)
+        if len(self.cells[oldCell]) == 0:
+            del self.cells[oldCell]
+
+        self.cells.setdefault(cell, []).append(idx)
+        self.nodeCells[idx] = cell
+
+    def get_positions(self, indices=None):
+
+        if indices is None:
+            return self.positions[:self.numNodes]
+
+        return self.positions[indices]
+
+    def _get_indices_in_cells(self, xRange, yRange):
+
+        indices = []
+        for i in xRange:
+            for j in yRange:
+                indices.extend(self.cells.get((i, j), []))
+
+        return np.array(indices, dtype=int)
+
+    def _get_distances(self, point, indices):
+
+        positions = self.positions[indices]
+
+        return np.hypot(positions[:, 0] - point[0], positions[:, 1] - point[1])
+
+    def query_radius(self, point, radius):
+
+        # indices of nodes within radius of point, in insertion order
+        xMin, yMin = self._get_cell((point[0] - radius, point[1] - radius))
+        xMax, yMax = self._get_cell((point[0] + radius, point[1] + radius))
+
+        indices = self._get_indices_in_cells(range(xMin, xMax + 1), range(yMin, yMax + 1))
+        if indices.shape[0] == 0:
+            return indices
+
+        indices = indices[self._get_distances(point, indices) <= radius]
+
+        return np.sort(indices)
+
+    def query_k_nearest(self, point, k):
+
+        # indices of the k nodes nearest to point, nearest first
+        k = min(k, self.numNodes)
+        if k == 0:
+            return np.zeros(0, dtype=int)
+
+        xCenter, yCenter = self._get_cell(point)
+        ring = 0
+
+        while True:
+
+            # every node outside the searched square is at least ring cells away
+            xRange = range(xCenter - ring, xCenter + ring + 1)
+            yRange = range(yCenter - ring, yCenter + ring + 1)
+            indices = self._get_indices_in_cells(xRange, yRange)
+
+            if indices.shape[0] >= k:
+
+                distances = self._get_distances(point, indices)
+                order = np.argsort(distances, kind='stable')[:k]
+
+                if distances[order[-1]] <= ring * self.cellSize or indices.shape[0] == self.numNodes:
+                    return indices[order]
+
+            ring += 1
@@ -12,17 +12,22 @@ currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
-from car_models.dubins_optimal_planner import DubinsOptimalPlanner
-from car_models.dubins_optimal_planner_final_heading_extended import DubinsOptimalPlannerFinalHeading, DubinsError
 from car_models.dubins_model import DubinsCar
+from car_models.path import Path
+from car_models.dubins_distance import batch_heading_free_path_lengths
+from car_models.dubins_cache import DubinsQueryCache
+from car_models.dubins_edge import get_heading_free_edge, get_final_heading_edge
+from planning_algorithms.node_grid import NodeGrid
+from planning_algorithms.child_list import ChildList
 from matplotlib.lines import Line2D
 from scene import Scene
+from collision_checker import is_path_collision_free, is_dubins_path_collision_free
 
 class DubinsCarOptimalRRT:
 
     class NodeRRT:
 
-        def __init__(self, position, pathLength=None, path=None, name=None):
+        def __init__(self, position, pathLength=None, edge=None, name=None):
 
             self.x = position[0] 
             self.y = position[1] 
@@ -30,13 +35,25 @@ class DubinsCarOptimalRRT:
             self.position = position
             self.parent = None
             self.numChildren = 0
+            self.childList = ChildList()
+            self.sibling = None
             self.pathLength = 0.0
-            self.path = {'x':[], 'y':[], 'theta':[]}
-            if path is not None:
-                self.path = path
+            # cost-to-come from root, kept up to date on rewires
+            self.cost = 0.0
+            self.edge = None
+            if edge is not None:
+                self.edge = edge
                 self.pathLength=pathLength
             self.plottedPath= None
             self.name=name
+            self.treeIndex = None
+
+        @property
+        def path(self):
+            # edge geometry is only sampled when needed
+            if self.edge is None:
+                return Path()
+            return self.edge.get_path()
 
         def _set_position(self, position):
             self.x = position[0] 
@@ -55,7 +72,7 @@ class DubinsCarOptimalRRT:
             return rep
             
 
-    def __init__(self, dubinsCar, scene, animate = False, targetIdx = None):
+    def __init__(self, dubinsCar, scene, animate = False, targetIdx = None, cachePaths = False, dubinsCacheSize = 4096):
 
         # tree primitives
         self.car = dubinsCar
@@ -66,6 +83,17 @@ class DubinsCarOptimalRRT:
         self.minCostGoalPath = []
         self.scene = scene
         self.nearestNeighborRadius = 6.0
+
+        # keep sampled edge paths on the nodes instead of regenerating them
+        self.cachePaths = cachePaths
+
+        # repeated length and edge queries between the same poses, see
+        # dubinsCache.hits and dubinsCache.misses
+        self.dubinsCache = DubinsQueryCache(dubinsCacheSize)
+
+        # spatial index over tree node positions
+        self.nodeGrid = NodeGrid(self.nearestNeighborRadius)
+        self.root.treeIndex = self.nodeGrid.insert(self.root.position)
         self.iteration = 0
         self.targetIdx = targetIdx
 
@@ -79,6 +107,8 @@ class DubinsCarOptimalRRT:
         self.fig = None
         self.ax = None
         self.maxIter = 250 
+        # wall-clock budget in seconds, the best path so far is returned
+        self.timeLimit = None
         self.leg=None
         if self.animate:
             self._setup_animation()
@@ -103,122 +133,71 @@ class DubinsCarOptimalRRT:
 
         return randomPoint
 
-    def _is_path_out_of_bounds(self, x, y):
-
-        if x > self.scene.dimensions['xmax']\
-                or x < self.scene.dimensions['xmin']\
-                or y > self.scene.dimensions['ymax']\
-                or y < self.scene.dimensions['ymin']:
-                    return True
-        return False
-
-    def _is_point_reachable(self, originNode, destinationPoint, path=None):
+    def _is_point_reachable(self, originNode, destinationPoint, path=None, finalHeading=False):
 
         if originNode == None:
             return False
 
-        # checking if target is reachable
-        if path is None:
-            path = self._get_path_from_node_to_point(originNode, destinationPoint)
-            if path is None:
-                return False
-        
-        i = 0
-        # check for obstacle collisions
-        for x,y in zip(path['x'], path['y']):
-            point = np.array([x,y])
+        # check an already generated path for obstacle collisions and leaving the scene
+        if path is not None:
+            return is_path_collision_free(path, self.scene.obstacleArray, self.scene.dimensions)
 
-            if i % 10 == 0:
-
-                if self._is_path_out_of_bounds(x, y):
-                    return False
+        # otherwise check the dubins path exactly, before generating it
+        if finalHeading:
+            edge = self._get_dubins_edge_final_heading(originNode, destinationPoint)
+        else:
+            if abs(np.linalg.norm(originNode.position[:2] - destinationPoint[:2])) < (2.0 * self.car.minTurningRadius):
+                return False
+            edge = self._get_dubins_edge(originNode, destinationPoint)
 
-                # invalid path if point collides with obstacle
-                for obstacle in self.scene.obstacles:
-                    if abs(np.linalg.norm(point - obstacle[:2])) < obstacle[2]:
-                        return False
-            i += 1
+        return self._is_edge_collision_free(edge)
 
-        return True
+    def _is_edge_collision_free(self, edge):
 
-    def _get_path_from_node_to_point(self, startNode, destinationPoint):
+        if edge is None:
+            return False
 
-        if abs(np.linalg.norm(startNode.position[:2] - destinationPoint[:2])) < (2.0 * self.car.minTurningRadius):
-            return None 
+        return is_dubins_path_collision_free(edge.startPosition, edge.word, edge.params, edge.turningRadius,
+                self.scene.obstacleArray, self.scene.dimensions)
 
-        dubinsState = np.array([startNode.x, startNode.y, startNode.theta])
-        self.car.set_state(dubinsState)
-        planner = DubinsOptimalPlanner(self.car, dubinsState, destinationPoint)
-        path = planner.run()
+    def _get_dubins_edge(self, originNode, destinationPoint):
 
-        return path
+        # dubins parameters only, the path is sampled on demand
+        stepSize = self.car.velocity * self.car.dt
 
-    def _get_dubins_path(self, originNode, destinationPoint):
- 
-        # re-initialize dubins car to be at origin node
-        dubinsState = originNode.position 
-        self.car.set_state(dubinsState)
+        return get_heading_free_edge(originNode.position, destinationPoint, self.car.minTurningRadius, stepSize, self.cachePaths, self.dubinsCache)
 
-        # instantiate optimal planner
-        planner = DubinsOptimalPlanner(self.car, dubinsState, destinationPoint)
+    def _get_dubins_edge_final_heading(self, originNode, destinationPoint):
 
-        # get optimal path produced by planner
-        path = planner.run()
+        stepSize = self.car.velocity * self.car.dt
 
-        return path
+        return get_final_heading_edge(originNode.position, destinationPoint, self.car.minTurningRadius, stepSize, self.cachePaths, self.dubinsCache)
    
     def _calculate_dubins_path_length(self, originNode, destinationPoint):
 
-        # re-initialize dubins car to be at origin node
-        dubinsState = originNode.position 
-        self.car.set_state(dubinsState)
-
-        # instantiate optimal planner
-        planner = DubinsOptimalPlanner(self.car, dubinsState, destinationPoint)
-
-        # get optimal pathlength produced by planner
-        pathLength = planner.calculate_shortest_pathlength()
-
-        return pathLength
+        # closed form length, no car is steered
+        return self.dubinsCache.heading_free_path_length(originNode.position, destinationPoint, self.car.minTurningRadius)
 
     def _calculate_dubins_path_length_final_heading(self, originNode, destinationPoint):
 
-        dubinsState = originNode.position
-        self.car.set_state(dubinsState)
-
-        planner = DubinsOptimalPlannerFinalHeading(self.car, dubinsState, destinationPoint)
-        
-        """
-        # don't care about short path case
-        except DubinsError:
-            print('short path case')
-            continue
-        """
-
-        path = planner.run()
-        # planner will return None if a path cannot be calculated
-        if path is None:
-            return None, None
-        
-        pathLength = planner.totalDistanceTraveled
-        #pathLength = planner.linearDistanceTraveled + planner.firstCurveDistanceTraveled +planner.secondCurveDistanceTraveled
+        return self.dubinsCache.dubins_path_length(originNode.position, destinationPoint, self.car.minTurningRadius)
 
-        return path, pathLength
+    def _add_node(self, startNode, shortestPathLength, shortestEdge, goal=False):
 
-    def _add_node(self, startNode, shortestPathLength, shortestPath, goal=False):
-
-        carStateAtPoint = np.array([shortestPath['x'][-1], shortestPath['y'][-1], shortestPath['theta'][-1]])
+        carStateAtPoint = shortestEdge.endPosition
         
-        nodeToAdd = self.NodeRRT(carStateAtPoint, shortestPathLength, shortestPath)
+        nodeToAdd = self.NodeRRT(carStateAtPoint, shortestPathLength, shortestEdge)
         startNode.numChildren += 1
+        startNode.childList.add(nodeToAdd)
         nodeToAdd.parent = startNode
-        nodeToAdd.path = shortestPath
+        nodeToAdd.cost = startNode.cost + shortestPathLength
 
         if goal:
             nodeToAdd.name = 'Goal {}'.format(len(self.goalNodeList)) 
             self.goalNodeList.append(nodeToAdd)
         else:
             nodeToAdd.name = '{}'.format(len(self.nodeList)) 
+            nodeToAdd.treeIndex = self.nodeGrid.insert(nodeToAdd.position)
             self.nodeList.append(nodeToAdd)
             
         return nodeToAdd
@@ -227,27 +206,33 @@ class DubinsCarOptimalRRT:
 
         minPathStartNode = nearestNode 
         minPathLength = self._calculate_dubins_path_length(nearestNode, point)
-        minPath = self._get_dubins_path(nearestNode, point)
+        minEdge = self._get_dubins_edge(nearestNode, point)
         minCost = self._get_cost(nearestNode) + minPathLength 
 
         for node in nearestNodes:
 
             pathLength = self._calculate_dubins_path_length(node, point)
-            path = self._get_dubins_path(node, point)
+            if pathLength is None:
+                continue
+
+            # only collision check edges that would lower the cost
+            costToNewPoint = self._get_cost(node) + pathLength
+            if minEdge is not None and costToNewPoint >= minCost:
+                continue
 
-            collisionFree = self._is_point_reachable(node, point, path)
+            collisionFree = self._is_point_reachable(node, point)
             if not collisionFree:
                 continue
 
-            costToNewPoint = self._get_cost(node) + pathLength
+            edge = self._get_dubins_edge(node, point)
 
-            if minPath is None or costToNewPoint < minCost:
-                minPath = path
+            if minEdge is None or costToNewPoint < minCost:
+                minEdge = edge
                 minPathLength = pathLength
                 minPathStartNode = node
                 minCost = costToNewPoint
 
-        return minPath, minPathLength, minPathStartNode
+        return minEdge, minPathLength, minPathStartNode
 
     def _find_nearest_nodes_to_new_point(self, randomPoint):
 
@@ -257,32 +242,36 @@ class DubinsCarOptimalRRT:
         nearestNode = None
         nearestNodes = []
         
-        # search tree for nearest neighbor to new point
-        for node in self.nodeList:
-
-            euclideanDistance = abs(np.linalg.norm(node.position[:2] - randomPoint[:2]))
-
-            # ignore nodes that are too close to point or too far from point
-            if euclideanDistance < (2.0 * self.car.minTurningRadius) or euclideanDistance > self.nearestNeighborRadius:
-                continue
-
-            # get dubins optimal path and length
-            pathLength = self._calculate_dubins_path_length(node, randomPoint)
-
-            # only care about long path case
-            if pathLength < self.nearestNeighborRadius:# and (euclideanDistance / self.car.minTurningRadius) >= 4.0 * self.car.minTurningRadius:
-                nearestNodes.append(node)
-
-            # store shortest path
-            if shortestPathLength is None or pathLength < shortestPathLength:
-
-                path = self._get_dubins_path(node, randomPoint)
-                shortestPathLength = pathLength
-                shortestPath = path
-                nearestNode = node
-
-                if self.animate:
-                    self._update_animation(point=randomPoint, path=shortestPath, event='candidate')
+        # euclidean distance is a lower bound on dubins length, only nodes
+        # within the neighbor radius can be near nodes
+        candidateIndices = self.nodeGrid.query_radius(randomPoint, self.nearestNeighborRadius)
+        positions = self.nodeGrid.get_positions(candidateIndices)
+        euclideanDistances = np.hypot(positions[:, 0] - randomPoint[0], positions[:, 1] - randomPoint[1])
+
+        # ignore nodes that are too close to point
+        farEnough = euclideanDistances >= (2.0 * self.car.minTurningRadius)
+        candidateIndices = candidateIndices[farEnough]
+        positions = positions[farEnough]
+
+        # score remaining candidates against new point at once
+        pathLengths, _ = batch_heading_free_path_lengths(positions, randomPoint[:2], self.car.minTurningRadius)
+        reachable = ~np.isnan(pathLengths)
+        candidateIndices = candidateIndices[reachable]
+        pathLengths = pathLengths[reachable]
+
+        nearestNodes = [self.nodeList[i] for i in candidateIndices[pathLengths < self.nearestNeighborRadius]]
+
+        # store shortest path
+        if candidateIndices.shape[0] > 0:
+            nearestIdx = candidateIndices[np.argmin(pathLengths)]
+            shortestPathLength = float(np.min(pathLengths))
+            nearestNode = self.nodeList[nearestIdx]
+
+            # paths are checked for collisions before being generated, only
+            # needed here to draw the candidate
+            if self.animate:
+                shortestPath = self._get_dubins_edge(nearestNode, randomPoint).get_path()
+                self._update_animation(point=randomPoint, path=shortestPath, event='candidate')
 
         return shortestPath, shortestPathLength, nearestNode, nearestNodes
 
@@ -295,7 +284,7 @@ class DubinsCarOptimalRRT:
         shortestPath, shortestPathLength, nearestNode, nearestNodes = self._find_nearest_nodes_to_new_point(point)
 
         # check for viable path from parent node to new point
-        isPointReachable = self._is_point_reachable(nearestNode, point, shortestPath)
+        isPointReachable = self._is_point_reachable(nearestNode, point)
 
         newNode = None
 
@@ -303,7 +292,7 @@ class DubinsCarOptimalRRT:
         if isPointReachable:
 
             # connect along a minimum-cost path
-            minCostPath, minCostPathLength, minCostNode = self._connect_along_min_cost_path(point, nearestNodes, nearestNode)
+            minCostEdge, minCostPathLength, minCostNode = self._connect_along_min_cost_path(point, nearestNodes, nearestNode)
             
             if goal:
                 # check if this path is already in goal node list
@@ -312,12 +301,12 @@ class DubinsCarOptimalRRT:
                         return node, None 
             
             # add node to tree/add goal node to goal node list
-            newNode = self._add_node(minCostNode, minCostPathLength, minCostPath, goal)
+            newNode = self._add_node(minCostNode, minCostPathLength, minCostEdge, goal)
 
             if goal:
                 return newNode, nearestNodes
             elif self.animate:
-                self._update_animation(point=point, path=minCostPath, event='valid path', node=newNode)
+                self._update_animation(point=point, path=newNode.path, event='valid path', node=newNode)
 
         elif self.animate:
             self._update_animation(point=point, path=shortestPath, event='invalid path')
@@ -325,16 +314,20 @@ class DubinsCarOptimalRRT:
         return newNode, nearestNodes
 
     def _get_cost(self, node):
-        
-        # sum costs from node to root
-        cost = node.pathLength
 
-        while node.name != 'Root':
+        # cached cost-to-come, see _propagate_cost
+        return node.cost
 
-            node = node.parent
-            cost += node.pathLength
+    def _propagate_cost(self, node):
+
+        # update cost-to-come of node and its whole subtree after a rewire
+        stack = [node]
 
-        return cost
+        while len(stack) > 0:
+
+            n = stack.pop()
+            n.cost = n.parent.cost + n.pathLength
+            stack.extend(n.childList)
 
     def _rewire(self, newNode, nearestNodes):
 
@@ -350,33 +343,45 @@ class DubinsCarOptimalRRT:
             nearNodeCost = self._get_cost(nearNode)
 
             # Only consider heading for rewiring to non leaf nodes
+            pathLengthToNear = None
             if nearNode.numChildren > 0:
-                pathToNear, pathLengthToNear = self._calculate_dubins_path_length_final_heading(newNode, nearNode.position)
+                pathLengthToNear = self._calculate_dubins_path_length_final_heading(newNode, nearNode.position)
             else:
                 euclideanDistance = abs(np.linalg.norm(newNode.position[:2] - nearNode.position[:2]))
-                pathToNear = None
                 if euclideanDistance > (2.0 * self.car.minTurningRadius):
                     pathLengthToNear = self._calculate_dubins_path_length(newNode, nearNode.position)
-                    pathToNear = self._get_dubins_path(newNode, nearNode.position)
 
-            if pathToNear is None:
+            # only generate paths for rewires that would lower the cost
+            if pathLengthToNear is None or (newNodeCost + pathLengthToNear) >= nearNodeCost:
+                continue
+
+            # check obstacle collisions before generating the path
+            collisionFree = self._is_point_reachable(newNode, nearNode.position, finalHeading=(nearNode.numChildren > 0))
+            if not collisionFree:
                 continue
 
-            collisionFree = self._is_point_reachable(newNode, nearNode, pathToNear)
+            if nearNode.numChildren > 0:
+                edgeToNear = self._get_dubins_edge_final_heading(newNode, nearNode.position)
+            else:
+                edgeToNear = self._get_dubins_edge(newNode, nearNode.position)
 
-            if (newNodeCost + pathLengthToNear) < nearNodeCost and collisionFree:
+            if edgeToNear is not None:
 
                 rewire = True
                 nearNode.parent.numChildren -= 1
-                carStateAtPoint = np.array([pathToNear['x'][-1], pathToNear['y'][-1], pathToNear['theta'][-1]])
+                nearNode.parent.childList.remove(nearNode)
+                carStateAtPoint = edgeToNear.endPosition
                 nearNode.parent = newNode
                 nearNode._set_position(carStateAtPoint)
+                self.nodeGrid.update(nearNode.treeIndex, carStateAtPoint)
                 newNode.numChildren += 1
-                nearNode.path = pathToNear
+                newNode.childList.add(nearNode)
+                nearNode.edge = edgeToNear
                 nearNode.pathLength = pathLengthToNear
+                self._propagate_cost(nearNode)
 
                 if self.animate:
-                    self._update_animation(point=nearNode.position, path=pathToNear, event='rewire', node=nearNode)
+                    self._update_animation(point=nearNode.position, path=nearNode.path, event='rewire', node=nearNode)
 
         return rewire
 
@@ -430,24 +435,27 @@ class DubinsCarOptimalRRT:
 
     def _get_final_path_start_to_goal(self):
 
-        finalPath = {'x': [], 'y': [], 'theta': []}
+        edges = []
 
         for node in self.minCostGoalPath:
             if node.name != 'Root':
-                if len(finalPath['x']) > 1 and abs(finalPath['x'][0]) - abs(node.path['x'][-1]) > 0.1:
+                if len(edges) > 0 and len(edges[-1]) > 1 and abs(edges[-1]['x'][0]) - abs(node.path['x'][-1]) > 0.1:
                     print('DISCONTINUITY IN FINAL PATH!')
                     sys.exit(-1)
 
-                finalPath['x'] = node.path['x'] + finalPath['x']
-                finalPath['y'] = node.path['y'] + finalPath['y']
-                finalPath['theta'] = node.path['theta'] + finalPath['theta']
+                edges.append(node.path)
 
-        return finalPath
+        # edges were collected leaf to root, join them root to leaf in one copy
+        return Path.concatenate(edges[::-1])
 
     ########################
     #### RRT* ALGORITHM ####
     ########################
 
+    def _is_out_of_time(self, startTime):
+
+        return self.timeLimit is not None and (time.time() - startTime) > self.timeLimit
+
     def simulate(self):
         
         target, targetIdx = self._select_random_target()
@@ -458,7 +466,8 @@ class DubinsCarOptimalRRT:
             self.leg.remove()
         
         self.iteration = 0
-        while self.iteration < self.maxIter:
+        startTime = time.time()
+        while self.iteration < self.maxIter and not self._is_out_of_time(startTime):
 
             # extend tree
             newNode, nearestNodes = self._extend()
@@ -475,7 +484,7 @@ class DubinsCarOptimalRRT:
 
         sample = {}
         sample['target'] = {'coordinates': target, 'index': targetIdx }
-        sample['path'] = self._get_final_path_start_to_goal()
+        sample['path'] = self._get_final_path_start_to_goal().to_dict()
         if len(sample['path']['x']) <= 1:
             return None
 
@@ -578,12 +587,7 @@ class DubinsCarOptimalRRT:
         if self.plottedPathToGoal is not None:
             self.plottedPathToGoal.remove()
 
-        finalPath = {'x':[], 'y':[], 'theta':[]} 
-        for path in self.pathToGoal:
-
-            finalPath['x'].extend(path['x'])
-            finalPath['y'].extend(path['y'])
-            finalPath['theta'].extend(path['theta'])
+        finalPath = Path.concatenate(self.pathToGoal)
 
         plottedGoal, plottedPathToGoal= self._draw_point_and_path(self.goal, finalPath, 'pink')
         self.plottedPathToGoal = plottedPathToGoal
@@ -16,7 +16,7 @@ def check_valid_start(scene, startPosition):
 
     return True
 
-def run_RRT(animate=False, sceneName='test_scene', it = 0):
+def run_RRT(animate=False, sceneName='test_scene', it = 0, maxIter=None, timeLimit=None):
 
     # load scene information
     scene = Scene(sceneName)
@@ -47,6 +47,11 @@ def run_RRT(animate=False, sceneName='test_scene', it = 0):
     rrtSimulator = DubinsCarRRT(dubinsCar, scene, animate=animate)
     rrtSimulator.imgcount = it
 
+    # optional iteration and wall-clock budgets
+    if maxIter is not None:
+        rrtSimulator.maxIter = maxIter
+    rrtSimulator.timeLimit = timeLimit
+
     # run RRT algorithm and get final path from car start to target
     sample = rrtSimulator.simulate()
 
@@ -13,12 +13,31 @@ currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
-from classifiers.lstm import LSTM
+from classifiers.numpy_lstm import NumpyLSTM
 
-def get_model(sceneName):
+def get_model(sceneName, precision=None):
 
-    model = LSTM()
     weightsFile = '..\\data\\{}_dataset\\optimal_rrt_lstm_weights_planner\\lstm_final_weights'.format(sceneName)
+
+    # confidence grid written by lookup_table/create_lookup_table.py, looked
+    # up instead of running the network
+    if precision == 'lookup':
+        from lookup_table.confidence_field import ConfidenceField
+        return ConfidenceField.load('..\\data\\{}_dataset\\optimal_rrt_lstm_weights_planner\\lstm_confidence_field.npz'.format(sceneName))
+
+    # reduced precision model written by classifiers/quantize_classifiers.py
+    if precision is not None:
+        from classifiers.tflite_classifiers import TFLiteLSTM
+        return TFLiteLSTM('{}_{}.tflite'.format(weightsFile, precision))
+
+    # numpy engine exported by classifiers/export_numpy_lstm.py, tensorflow
+    # is only imported for the keras model
+    if os.path.exists(weightsFile + '.npz'):
+        return NumpyLSTM.load(weightsFile + '.npz')
+
+    from classifiers.lstm import LSTM
+
+    model = LSTM()
     model.load_weights(weightsFile)
 
     return model
@@ -31,7 +50,7 @@ def check_valid_start(scene, startPosition):
                 return False
     return True
 
-def run_adversarial_optimal_RRT(animate=False, sceneName='test_scene', model=None):
+def run_adversarial_optimal_RRT(animate=False, sceneName='test_scene', model=None, maxIter=None, timeLimit=None, precision=None):
 
     # load scene information
     scene = Scene(sceneName)
@@ -60,11 +79,16 @@ def run_adversarial_optimal_RRT(animate=False, sceneName='test_scene', model=Non
 
     if model is None:
         # configure classifier
-        model = get_model(sceneName)
+        model = get_model(sceneName, precision)
 
     # create simulator
     optimalRRTSimulator = DubinsCarAdversarialOptimalRRT(dubinsCar, scene, model, animate=animate)
 
+    # optional iteration and wall-clock budgets
+    if maxIter is not None:
+        optimalRRTSimulator.maxIter = maxIter
+    optimalRRTSimulator.timeLimit = timeLimit
+
     # run RRT algorithm and get final path from car start to target
     sample = optimalRRTSimulator.simulate()
 
@@ -74,10 +98,13 @@ if __name__ == '__main__':
     
     sceneName= 'tower_defense'
     animate = False 
+    precision = None
 
     if len(sys.argv) > 1:
         for arg in sys.argv[1:]:
-            if arg != 'animate':
+            if arg in ('float32', 'float16', 'int8', 'lookup'):
+                precision = arg
+            elif arg != 'animate':
                 sceneName = arg
 
     if len(sys.argv) > 2:
@@ -93,7 +120,7 @@ if __name__ == '__main__':
         random.seed(seed)
         np.random.seed(seed)
 
-        cProfile.run('run_adversarial_optimal_RRT(animate, sceneName)')
+        cProfile.run('run_adversarial_optimal_RRT(animate, sceneName, precision=precision)')
         exit(1)
 
         if sample is None:
@@ -17,7 +17,7 @@ def check_valid_start(scene, startPosition):
                 return False
     return True
 
-def run_optimal_RRT(animate=False, sceneName='test_scene', target=None):
+def run_optimal_RRT(animate=False, sceneName='test_scene', target=None, maxIter=None, timeLimit=None):
 
     # load scene information
     scene = Scene(sceneName)
@@ -47,6 +47,11 @@ def run_optimal_RRT(animate=False, sceneName='test_scene', target=None):
     # create simulator
     optimalRRTSimulator = DubinsCarOptimalRRT(dubinsCar, scene, animate=animate, targetIdx=target)
 
+    # optional iteration and wall-clock budgets
+    if maxIter is not None:
+        optimalRRTSimulator.maxIter = maxIter
+    optimalRRTSimulator.timeLimit = timeLimit
+
     # run RRT algorithm and get final path from car start to target
     sample = optimalRRTSimulator.simulate()
 
@@ -11,6 +11,7 @@ class Scene:
         self.name = sceneName.replace('_', ' ')
         self.targets = []
         self.obstacles = []
+        self.obstacleArray = np.array(self.obstacles, dtype=float).reshape(-1, 3)
         self.dimensions = {'xmin': 0.0, 'ymin': 0.0, 'xmax': 0.0, 'ymax': 0.0}
         self.carStart = None
         if self.name is not None:
@@ -38,6 +39,9 @@ class Scene:
             o = [obstacle['x'], obstacle['y'], obstacle['radius']]
             self.obstacles.append(o)
 
+        # obstacles as one (K, 3) array for the collision checker
+        self.obstacleArray = np.array(self.obstacles, dtype=float).reshape(-1, 3)
+
         self.carStart = np.array([jsonScene['car']['x'], jsonScene['car']['y'], jsonScene['car']['theta']])
 
         self.dimensions = jsonScene['dimensions']
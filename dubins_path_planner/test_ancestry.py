@@ -0,0 +1,80 @@
+import random
+import numpy as np
+from planning_algorithms.ancestry import set_ancestor_jumps, get_ancestor, is_ancestor
+from planning_algorithms.child_list import ChildList
+
+class Node:
+
+    def __init__(self, parent=None):
+
+        self.parent = parent
+        self.childList = ChildList()
+        self.sibling = None
+        if parent is not None:
+            parent.childList.add(self)
+        set_ancestor_jumps(self)
+
+def is_ancestor_by_walking(ancestor, node):
+
+    while node is not None:
+        if node is ancestor:
+            return True
+        node = node.parent
+
+    return False
+
+def update_subtree(node):
+
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        set_ancestor_jumps(n)
+        stack.extend(n.childList)
+
+def test_matches_parent_walk(numNodes=300, numRewires=300):
+
+    nodes = [Node()]
+    for i in range(numNodes - 1):
+        nodes.append(Node(random.choice(nodes)))
+
+    for i in range(numRewires):
+
+        # move a random subtree under a node outside of it
+        node = random.choice(nodes[1:])
+        newParent = random.choice(nodes)
+        if is_ancestor_by_walking(node, newParent):
+            continue
+
+        node.parent.childList.remove(node)
+        node.parent = newParent
+        newParent.childList.add(node)
+        update_subtree(node)
+
+        for j in range(20):
+            a, b = random.choice(nodes), random.choice(nodes)
+            assert is_ancestor(a, b) == is_ancestor_by_walking(a, b), 'Ancestor check disagrees with parent walk'
+
+    for node in nodes:
+        assert get_ancestor(node, node.depth) is nodes[0], 'Root is not the deepest ancestor'
+        assert get_ancestor(node, node.depth + 1) is None, 'Found ancestor above root'
+
+def test_chain():
+
+    nodes = [Node()]
+    for i in range(100):
+        nodes.append(Node(nodes[-1]))
+
+    assert nodes[-1].depth == 100, 'Wrong depth'
+    assert get_ancestor(nodes[-1], 37) is nodes[63], 'Wrong ancestor'
+    assert is_ancestor(nodes[5], nodes[5]), 'Node should be its own ancestor'
+    assert not is_ancestor(nodes[6], nodes[5]), 'Descendant reported as ancestor'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_matches_parent_walk()
+    test_chain()
+
+    print('passed all tests!')
@@ -0,0 +1,82 @@
+import math
+import random
+import numpy as np
+from car_models.dubins_model import DubinsCar
+from planning_algorithms.child_list import ChildList
+from planning_algorithms.optimal_RRT import DubinsCarOptimalRRT
+from scene import Scene
+
+class Node:
+
+    def __init__(self, name):
+
+        self.name = name
+        self.sibling = None
+
+def test_add_and_remove():
+
+    nodes = [Node(i) for i in range(5)]
+    childList = ChildList()
+    assert childList.is_empty(), 'New child list is not empty'
+
+    for node in nodes:
+        childList.add(node)
+    assert childList.as_list() == nodes, 'Children out of order'
+
+    # head, middle and tail
+    childList.remove(nodes[0])
+    childList.remove(nodes[2])
+    childList.remove(nodes[4])
+    assert childList.as_list() == [nodes[1], nodes[3]], 'Wrong children after remove'
+    assert not childList.is_in_child_list(nodes[2]), 'Removed child still in list'
+    assert childList.is_in_child_list(nodes[1]), 'Head child not found'
+    assert childList.remove(nodes[0]) is None, 'Removed a node that is not a child'
+
+    # tail is still valid after removing the old tail
+    childList.add(nodes[4])
+    assert childList.as_list() == [nodes[1], nodes[3], nodes[4]], 'Wrong children after re-adding'
+
+    childList.remove(nodes[1])
+    childList.remove(nodes[3])
+    childList.remove(nodes[4])
+    assert childList.is_empty(), 'Child list should be empty'
+    childList.add(nodes[0])
+    assert list(childList) == [nodes[0]], 'Wrong child after emptying list'
+
+def get_cost_to_root(node):
+
+    cost = node.pathLength
+
+    while node.name != 'Root':
+        node = node.parent
+        cost += node.pathLength
+
+    return cost
+
+def test_cached_costs_match_tree():
+
+    scene = Scene('cluttered_room')
+    scene.carStart = np.array([-9.0, -9.0, 0.25 * math.pi])
+
+    U = [-1.0 * math.tan(math.pi / 4.0), math.tan(math.pi / 4.0)]
+    dubinsCar = DubinsCar(scene.carStart, 1.0, U, dt=0.01)
+
+    planner = DubinsCarOptimalRRT(dubinsCar, scene)
+    planner.simulate()
+
+    for node in planner.nodeList + planner.goalNodeList:
+
+        assert np.isclose(node.cost, get_cost_to_root(node)), 'Cached cost differs from cost to root'
+        if node.name != 'Root':
+            assert node.parent.childList.is_in_child_list(node), 'Node missing from its parent\'s child list'
+        assert len(node.childList.as_list()) == node.numChildren, 'Child list and child count disagree'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_add_and_remove()
+    test_cached_costs_match_tree()
+
+    print('passed all tests!')
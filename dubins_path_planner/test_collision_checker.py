@@ -0,0 +1,89 @@
+import math
+import random
+import numpy as np
+from collision_checker import find_first_collision, is_dubins_path_collision_free
+from car_models.dubins_path_sampler import sample_dubins_path
+
+DIMENSIONS = {'xmin': -10.0, 'xmax': 10.0, 'ymin': -10.0, 'ymax': 10.0}
+
+def get_random_obstacles(numObstacles):
+
+    obstacles = np.random.uniform(low = -10.0, high = 10.0, size = (numObstacles, 3))
+    obstacles[:, 2] = np.random.uniform(0.2, 2.0, size = (numObstacles,))
+
+    return obstacles
+
+def brute_force_first_collision(points, obstacles, dimensions):
+
+    # reference, one point and one obstacle at a time
+    for i, (x, y) in enumerate(points):
+
+        if x > dimensions['xmax'] or x < dimensions['xmin'] or y > dimensions['ymax'] or y < dimensions['ymin']:
+            return i
+
+        for obstacle in obstacles:
+            if np.linalg.norm(np.array([x, y]) - obstacle[:2]) < obstacle[2]:
+                return i
+
+    return None
+
+def test_matches_brute_force(numTestCases=200):
+
+    for i in range(numTestCases):
+
+        obstacles = get_random_obstacles(random.randint(0, 15))
+        points = np.random.uniform(low = -11.0, high = 11.0, size = (random.randint(1, 200), 2))
+
+        expected = brute_force_first_collision(points, obstacles, DIMENSIONS)
+        assert find_first_collision(points, obstacles, DIMENSIONS) == expected, 'First collision index disagrees'
+
+def test_collision_free_path():
+
+    obstacles = np.array([[5.0, 5.0, 1.0]])
+    points = np.column_stack((np.linspace(-5.0, 5.0, 100), np.zeros(100)))
+
+    assert find_first_collision(points, obstacles, DIMENSIONS) is None, 'Free path reported a collision'
+    assert find_first_collision(points, np.zeros((0, 3)), DIMENSIONS) is None, 'Empty scene reported a collision'
+
+def test_analytic_check_matches_dense_sampling(numTestCases=300):
+
+    turningRadius = 1.3
+
+    for i in range(numTestCases):
+
+        obstacles = get_random_obstacles(8)
+        startPosition = np.random.uniform(low = -6.0, high = 6.0, size = (3,))
+        startPosition[2] = random.uniform(0.0, 2.0 * math.pi)
+
+        word = ''.join(random.choice('LSR') for j in range(3))
+        params = [random.uniform(0.0, 5.0) if primitive == 'S' else random.uniform(0.0, 2.0 * math.pi) for primitive in word]
+
+        # reference, path sampled every half millimeter including its start
+        x, y, theta = sample_dubins_path(startPosition, word, params, turningRadius, 0.0005)
+        points = np.column_stack((np.concatenate(([startPosition[0]], x)), np.concatenate(([startPosition[1]], y))))
+        expected = find_first_collision(points, obstacles, DIMENSIONS) is None
+
+        collisionFree = is_dubins_path_collision_free(startPosition, word, params, turningRadius, obstacles, DIMENSIONS)
+        assert collisionFree == expected, 'Analytic check disagrees with sampled path on {}'.format(word)
+
+def test_analytic_check_catches_obstacle_between_samples():
+
+    # thin obstacle crossed by a straight line between two samples 1m apart
+    startPosition = np.array([0.0, 0.0, 0.0])
+    obstacles = np.array([[2.5, 0.0, 0.1]])
+
+    x, y, theta = sample_dubins_path(startPosition, 'S', [5.0], 1.0, 1.0)
+    assert find_first_collision(np.column_stack((x, y)), obstacles, DIMENSIONS) is None, 'Obstacle should fall between samples'
+    assert not is_dubins_path_collision_free(startPosition, 'S', [5.0], 1.0, obstacles, DIMENSIONS), 'Analytic check missed obstacle'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_matches_brute_force()
+    test_collision_free_path()
+    test_analytic_check_matches_dense_sampling()
+    test_analytic_check_catches_obstacle_between_samples()
+
+    print('passed all tests!')
@@ -0,0 +1,79 @@
+import math
+import random
+import numpy as np
+from car_models.dubins_cache import DubinsQueryCache
+from car_models.dubins_distance import shortest_dubins_path, heading_free_dubins_path
+
+def get_random_position():
+
+    position = np.random.uniform(low = -10.0, high = 10.0, size = (3,))
+    position[2] = random.uniform(0.0, 2.0 * math.pi)
+
+    return position
+
+def test_cache_matches_direct_queries(numTestCases=200):
+
+    cache = DubinsQueryCache()
+
+    for i in range(numTestCases):
+
+        start = get_random_position()
+        target = get_random_position()
+
+        for j in range(2):
+            assert cache.shortest_dubins_path(start, target, 1.0) == shortest_dubins_path(start, target, 1.0), 'Cached path differs'
+            assert cache.heading_free_dubins_path(start, target, 1.0) == heading_free_dubins_path(start, target, 1.0), 'Cached heading free path differs'
+
+    assert cache.misses == 2 * numTestCases, 'Wrong number of misses'
+    assert cache.hits == 2 * numTestCases, 'Wrong number of hits'
+    assert math.isclose(cache.get_hit_rate(), 0.5), 'Wrong hit rate'
+
+def test_keys():
+
+    cache = DubinsQueryCache()
+    start = np.array([0.0, 0.0, 0.0])
+
+    # heading free queries ignore the target heading, final heading ones do not
+    cache.heading_free_path_length(start, np.array([5.0, 5.0, 0.0]), 1.0)
+    cache.heading_free_path_length(start, np.array([5.0, 5.0, 1.0]), 1.0)
+    assert cache.hits == 1, 'Target heading should not matter without final heading'
+
+    cache.dubins_path_length(start, np.array([5.0, 5.0, 0.0]), 1.0)
+    cache.dubins_path_length(start, np.array([5.0, 5.0, 1.0]), 1.0)
+    assert cache.misses == 3, 'Target heading should matter with final heading'
+
+    # drift below the resolution still hits
+    cache.dubins_path_length(start + 1e-9, np.array([5.0, 5.0, 1.0]), 1.0)
+    assert cache.hits == 2, 'Quantized query missed'
+
+    cache.dubins_path_length(start, np.array([5.0, 5.0, 1.0]), 2.0)
+    assert cache.misses == 4, 'Turning radius should be part of the key'
+
+def test_lru_eviction():
+
+    cache = DubinsQueryCache(maxSize=2)
+    start = np.array([0.0, 0.0, 0.0])
+    targets = [np.array([5.0, float(i), 0.0]) for i in range(3)]
+
+    cache.dubins_path_length(start, targets[0], 1.0)
+    cache.dubins_path_length(start, targets[1], 1.0)
+    cache.dubins_path_length(start, targets[0], 1.0)
+    cache.dubins_path_length(start, targets[2], 1.0)
+    assert len(cache) == 2, 'Cache grew past its size'
+
+    # targets[1] was least recently used
+    cache.dubins_path_length(start, targets[0], 1.0)
+    assert cache.hits == 2, 'Recently used query was evicted'
+    cache.dubins_path_length(start, targets[1], 1.0)
+    assert cache.misses == 4, 'Least recently used query was kept'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_cache_matches_direct_queries()
+    test_keys()
+    test_lru_eviction()
+
+    print('passed all tests!')
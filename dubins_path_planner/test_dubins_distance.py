@@ -0,0 +1,154 @@
+import math
+import random
+import numpy as np
+from tqdm import tqdm
+from car_models.dubins_model import DubinsCar
+from car_models.dubins_optimal_planner import DubinsOptimalPlanner
+from car_models.dubins_path_sampler import get_path_end_position
+from car_models.dubins_distance import WORDS, LONG_PATH_WORDS, HEADING_FREE_WORDS, get_path_parameters, calculate_word_params,\
+        shortest_dubins_path, heading_free_dubins_path, batch_dubins_path_lengths, batch_heading_free_path_lengths
+
+def instantiate_car(startPosition, dt=0.01):
+
+    velocity = 1.0
+    maxSteeringAngle = (math.pi / 4.0)
+    U = [-1.0 * math.tan(maxSteeringAngle), math.tan(maxSteeringAngle)]
+    dubinsCar = DubinsCar(startPosition, velocity, U, dt)
+
+    return dubinsCar
+
+def get_random_pose(low=-5.0, high=5.0):
+
+    pose = np.random.uniform(low = low, high = high, size = (3,))
+    pose[2] = random.uniform(0.0, 2.0 * math.pi)
+
+    return pose
+
+def heading_error(theta, phi):
+
+    return abs(math.atan2(math.sin(theta - phi), math.cos(theta - phi)))
+
+def test_every_word_reaches_target(numTestCases=1000):
+
+    acceptableError = 1e-6
+    turningRadius = 1.0
+
+    for i in tqdm(range(numTestCases)):
+
+        startPosition = get_random_pose()
+        target = get_random_pose()
+        alpha, beta, d = get_path_parameters(startPosition, target, turningRadius)
+
+        for word in WORDS:
+
+            params = calculate_word_params(word, alpha, beta, d)
+            if params[0] is None:
+                continue
+
+            endPosition = get_path_end_position(startPosition, word, params, turningRadius)
+            assert np.linalg.norm(endPosition[:2] - target[:2]) < acceptableError, '{} missed target position'.format(word)
+            assert heading_error(endPosition[2], target[2]) < acceptableError, '{} missed target heading'.format(word)
+
+def test_shortest_path_is_shortest_word(numTestCases=1000):
+
+    turningRadius = 1.0
+
+    for i in range(numTestCases):
+
+        startPosition = get_random_pose()
+        target = get_random_pose()
+        alpha, beta, d = get_path_parameters(startPosition, target, turningRadius)
+
+        lengths = []
+        for word in WORDS:
+            params = calculate_word_params(word, alpha, beta, d)
+            if params[0] is not None:
+                lengths.append(sum(params) * turningRadius)
+
+        word, params, pathLength = shortest_dubins_path(startPosition, target, turningRadius, WORDS)
+        assert abs(pathLength - min(lengths)) < 1e-9, 'Shortest path is not the shortest word'
+
+        # dropping CCC words for far away targets never changes the answer
+        if d >= 4.0:
+            word, params, longPathLength = shortest_dubins_path(startPosition, target, turningRadius, LONG_PATH_WORDS)
+            assert abs(longPathLength - pathLength) < 1e-9, 'CCC word was optimal for a long path'
+
+def test_heading_free_path_matches_planner(numTestCases=100):
+
+    acceptableError = 0.1
+
+    for i in range(numTestCases):
+
+        startPosition = get_random_pose()
+        target = get_random_pose()
+
+        dubinsCar = instantiate_car(startPosition)
+        turningRadius = dubinsCar.minTurningRadius
+        if np.linalg.norm(target[:2] - startPosition[:2]) < 2.0 * turningRadius:
+            continue
+
+        word, params, pathLength = heading_free_dubins_path(startPosition, target, turningRadius)
+        endPosition = get_path_end_position(startPosition, word, params, turningRadius)
+        assert np.linalg.norm(endPosition[:2] - target[:2]) < 1e-6, 'Heading free path missed target'
+
+        planner = DubinsOptimalPlanner(dubinsCar, startPosition, target)
+        path = planner.run()
+        plannerPathLength = planner.angularDistanceTraveled + planner.linearDistanceTraveled
+
+        assert abs(plannerPathLength - pathLength) < 1e-9, 'Planner disagrees with path length'
+        carFinalPosition = np.array([path['x'][-1], path['y'][-1]])
+        assert np.linalg.norm(carFinalPosition - target[:2]) < acceptableError, 'Car did not reach goal'
+
+def test_unreachable_heading_free_target():
+
+    # target inside the turning circle of the car
+    startPosition = np.array([0.0, 0.0, 0.0])
+    target = np.array([0.0, 1.5, 0.0])
+
+    word, params, pathLength = heading_free_dubins_path(startPosition, target, 1.0)
+    assert word is None and pathLength is None, 'Target inside turning circle should be unreachable'
+
+def test_batch_lengths_match_single_queries(numStarts=500, numTargets=5):
+
+    turningRadius = 1.3
+    startPositions = np.array([get_random_pose() for i in range(numStarts)])
+    targets = np.array([get_random_pose() for i in range(numTargets)])
+
+    lengths, wordIndices = batch_dubins_path_lengths(startPositions, targets, turningRadius)
+    headingFreeLengths, headingFreeWordIndices = batch_heading_free_path_lengths(startPositions, targets[:, :2], turningRadius)
+    assert lengths.shape == (numStarts, numTargets), 'Wrong batch shape'
+
+    for i in range(numStarts):
+        for j in range(numTargets):
+
+            word, params, pathLength = shortest_dubins_path(startPositions[i], targets[j], turningRadius)
+            if word is None:
+                assert np.isnan(lengths[i, j]) and wordIndices[i, j] == -1, 'Batch found infeasible path'
+            else:
+                assert abs(lengths[i, j] - pathLength) < 1e-9, 'Batch length disagrees'
+                assert WORDS[wordIndices[i, j]] == word, 'Batch word disagrees'
+
+            word, params, pathLength = heading_free_dubins_path(startPositions[i], targets[j], turningRadius)
+            if word is None:
+                assert np.isnan(headingFreeLengths[i, j]) and headingFreeWordIndices[i, j] == -1, 'Batch found unreachable path'
+            else:
+                assert abs(headingFreeLengths[i, j] - pathLength) < 1e-9, 'Batch heading free length disagrees'
+                assert HEADING_FREE_WORDS[headingFreeWordIndices[i, j]] == word, 'Batch heading free word disagrees'
+
+    # a single target gives one result per start
+    singleLengths, singleWordIndices = batch_dubins_path_lengths(startPositions, targets[0], turningRadius)
+    assert singleLengths.shape == (numStarts,), 'Wrong single target shape'
+    assert np.array_equal(singleWordIndices, wordIndices[:, 0]), 'Single target disagrees with many targets'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_every_word_reaches_target()
+    test_shortest_path_is_shortest_word()
+    test_heading_free_path_matches_planner()
+    test_unreachable_heading_free_target()
+    test_batch_lengths_match_single_queries()
+
+    print('passed all tests!')
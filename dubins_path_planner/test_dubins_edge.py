@@ -0,0 +1,64 @@
+import math
+import random
+import numpy as np
+from car_models.dubins_edge import DubinsEdge, get_heading_free_edge, get_final_heading_edge
+from car_models.dubins_path_sampler import sample_dubins_path_as_path
+
+def get_random_position():
+
+    position = np.random.uniform(low = -10.0, high = 10.0, size = (3,))
+    position[2] = random.uniform(0.0, 2.0 * math.pi)
+
+    return position
+
+def test_lazy_path_matches_sampled_path(numTestCases=200):
+
+    turningRadius = 1.3
+    stepSize = 0.05
+
+    for i in range(numTestCases):
+
+        start = get_random_position()
+        word = ''.join(random.choice('LSR') for j in range(3))
+        params = [random.uniform(0.0, 2.0 * math.pi) for j in range(3)]
+
+        edge = DubinsEdge(start, word, params, turningRadius, stepSize)
+        expected = sample_dubins_path_as_path(start, word, params, turningRadius, stepSize)
+
+        assert np.array_equal(edge.get_path().states, expected.states), 'Lazy path differs from sampled path'
+        assert np.allclose(edge.endPosition, expected.get_end_position()), 'End position is not last sample'
+        assert math.isclose(edge.length, sum(params) * turningRadius), 'Edge has wrong length'
+
+def test_path_cache():
+
+    start = np.array([0.0, 0.0, 0.0])
+
+    edge = DubinsEdge(start, 'LSL', [1.0, 2.0, 1.0], 1.0, 0.1)
+    assert edge.get_path() is not edge.get_path(), 'Path should not be kept without caching'
+
+    edge = DubinsEdge(start, 'LSL', [1.0, 2.0, 1.0], 1.0, 0.1, cachePath=True)
+    path = edge.get_path()
+    assert edge.get_path() is path, 'Cached path was regenerated'
+    edge.clear_cache()
+    assert edge.get_path() is not path, 'Cleared path is still cached'
+
+def test_unreachable_edges():
+
+    start = np.array([0.0, 0.0, 0.0])
+
+    # target inside the turning circle cannot be reached without a final heading
+    assert get_heading_free_edge(start, np.array([0.0, 1.0]), 1.0, 0.1) is None, 'Unreachable target gave an edge'
+
+    edge = get_final_heading_edge(start, np.array([5.0, 5.0, 0.5 * math.pi]), 1.0, 0.1)
+    assert np.allclose(edge.endPosition[:2], [5.0, 5.0]), 'Final heading edge misses target'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_lazy_path_matches_sampled_path()
+    test_path_cache()
+    test_unreachable_edges()
+
+    print('passed all tests!')
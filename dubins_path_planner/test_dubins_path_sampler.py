@@ -0,0 +1,128 @@
+import math
+import random
+import numpy as np
+from tqdm import tqdm
+from car_models.dubins_model import DubinsCar, get_control_input
+from car_models.dubins_optimal_planner import DubinsOptimalPlanner
+from car_models.dubins_path_sampler import sample_dubins_path, get_path_end_position
+
+def instantiate_car(startPosition, dt=0.001):
+
+    velocity = 1.0
+    maxSteeringAngle = (math.pi / 4.0)
+    U = [-1.0 * math.tan(maxSteeringAngle), math.tan(maxSteeringAngle)]
+    dubinsCar = DubinsCar(startPosition, velocity, U, dt)
+
+    return dubinsCar
+
+def integrate_dubins_path(dubinsCar, word, params):
+
+    # reference path, stepping the car once per dt
+    path = {'x': [], 'y': [], 'theta': []}
+    stepSize = dubinsCar.velocity * dubinsCar.dt
+
+    for primitive, param in zip(word, params):
+
+        controlInput = get_control_input(primitive) * dubinsCar.umax
+        segmentLength = param * dubinsCar.minTurningRadius
+        traveled = 0.0
+
+        while traveled < segmentLength:
+
+            traveled += stepSize
+            state = dubinsCar.step(controlInput)
+
+            path['x'].append(state['x'])
+            path['y'].append(state['y'])
+            path['theta'].append(state['theta'])
+
+    return np.array([path['x'], path['y'], path['theta']])
+
+def get_random_word_and_params():
+
+    word = ''.join(random.choice('LSR') for i in range(random.randint(1, 3)))
+    params = []
+
+    for primitive in word:
+        if primitive == 'S':
+            params.append(random.uniform(0.0, 5.0))
+        else:
+            params.append(random.uniform(0.0, 2.0 * math.pi))
+
+    return word, params
+
+def test_matches_integrated_paths(numTestCases=200):
+
+    acceptableError = 0.05
+
+    for i in tqdm(range(numTestCases)):
+
+        startPosition = np.random.uniform(low = -5.0, high = 5.0, size = (3,))
+        startPosition[2] = random.uniform(0.0, 2.0 * math.pi)
+        word, params = get_random_word_and_params()
+
+        dubinsCar = instantiate_car(startPosition)
+        integratedPath = integrate_dubins_path(dubinsCar, word, params)
+
+        stepSize = dubinsCar.velocity * dubinsCar.dt
+        x, y, theta = sample_dubins_path(startPosition, word, params, dubinsCar.minTurningRadius, stepSize)
+        analyticPath = np.array([x, y, theta])
+
+        # at most one extra step per segment from the integrator overshooting
+        assert abs(analyticPath.shape[1] - integratedPath.shape[1]) <= len(word), 'Sample count differs on {}'.format(word)
+
+        numSamples = min(analyticPath.shape[1], integratedPath.shape[1])
+        positionError = np.linalg.norm(analyticPath[:2, :numSamples] - integratedPath[:2, :numSamples], axis=0)
+        assert numSamples == 0 or positionError.max() < acceptableError, 'Sampled path diverged on {}'.format(word)
+
+        headingError = np.abs(np.angle(np.exp(1j * (analyticPath[2, :numSamples] - integratedPath[2, :numSamples]))))
+        assert numSamples == 0 or headingError.max() < acceptableError, 'Sampled heading diverged on {}'.format(word)
+
+        # closed form end pose agrees with the last sample
+        if analyticPath.shape[1] > 0:
+            endPosition = get_path_end_position(startPosition, word, params, dubinsCar.minTurningRadius)
+            assert np.linalg.norm(endPosition[:2] - analyticPath[:2, -1]) < 1e-9, 'End pose disagrees with samples'
+
+def test_sample_spacing():
+
+    startPosition = np.array([0.0, 0.0, 0.0])
+
+    # half circle of radius 2 sampled every 0.1 meters
+    x, y, theta = sample_dubins_path(startPosition, 'L', [math.pi], 2.0, 0.1)
+
+    assert x.shape[0] == math.ceil(2.0 * math.pi / 0.1), 'Wrong number of samples'
+    spacing = np.hypot(np.diff(x), np.diff(y))
+    assert np.all(spacing < 0.1 + 1e-9), 'Samples are too far apart'
+    assert abs(x[-1]) < 1e-9 and abs(y[-1] - 4.0) < 1e-9, 'Arc did not end at top of circle'
+    assert abs(theta[-1] - math.pi) < 1e-9, 'Arc did not end facing backwards'
+
+def test_heading_free_planner_reaches_target(numTestCases=100):
+
+    acceptableError = 0.1
+
+    for i in range(numTestCases):
+
+        startPosition = np.random.uniform(low = -5.0, high = 5.0, size = (3,))
+        startPosition[2] = random.uniform(0.0, 2.0 * math.pi)
+        target = np.random.uniform(low = -5.0, high = 5.0, size = (3,))
+
+        dubinsCar = instantiate_car(startPosition, dt=0.01)
+        if np.linalg.norm(target[:2] - startPosition[:2]) < 2.0 * dubinsCar.minTurningRadius:
+            continue
+
+        planner = DubinsOptimalPlanner(dubinsCar, startPosition, target)
+        path = planner.run()
+
+        carFinalPosition = np.array([path['x'][-1], path['y'][-1]])
+        assert np.linalg.norm(carFinalPosition - target[:2]) < acceptableError, 'Car did not reach goal'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_matches_integrated_paths()
+    test_sample_spacing()
+    test_heading_free_planner_reaches_target()
+
+    print('passed all tests!')
@@ -0,0 +1,74 @@
+import random
+import numpy as np
+from planning_algorithms.node_grid import NodeGrid
+
+def get_random_positions(numPositions):
+
+    positions = np.random.uniform(low = -20.0, high = 20.0, size = (numPositions, 3))
+    positions[:, 2] = np.random.uniform(0.0, 2.0 * np.pi, size = (numPositions,))
+
+    return positions
+
+def brute_force_radius(positions, point, radius):
+
+    distances = np.hypot(positions[:, 0] - point[0], positions[:, 1] - point[1])
+
+    return np.flatnonzero(distances <= radius)
+
+def test_radius_query_matches_brute_force(numTestCases=200):
+
+    positions = get_random_positions(2000)
+    nodeGrid = NodeGrid(6.0, initialCapacity=16)
+
+    for position in positions:
+        nodeGrid.insert(position)
+
+    assert len(nodeGrid) == positions.shape[0], 'Grid lost nodes while growing'
+
+    for i in range(numTestCases):
+
+        point = np.random.uniform(low = -25.0, high = 25.0, size = (2,))
+        radius = random.uniform(0.0, 15.0)
+
+        indices = nodeGrid.query_radius(point, radius)
+        assert np.array_equal(indices, brute_force_radius(positions, point, radius)), 'Radius query missed nodes'
+
+def test_k_nearest_matches_brute_force(numTestCases=200):
+
+    positions = get_random_positions(500)
+    nodeGrid = NodeGrid(3.0)
+
+    for position in positions:
+        nodeGrid.insert(position)
+
+    for i in range(numTestCases):
+
+        point = np.random.uniform(low = -30.0, high = 30.0, size = (2,))
+        k = random.randint(1, 50)
+
+        indices = nodeGrid.query_k_nearest(point, k)
+        distances = np.hypot(positions[:, 0] - point[0], positions[:, 1] - point[1])
+        assert np.allclose(distances[indices], np.sort(distances)[:k]), 'K nearest query missed nodes'
+
+def test_update_moves_node_between_cells():
+
+    nodeGrid = NodeGrid(1.0)
+    idx = nodeGrid.insert(np.array([0.5, 0.5, 0.0]))
+    nodeGrid.insert(np.array([5.5, 5.5, 0.0]))
+
+    nodeGrid.update(idx, np.array([10.5, 10.5, 1.0]))
+
+    assert nodeGrid.query_radius(np.array([0.5, 0.5]), 1.0).shape[0] == 0, 'Node left behind in old cell'
+    assert np.array_equal(nodeGrid.query_radius(np.array([10.0, 10.0]), 1.0), [idx]), 'Node missing from new cell'
+    assert nodeGrid.get_positions([idx])[0, 2] == 1.0, 'Heading not updated'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+
+    test_radius_query_matches_brute_force()
+    test_k_nearest_matches_brute_force()
+    test_update_moves_node_between_cells()
+
+    print('passed all tests!')
@@ -0,0 +1,51 @@
+import json
+import numpy as np
+from car_models.path import Path
+
+def get_random_path(numStates):
+
+    return Path(np.random.uniform(low = -5.0, high = 5.0, size = (numStates, 3)))
+
+def test_concatenate_matches_list_concatenation():
+
+    paths = [get_random_path(n) for n in [10, 0, 25, 1, 7]]
+
+    reference = {'x': [], 'y': [], 'theta': []}
+    for path in paths:
+        pathDict = path.to_dict()
+        reference['x'] = reference['x'] + pathDict['x']
+        reference['y'] = reference['y'] + pathDict['y']
+        reference['theta'] = reference['theta'] + pathDict['theta']
+
+    joinedPath = Path.concatenate(paths)
+    assert len(joinedPath) == len(reference['x']), 'Concatenated path has wrong length'
+    assert np.allclose(joinedPath.get_end_position(), paths[-1].states[-1]), 'End position is not last state'
+    assert joinedPath.to_dict() == reference, 'Concatenated path differs from list concatenation'
+    assert len(Path.concatenate([])) == 0, 'Empty concatenation should be an empty path'
+
+def test_views_share_memory():
+
+    path = get_random_path(100)
+
+    assert np.shares_memory(path['x'], path.states), 'Column is not a view'
+    assert np.shares_memory(path[10:20].states, path.states), 'Slice is not a view'
+    assert np.shares_memory(path.downsample(10).states, path.states), 'Downsample is not a view'
+    assert len(path.downsample(10)) == 10, 'Downsampled path has wrong length'
+    assert np.array_equal(path.downsample(10)['theta'], path['theta'][::10]), 'Downsampled wrong states'
+
+def test_json_round_trip():
+
+    path = get_random_path(50)
+    pathDict = json.loads(json.dumps(path.to_dict()))
+
+    assert np.array_equal(Path.from_dict(pathDict).states, path.states), 'Path changed through json'
+
+if __name__ == '__main__':
+
+    np.random.seed(0)
+
+    test_concatenate_matches_list_concatenation()
+    test_views_share_memory()
+    test_json_round_trip()
+
+    print('passed all tests!')
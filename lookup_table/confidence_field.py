@@ -0,0 +1,188 @@
+import math
+import numpy as np
+
+# Classifier confidence precomputed on an (x, y, theta) grid over a scene so
+# planners can look it up instead of running the network.
+#
+# Every grid pose is scored by the model as a one timestep path from zero
+# states, so the field holds what the classifier infers from a single pose
+# and no path history. Entropy is normalized to [0, 1] by log of the number
+# of targets like the planner's entropy cost, and the gradient of every
+# target's confidence with respect to x, y and theta is taken by central
+# differences on the grid, theta wrapping around. Queries trilinearly
+# interpolate the grid, clamped to the scene's bounds in x and y.
+
+def normalize_positions(positions):
+
+    # same normalization as the training loaders and the planner
+    positions = np.array(positions, dtype=np.float32)
+    positions[..., :2] /= 10.0
+    positions[..., 2] -= math.pi
+    positions[..., 2] /= math.pi
+
+    return positions
+
+def denormalize_positions(positions):
+
+    positions = np.array(positions, dtype=np.float64)
+    positions[..., :2] *= 10.0
+    positions[..., 2] *= math.pi
+    positions[..., 2] += math.pi
+
+    return positions
+
+def normalized_entropy(confidence):
+
+    # normalized entropy over the last axis
+    numTargets = confidence.shape[-1]
+    logConfidence = np.log(np.maximum(confidence, np.finfo(np.float32).tiny))
+
+    return -np.sum(confidence * logConfidence, axis=-1) / math.log(numTargets)
+
+class ConfidenceField:
+
+    def __init__(self, dimensions, confidence, entropy=None, gradient=None):
+
+        # confidence is (x, y, theta, targets), x and y nodes span the scene's
+        # dimensions and theta nodes are spread evenly over [0, 2 pi)
+        self.dimensions = {key: float(dimensions[key]) for key in ('xmin', 'xmax', 'ymin', 'ymax')}
+        self.confidence = np.asarray(confidence, dtype=np.float32)
+        self.numX, self.numY, self.numHeadings, self.numTargets = self.confidence.shape
+
+        if self.numX < 2 or self.numY < 2 or self.numHeadings < 2:
+            raise ValueError('confidence grid needs at least two nodes along every axis')
+
+        self.xStep = (self.dimensions['xmax'] - self.dimensions['xmin']) / (self.numX - 1)
+        self.yStep = (self.dimensions['ymax'] - self.dimensions['ymin']) / (self.numY - 1)
+        self.headingStep = 2.0 * math.pi / self.numHeadings
+
+        if entropy is None:
+            entropy = normalized_entropy(self.confidence)
+        if gradient is None:
+            gradient = self._get_gradient()
+
+        self.entropyGrid = np.asarray(entropy, dtype=np.float32)
+        self.gradientGrid = np.asarray(gradient, dtype=np.float32)
+
+    @staticmethod
+    def get_grid_positions(dimensions, resolution, numHeadings):
+
+        # (x, y, theta, 3) poses of the grid nodes, x and y nodes at most
+        # resolution apart
+        numX = int(math.ceil((dimensions['xmax'] - dimensions['xmin']) / resolution)) + 1
+        numY = int(math.ceil((dimensions['ymax'] - dimensions['ymin']) / resolution)) + 1
+
+        xs = np.linspace(dimensions['xmin'], dimensions['xmax'], numX)
+        ys = np.linspace(dimensions['ymin'], dimensions['ymax'], numY)
+        headings = np.arange(numHeadings) * (2.0 * math.pi / numHeadings)
+
+        return np.stack(np.meshgrid(xs, ys, headings, indexing='ij'), axis=-1)
+
+    @classmethod
+    def from_model(cls, model, dimensions, resolution=0.25, numHeadings=16, batchSize=4096):
+
+        # model is anything with an edge scorer, the Keras and NumPy lstms
+        # or a TFLiteLSTM. Poses are scored batchSize at a time
+        scorer = model.get_edge_scorer()
+        positions = cls.get_grid_positions(dimensions, resolution, numHeadings)
+        instances = normalize_positions(positions.reshape(-1, 3))
+
+        confidence = []
+        for start in range(0, instances.shape[0], batchSize):
+            batch = instances[start:start + batchSize]
+            predictions, states = scorer.score([instance[np.newaxis] for instance in batch], [None] * batch.shape[0])
+            confidence.append(np.concatenate(predictions))
+
+        confidence = np.concatenate(confidence).reshape(positions.shape[:3] + (-1,))
+
+        return cls(dimensions, confidence)
+
+    def _get_gradient(self):
+
+        # (x, y, theta, targets, 3) derivatives of the confidences per unit of
+        # x, y and theta
+        dx = np.gradient(self.confidence, self.xStep, axis=0)
+        dy = np.gradient(self.confidence, self.yStep, axis=1)
+        dtheta = (np.roll(self.confidence, -1, axis=2) - np.roll(self.confidence, 1, axis=2)) / (2.0 * self.headingStep)
+
+        return np.stack([dx, dy, dtheta], axis=-1)
+
+    def save(self, fileName):
+
+        # half precision, the confidences are in [0, 1]
+        with open(fileName, 'wb') as f:
+            np.savez_compressed(f, confidence=self.confidence.astype(np.float16), entropy=self.entropyGrid.astype(np.float16),
+                                gradient=self.gradientGrid.astype(np.float16),
+                                dimensions=np.array([self.dimensions[key] for key in ('xmin', 'xmax', 'ymin', 'ymax')]))
+
+    @classmethod
+    def load(cls, fileName):
+
+        with np.load(fileName) as table:
+            dimensions = dict(zip(('xmin', 'xmax', 'ymin', 'ymax'), table['dimensions'].tolist()))
+
+            return cls(dimensions, table['confidence'], table['entropy'], table['gradient'])
+
+    def _get_corners(self, positions):
+
+        # lower grid indices and interpolation weights of (N, 3) poses
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+
+        fx = np.clip((positions[:, 0] - self.dimensions['xmin']) / self.xStep, 0.0, self.numX - 1)
+        fy = np.clip((positions[:, 1] - self.dimensions['ymin']) / self.yStep, 0.0, self.numY - 1)
+        ft = np.mod(positions[:, 2], 2.0 * math.pi) / self.headingStep
+
+        ix = np.minimum(fx.astype(np.intp), self.numX - 2)
+        iy = np.minimum(fy.astype(np.intp), self.numY - 2)
+        it = np.floor(ft).astype(np.intp)
+
+        wx, wy, wt = fx - ix, fy - iy, ft - it
+        it %= self.numHeadings
+
+        return (ix, iy, it), (wx, wy, wt)
+
+    def _interpolate(self, grid, positions):
+
+        (ix, iy, it), (wx, wy, wt) = self._get_corners(positions)
+        nextHeading = (it + 1) % self.numHeadings
+
+        # weights broadcast over the values stored at each node
+        trailing = (1,) * (grid.ndim - 3)
+        wx, wy, wt = wx.reshape((-1,) + trailing), wy.reshape((-1,) + trailing), wt.reshape((-1,) + trailing)
+
+        values = 0.0
+        for cx, weightX in ((ix, 1.0 - wx), (ix + 1, wx)):
+            for cy, weightY in ((iy, 1.0 - wy), (iy + 1, wy)):
+                values = values + (weightX * weightY) * ((1.0 - wt) * grid[cx, cy, it] + wt * grid[cx, cy, nextHeading])
+
+        return values.astype(np.float32)
+
+    def get_confidence(self, positions):
+
+        # (N, targets) confidences of (N, 3) x, y, theta poses
+        return self._interpolate(self.confidence, positions)
+
+    def get_entropy(self, positions):
+
+        return self._interpolate(self.entropyGrid, positions)
+
+    def get_gradient(self, positions):
+
+        # (N, targets, 3)
+        return self._interpolate(self.gradientGrid, positions)
+
+    def get_edge_scorer(self):
+
+        # stands in for the lstm in the adversarial planner, see score
+        return self
+
+    def score(self, sequences, states):
+
+        # same interface as classifiers.lstm.LSTMEdgeScorer.score for
+        # normalized sequences. The field has no memory, the states are
+        # passed through
+        lengths = [sequence.shape[0] for sequence in sequences]
+        confidence = self.get_confidence(denormalize_positions(np.concatenate(sequences)))
+        splits = np.cumsum(lengths)[:-1]
+
+        return np.split(confidence, splits), list(states)
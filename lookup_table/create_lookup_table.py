@@ -1,69 +1,90 @@
 import os
-import json
-import csv
-import numpy as np
+import sys
+import time
 import argparse
+import numpy as np
 
-def load_predictions(fileName):
-
-    pass
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
 
-def load_gradients(fileName):
+from dubins_path_planner.scene import Scene
+from lookup_table.confidence_field import ConfidenceField
 
-    with open(fileName, 'r') as f:
+def get_model(weightsFile, precision=None):
 
-        reader = csv.reader(f, delimiter=';')
-        for row in reader:
+    # same preference as the planner, the numpy engine exported by
+    # classifiers/export_numpy_lstm.py before the keras model
+    if precision is not None:
+        from classifiers.tflite_classifiers import TFLiteLSTM
+        return TFLiteLSTM('{}_{}.tflite'.format(weightsFile, precision))
 
-            if len(row) == 0:
-                continue
+    if os.path.exists(weightsFile + '.npz'):
+        from classifiers.numpy_lstm import NumpyLSTM
+        return NumpyLSTM.load(weightsFile + '.npz')
 
-            gradientsSingleInstance = []
-            for grad in row:
+    from classifiers.lstm import LSTM
 
-                grad = grad.replace('[', '')
-                grad = grad.replace(']', '')
-                grad = grad.split(',')
-                grad = [float(g) for g in grad]
-                grad = grad[3*self.target:3*(self.target+1)]
+    model = LSTM()
+    model.load_weights(weightsFile)
 
-                gradientsSingleInstance.append(grad)
-            
-            print(len(gradientsSingleInstance))
-            gradients.append(gradientsSingleInstance)
+    return model
 
-    return gradients
+def time_queries(field, numQueries=100000):
 
-def get_lookup_source(modelSelection, source):
+    # random poses inside the scene
+    dimensions = field.dimensions
+    positions = np.random.uniform(size=(numQueries, 3))
+    positions[:, 0] = dimensions['xmin'] + positions[:, 0] * (dimensions['xmax'] - dimensions['xmin'])
+    positions[:, 1] = dimensions['ymin'] + positions[:, 1] * (dimensions['ymax'] - dimensions['ymin'])
+    positions[:, 2] *= 2.0 * np.pi
 
-    fileNames = ['./{}/{}/tar_{}.csv'.format(source, modelSelection, target) for target in range(5)] 
-    sourceData = {0:[], 1:[], 2:[], 3:[], 4:[]}
+    start = time.perf_counter()
+    field.get_confidence(positions)
 
-    for target in range(2):
+    return (time.perf_counter() - start) / numQueries
 
-        fileName = fileNames[target]
+def create_lookup_table(sceneName, weightsFile, fileName, resolution=0.25, numHeadings=16, precision=None, batchSize=4096):
 
-        if source == "gradients":
-            sourceData[target] = load_gradients(fileName)
-        elif source == "predictions":
-            sourceData[target] = load_predictions(fileName)
+    scene = Scene(sceneName)
+    model = get_model(weightsFile, precision)
 
-    return sourceData
+    start = time.perf_counter()
+    field = ConfidenceField.from_model(model, scene.dimensions, resolution, numHeadings, batchSize)
+    print('scored {} poses in {:.1f} s'.format(field.numX * field.numY * field.numHeadings, time.perf_counter() - start))
 
-def create_lookup_table(modelSelection, source):
+    field.save(fileName)
+    print('saved {}, {} bytes'.format(fileName, os.path.getsize(fileName)))
+    print('{:.2f} us per interpolated query'.format(1e6 * time_queries(field)))
 
-    lookupTableSourceData = get_lookup_source(modelSelection, source)
+    return field
 
 if __name__ == '__main__':
 
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(description='Precompute classifier confidence, entropy and gradients on an (x, y, theta) grid over a scene.')
+
+    parser.add_argument('--directory', type=str, default='../data/')
+    parser.add_argument('--scene', type=str, default='tower_defense')
+    parser.add_argument('--algo', type=str, help='Planning algorithm', default='optimal_rrt')
+    parser.add_argument('--adv', type=str, help='Weights of the "planner"(adversary) or "predictor" lstm.', default='planner')
+    parser.add_argument('--resolution', type=float, help='Largest distance between grid nodes in x and y.', default=0.25)
+    parser.add_argument('--headings', type=int, help='Number of grid nodes in theta.', default=16)
+    parser.add_argument('--precision', type=str, help='Score with a float16 or int8 model from classifiers/quantize_classifiers.py.', default=None)
+    parser.add_argument('--batch_size', type=int, help='Poses scored per model call.', default=4096)
+    parser.add_argument('--output', type=str, help='Lookup table file, next to the weights by default.', default=None)
 
-    parser.add_argument('--model', type=str, default='lstm')
-    parser.add_argument('--source', type=str, default='gradients', help='gradients/confidence')
-    
     args = parser.parse_args()
 
-    modelSelection = args.model
-    source = args.source
+    dataDir = args.directory
+    if dataDir == 'tower':
+        dataDir = 'D:\\path_planning_data\\'
+
+    weightsDir = os.path.join(dataDir, '{}_dataset/{}_lstm_weights_{}'.format(args.scene, args.algo, args.adv))
+    weightsFile = os.path.join(weightsDir, 'lstm_final_weights')
+
+    fileName = args.output
+    if fileName is None:
+        fileName = os.path.join(weightsDir, 'lstm_confidence_field.npz')
 
-    create_lookup_table(modelSelection, source)
+    np.random.seed(0)
+    create_lookup_table(args.scene, weightsFile, fileName, args.resolution, args.headings, args.precision, args.batch_size)
@@ -0,0 +1,139 @@
+import os
+import math
+import random
+import tempfile
+import numpy as np
+from confidence_field import ConfidenceField, normalize_positions, denormalize_positions
+
+DIMENSIONS = {'xmin': -10.0, 'xmax': 10.0, 'ymin': -5.0, 'ymax': 5.0}
+
+class PoseScorer:
+
+    # scores one timestep sequences with a smooth function of the pose
+    # instead of a network, and counts its calls
+    def __init__(self, numTargets=5):
+
+        self.weights = np.random.normal(size=(3, numTargets))
+        self.numCalls = 0
+
+    def get_confidence(self, positions):
+
+        features = np.stack([positions[:, 0] / 10.0, positions[:, 1] / 10.0, np.cos(positions[:, 2])], axis=1)
+        logits = features @ self.weights
+
+        return np.exp(logits) / np.sum(np.exp(logits), axis=1, keepdims=True)
+
+    def get_edge_scorer(self):
+
+        return self
+
+    def score(self, sequences, states):
+
+        self.numCalls += 1
+        positions = denormalize_positions(np.concatenate(sequences))
+
+        return list(self.get_confidence(positions)[:, np.newaxis, :]), list(states)
+
+def get_random_positions(numPositions):
+
+    positions = np.random.uniform(size=(numPositions, 3))
+    positions[:, 0] = DIMENSIONS['xmin'] + positions[:, 0] * (DIMENSIONS['xmax'] - DIMENSIONS['xmin'])
+    positions[:, 1] = DIMENSIONS['ymin'] + positions[:, 1] * (DIMENSIONS['ymax'] - DIMENSIONS['ymin'])
+    positions[:, 2] *= 2.0 * math.pi
+
+    return positions
+
+def get_linear_field(numHeadings=8):
+
+    # confidences linear in x and y, the same at every heading
+    positions = ConfidenceField.get_grid_positions(DIMENSIONS, 0.5, numHeadings)
+    confidence = np.stack([0.02 * positions[..., 0] + 0.5, 0.05 * positions[..., 1] + 0.5], axis=-1)
+
+    return ConfidenceField(DIMENSIONS, confidence)
+
+def test_grid_matches_model():
+
+    scorer = PoseScorer()
+    field = ConfidenceField.from_model(scorer, DIMENSIONS, resolution=1.0, numHeadings=12, batchSize=100)
+
+    positions = ConfidenceField.get_grid_positions(DIMENSIONS, 1.0, 12)
+    assert field.confidence.shape == positions.shape[:3] + (5,), 'Grid has the wrong shape'
+    assert np.allclose(field.confidence, scorer.get_confidence(positions.reshape(-1, 3)).reshape(field.confidence.shape), atol=1e-5), 'Grid differs from the model'
+    assert scorer.numCalls == -(-positions[..., 0].size // 100), 'Poses were not scored in batches'
+
+    # queries at the nodes return the node values
+    assert np.allclose(field.get_confidence(positions.reshape(-1, 3)), field.confidence.reshape(-1, 5), atol=1e-5), 'Node query differs from grid'
+    assert np.allclose(field.get_entropy(positions.reshape(-1, 3)), field.entropyGrid.reshape(-1), atol=1e-5), 'Node entropy differs from grid'
+
+def test_interpolation(numTestCases=500):
+
+    field = get_linear_field()
+    positions = get_random_positions(numTestCases)
+
+    expected = np.stack([0.02 * positions[:, 0] + 0.5, 0.05 * positions[:, 1] + 0.5], axis=-1)
+    assert np.allclose(field.get_confidence(positions), expected, atol=1e-5), 'Interpolation is not linear between nodes'
+
+    # clamped outside the scene
+    outside = np.array([[-20.0, 20.0, 1.0]])
+    assert np.allclose(field.get_confidence(outside), [[0.02 * -10.0 + 0.5, 0.05 * 5.0 + 0.5]], atol=1e-5), 'Query was not clamped to the scene'
+
+    # slopes are recovered, constant in theta
+    gradient = field.get_gradient(positions)
+    assert np.allclose(gradient[:, 0], [0.02, 0.0, 0.0], atol=1e-5), 'Wrong gradient of the first target'
+    assert np.allclose(gradient[:, 1], [0.0, 0.05, 0.0], atol=1e-5), 'Wrong gradient of the second target'
+
+def test_heading_wraps_around():
+
+    numHeadings = 8
+    positions = ConfidenceField.get_grid_positions(DIMENSIONS, 2.0, numHeadings)
+    confidence = np.broadcast_to(np.arange(numHeadings, dtype=float)[np.newaxis, np.newaxis, :, np.newaxis], positions.shape[:3] + (2,))
+    field = ConfidenceField(DIMENSIONS, confidence)
+
+    step = 2.0 * math.pi / numHeadings
+    queries = np.array([[0.0, 0.0, 2.0 * math.pi - (0.5 * step)], [0.0, 0.0, -0.5 * step], [0.0, 0.0, (2.0 * math.pi) + step]])
+
+    assert np.allclose(field.get_confidence(queries)[:, 0], [3.5, 3.5, 1.0], atol=1e-5), 'Heading did not wrap around'
+
+    # central difference across the seam
+    assert np.isclose(field.gradientGrid[0, 0, 0, 0, 2], (1.0 - 7.0) / (2.0 * step), atol=1e-5), 'Heading gradient did not wrap around'
+
+def test_score_matches_queries(numSequences=10):
+
+    field = ConfidenceField.from_model(PoseScorer(), DIMENSIONS, resolution=0.5, numHeadings=16)
+
+    sequences = [normalize_positions(get_random_positions(random.randint(1, 8))) for i in range(numSequences)]
+    states = [None if i % 2 == 0 else [np.zeros((1, 4)), np.zeros((1, 4))] for i in range(numSequences)]
+
+    predictions, finalStates = field.get_edge_scorer().score(sequences, states)
+
+    for i in range(numSequences):
+        assert predictions[i].shape == (sequences[i].shape[0], 5), 'Wrong number of predictions'
+        assert np.allclose(predictions[i], field.get_confidence(denormalize_positions(sequences[i])), atol=1e-6), 'Score differs from query'
+        assert finalStates[i] is states[i], 'States were not passed through'
+
+def test_save_and_load():
+
+    field = ConfidenceField.from_model(PoseScorer(), DIMENSIONS, resolution=1.0, numHeadings=8)
+    positions = get_random_positions(100)
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        fileName = os.path.join(directory, 'lstm_confidence_field.npz')
+        field.save(fileName)
+        loaded = ConfidenceField.load(fileName)
+
+    assert loaded.dimensions == field.dimensions, 'Dimensions differ'
+    assert np.allclose(loaded.get_confidence(positions), field.get_confidence(positions), atol=1e-3), 'Loaded confidence differs'
+    assert np.allclose(loaded.get_entropy(positions), field.get_entropy(positions), atol=1e-3), 'Loaded entropy differs'
+    assert np.allclose(loaded.get_gradient(positions), field.get_gradient(positions), atol=1e-2), 'Loaded gradient differs'
+
+if __name__ == '__main__':
+
+    random.seed(0)
+    np.random.seed(0)
+    test_grid_matches_model()
+    test_interpolation()
+    test_heading_wraps_around()
+    test_score_matches_queries()
+    test_save_and_load()
+    print('passed all tests!')